@@ -0,0 +1,291 @@
+"""
+Content-addressed, disk-backed cache for synthesized speech.
+
+The interview pages ask ``/tts`` for the same question texts again and again
+(replays, reloads, and every candidate who gets a pooled question set). Each
+clip is stored once under a hash of everything that determines its audio, so
+a repeat request is a file send instead of a TTS call. The directory is
+bounded by total size and the least recently played clips are evicted first.
+
+Several workers can share the directory. Each keeps its own index, but plays
+are recorded in the files' mtimes and the directory is re-scanned every
+``rescan_seconds`` when a clip is added and before evicting, so the size bound
+and the LRU order cover every worker's clips (clips other workers added since
+the last scan can overshoot it briefly).
+
+Clips are named ``<sha256>.<format>``, so the id alone says how to serve it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Optional
+
+# Speech formats offered to clients, with the media type each is served as.
+# OpenAI's opus output is Ogg-encapsulated.
+AUDIO_FORMATS = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+    "aac": "audio/aac",
+}
+
+# Accept media types that select a format, beyond the canonical ones above
+ACCEPT_ALIASES = {
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/ogg": "opus",
+    "audio/opus": "opus",
+    "audio/aac": "aac",
+    "audio/mp4": "aac",
+}
+
+# Temp files untouched for this long were left by a crashed write; younger ones may
+# belong to another worker still streaming into them
+STALE_TMP_SECONDS = 3600
+# Eviction frees space down to this fraction of max_bytes, so the directory is
+# re-scanned once per batch of evictions rather than on every new clip
+EVICT_TO_FRACTION = 0.9
+
+
+def negotiate_audio_format(accept: Optional[str], default: str = "mp3") -> str:
+    """Pick the client's most preferred format named explicitly in ``accept``.
+
+    Wildcards don't select anything, so existing clients keep getting mp3.
+    """
+    best, best_q = default, 0.0
+    for item in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        audio_format = ACCEPT_ALIASES.get(media_type.lower())
+        if audio_format is None:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = audio_format, q
+    return best
+
+
+def tts_cache_key(model: str, voice: str, text: str, response_format: str = "mp3") -> str:
+    """Content address of a clip: identical inputs always produce the same key."""
+    payload = json.dumps([model, voice, response_format, text], ensure_ascii=False)
+    return f"{hashlib.sha256(payload.encode('utf-8')).hexdigest()}.{response_format}"
+
+
+def audio_media_type(key: str) -> str:
+    return AUDIO_FORMATS.get(key.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+class AudioCacheWriter:
+    """Incrementally writes one clip, published only on ``commit()``."""
+
+    def __init__(self, cache: "AudioCache", key: str):
+        self.cache = cache
+        self.key = key
+        self.size = 0
+        self.published: Optional[str] = None
+        self._tmp_path = f"{cache.path(key)}.{os.getpid()}.{id(self)}.tmp"
+        self._file = open(self._tmp_path, "wb")
+
+    @property
+    def active(self) -> bool:
+        """Still writing: neither committed nor aborted."""
+        return self._file is not None
+
+    def write(self, chunk: bytes) -> None:
+        if self._file is None:
+            return
+        self.size += len(chunk)
+        if self.size > self.cache.max_bytes:
+            # Larger than the whole cache: keep streaming, stop caching
+            self.abort()
+            return
+        self._file.write(chunk)
+        # Flushed so reopen() sees every chunk written so far
+        self._file.flush()
+
+    def reopen(self) -> Optional[BinaryIO]:
+        """Open what has been written so far for reading, or None if it was not kept.
+
+        The open file stays readable when the clip is published or evicted.
+        """
+        path = self._tmp_path if self._file is not None else self.published
+        if path is None:
+            return None
+        try:
+            return open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+    def commit(self) -> Optional[str]:
+        if self._file is None:
+            return None
+        self._file.close()
+        self._file = None
+        self.published = self.cache._publish(self.key, self._tmp_path, self.size)
+        return self.published
+
+    def abort(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.remove(self._tmp_path)
+
+
+class AudioCache:
+    """Size-bounded LRU of audio files in ``directory``.
+
+    The LRU index lives in memory and is rebuilt from the files (least
+    recently played first, by mtime) when the cache is opened and before
+    evicting, so clips survive restarts and other workers' clips count
+    against the budget. The directory is read on first use and created with
+    the first clip. A ``max_bytes`` of 0 disables caching.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, rescan_seconds: float = 10):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._loaded = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _load_index(self) -> None:
+        """Index the clips already on disk; called with the lock held."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if os.path.isdir(self.directory):
+            self._rescan(remove_stale_tmp=True)
+            self._evict()
+
+    def _rescan(self, remove_stale_tmp: bool = False) -> None:
+        """Rebuild the index from the directory, which other workers also write to.
+
+        Clips are ordered by mtime; ties keep this worker's LRU order.
+        """
+        rank = {key: i for i, key in enumerate(self._index)}
+        entries = []
+        now = self._scanned_at = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+                if name.endswith(".tmp"):
+                    if remove_stale_tmp and now - stat.st_mtime > STALE_TMP_SECONDS:
+                        # Left behind by an interrupted write
+                        os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue  # evicted or published by another worker meanwhile
+            entries.append((stat.st_mtime, rank.get(name, -1), name, stat.st_size))
+        self._index.clear()
+        self._bytes = 0
+        for _, _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+
+    def _evict(self) -> None:
+        if self._bytes <= self.max_bytes:
+            return
+        self._rescan()
+        while self._bytes > self.max_bytes * EVICT_TO_FRACTION and self._index:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._load_index()
+        return key in self._index
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the file path for ``key`` if cached, marking it recently used."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._load_index()
+            try:
+                size = os.stat(self.path(key)).st_size
+            except FileNotFoundError:
+                self._bytes -= self._index.pop(key, 0)
+                self.misses += 1
+                return None
+            # A clip another worker published is adopted into this worker's index
+            self._bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self.hits += 1
+        try:
+            # Recorded on the file so other workers' evictions see the play too
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+        return self.path(key)
+
+    def writer(self, key: str) -> Optional[AudioCacheWriter]:
+        """Start writing a clip chunk by chunk (None when disabled)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._load_index()
+        os.makedirs(self.directory, exist_ok=True)
+        return AudioCacheWriter(self, key)
+
+    def put(self, key: str, audio: bytes) -> Optional[str]:
+        """Store ``audio`` under ``key`` and return its path (None when disabled)."""
+        writer = self.writer(key)
+        if writer is None:
+            return None
+        writer.write(audio)
+        return writer.commit()
+
+    def _publish(self, key: str, tmp_path: str, size: int) -> str:
+        path = self.path(key)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            if time.time() - self._scanned_at >= self.rescan_seconds:
+                self._rescan()
+            self._evict()
+        return path
+
+    def stats(self) -> Dict[str, float]:
+        if self.enabled:
+            with self._lock:
+                self._load_index()
+        lookups = self.hits + self.misses
+        return {
+            "clips": len(self._index),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
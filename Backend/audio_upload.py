@@ -0,0 +1,149 @@
+"""
+Streaming, size-limited handling of recorded-answer uploads.
+
+``UploadFile`` buffers the whole multipart body before the endpoint runs, and
+``/whisper`` used to copy it once more into a BytesIO. Here the request body
+is parsed as it arrives: the audio part goes into a SpooledTemporaryFile
+(memory below ``spool_bytes``, a temp file above it), and the request is
+rejected with 413 as soon as it is known to be over the size or duration
+limits, before the rest of the body is read.
+
+Recordings aren't decoded, so the duration limit applies to the length the
+client declares in the ``X-Audio-Duration`` header or a ``duration`` form
+field (the browser knows it from the MediaRecorder).
+"""
+
+import hashlib
+import tempfile
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Plain form fields next to the audio (e.g. "duration") are tiny
+MAX_FIELD_BYTES = 1024
+
+
+class AudioUpload:
+    """The audio part of an upload, spooled to memory or disk.
+
+    The SHA-256 of the audio is computed while it streams in.
+    """
+
+    def __init__(self, spool_bytes: int):
+        self.file = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.size = 0
+        self.fields: Dict[str, str] = {}
+        self._hash = hashlib.sha256()
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def openai_file(self) -> Tuple[str, object, str]:
+        """File argument for the OpenAI client; the spooled file is streamed as is."""
+        self.file.seek(0)
+        return (self.filename or "audio.webm", self.file, self.content_type or "application/octet-stream")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def check_duration(declared: Optional[str], max_seconds: float) -> None:
+    if declared is None or not max_seconds:
+        return
+    try:
+        seconds = float(declared)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Audio duration must be a number of seconds.")
+    if seconds > max_seconds:
+        raise HTTPException(status_code=413, detail=f"Recording is longer than {max_seconds:g} seconds.")
+
+
+async def receive_audio_upload(request: Request, field: str = "audio_file", *, max_bytes: int,
+                               spool_bytes: int, max_seconds: float = 0) -> AudioUpload:
+    """Stream the multipart body of ``request`` and return its ``field`` part.
+
+    Raises HTTPException 413 once the audio exceeds ``max_bytes`` or the
+    declared duration exceeds ``max_seconds``, and 422 for malformed uploads.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=422, detail=f"Expected a multipart upload with an '{field}' file.")
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > max_bytes + 64 * 1024:
+        raise HTTPException(status_code=413, detail=f"Audio upload is larger than {max_bytes} bytes.")
+    check_duration(request.headers.get("x-audio-duration"), max_seconds)
+
+    upload = AudioUpload(spool_bytes)
+    part = {}
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers={}, header_field=b"", header_value=b"", name=None, is_file=False, value=b"")
+
+    def on_header_field(data, start, end):
+        part["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["header_value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["header_field"].lower()] = part["header_value"]
+        part["header_field"] = part["header_value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition"))
+        part["name"] = disposition.get(b"name", b"").decode("utf-8", "replace")
+        if part["name"] == field and b"filename" in disposition:
+            part["is_file"] = True
+            upload.filename = disposition[b"filename"].decode("utf-8", "replace")
+            content_type = part["headers"].get(b"content-type")
+            upload.content_type = content_type.decode("latin-1") if content_type else None
+
+    def on_part_data(data, start, end):
+        if part["is_file"]:
+            if upload.size + (end - start) > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Audio upload is larger than {max_bytes} bytes.")
+            upload.write(data[start:end])
+        else:
+            part["value"] += data[start:end]
+            if len(part["value"]) > MAX_FIELD_BYTES:
+                raise HTTPException(status_code=413, detail=f"Form field '{part['name']}' is too large.")
+
+    def on_part_end():
+        if not part["is_file"]:
+            upload.fields[part["name"]] = part["value"].decode("utf-8", "replace")
+            if part["name"] == "duration":
+                check_duration(upload.fields["duration"], max_seconds)
+
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+        if upload.filename is None:
+            raise HTTPException(status_code=422, detail=f"No '{field}' file in the upload.")
+    except HTTPException:
+        upload.close()
+        raise
+    except Exception as e:
+        upload.close()
+        raise HTTPException(status_code=422, detail=f"Malformed upload: {e}")
+    upload.file.seek(0)
+    return upload
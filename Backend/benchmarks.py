@@ -0,0 +1,275 @@
+"""
+Microbenchmarks for the in-process work around each LLM call.
+
+Times the hot paths that don't wait on OpenAI, with a zero-latency fake
+model where a model is involved, so the numbers are the server's own
+overhead:
+
+- parse_*: the evaluation and report parsers (labelled and JSON replies)
+- report_prompt: rendering the running summary into the final report prompt
+- create_session_graph: one run of the session creation graph
+- session_round_trip[sessions=N]: get_state + update_state with N sessions stored
+- serialize_*: Pydantic response models to JSON
+
+Results are printed and, with ``--output``, written as JSON. ``--compare``
+reads an earlier result file and exits 1 if any benchmark's median got
+slower by more than ``--threshold``:
+
+    python benchmarks.py --output bench.json
+    python benchmarks.py --compare bench.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+# The benchmarks never reach OpenAI; main and llm_setup only need a key to import
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+QUESTIONS = [
+    "What is React and why is it used?",
+    "Explain the difference between state and props.",
+    "How does the virtual DOM work?",
+    "What are React hooks and name a few common ones?",
+    "How would you optimize a slow React application?",
+]
+
+EVALUATION = """USER_FEEDBACK: Good start! You explained what React is, but try to mention the virtual DOM and how
+components re-render. Practising with a small project will make these ideas stick.
+
+ADMIN_SCORE: 7
+ADMIN_TECHNICAL_ACCURACY: 7
+ADMIN_COMPLETENESS: 6
+ADMIN_CLARITY: 8
+ADMIN_KEY_STRENGTH: Clear explanation of component-based UI
+ADMIN_KEY_GAP: Did not mention the virtual DOM or reconciliation
+ADMIN_FEEDBACK: Solid basics for 2 years of experience. Knows what React is for and explains it clearly, but the
+answer stays at the surface. Recommend a follow-up question on rendering behaviour before deciding."""
+
+REPORT = """USER_REPORT: Congratulations on completing the interview! You showed a good grasp of React fundamentals.
+Keep practising hooks and performance techniques.
+
+ADMIN_REPORT: Candidate demonstrates solid React fundamentals with gaps in rendering internals and performance.
+Technical accuracy: 7/10, Communication: 8/10. Recommendation: Consider with conditions."""
+
+Benchmarked = Union[Callable[[], object], Callable[[], Awaitable[object]]]
+
+
+def summarize(name: str, samples: List[float], number: int) -> Dict[str, object]:
+    """Per-call statistics in microseconds from ``samples`` (seconds per round of ``number`` calls)."""
+    per_call = sorted(sample / number * 1e6 for sample in samples)
+    median = statistics.median(per_call)
+    return {
+        "name": name,
+        "unit": "us",
+        "rounds": len(per_call),
+        "iterations": number,
+        "min": round(per_call[0], 3),
+        "median": round(median, 3),
+        "mean": round(statistics.fmean(per_call), 3),
+        "p95": round(per_call[min(len(per_call) - 1, int(len(per_call) * 0.95))], 3),
+        "ops_per_second": round(1e6 / median, 1) if median else None,
+    }
+
+
+async def measure(name: str, func: Benchmarked, is_async: bool, rounds: int, min_round_seconds: float) -> dict:
+    """Time ``func`` in rounds, calibrating the calls per round so each lasts ``min_round_seconds``."""
+    async def run(number: int) -> float:
+        start = time.perf_counter()
+        if is_async:
+            for _ in range(number):
+                await func()
+        else:
+            for _ in range(number):
+                func()
+        return time.perf_counter() - start
+
+    number = 1
+    while (elapsed := await run(number)) < min_round_seconds and number < 1_000_000:
+        number *= 10 if elapsed < min_round_seconds / 10 else 2
+    samples = [await run(number) for _ in range(rounds)]
+    return summarize(name, samples, number)
+
+
+class Suite:
+    """Benchmarks by name.
+
+    Each is registered as an async generator that builds its fixtures, yields
+    the function to time and cleans up after it, like a pytest fixture.
+    """
+
+    def __init__(self):
+        self.benchmarks: List[tuple] = []
+
+    def add(self, name: str, is_async: bool = False):
+        def register(setup):
+            self.benchmarks.append((name, setup, is_async))
+            return setup
+        return register
+
+    async def run(self, rounds: int, min_round_seconds: float, only: Optional[str] = None) -> List[dict]:
+        results = []
+        for name, setup, is_async in self.benchmarks:
+            if only and only not in name:
+                continue
+            fixture = setup()
+            try:
+                result = await measure(name, await fixture.__anext__(), is_async, rounds, min_round_seconds)
+            finally:
+                await fixture.aclose()
+            print(f"{name:<40} median {result['median']:>12.1f} us   p95 {result['p95']:>12.1f} us", file=sys.stderr)
+            results.append(result)
+        return results
+
+
+def build_suite(session_counts: List[int]) -> Suite:
+    import llm_setup
+    import main
+    from langchain_core.runnables import RunnableLambda
+    from llm_output import parse_evaluation, parse_report
+    from session_store import create_checkpointer
+
+    suite = Suite()
+    evaluation = parse_evaluation(EVALUATION)
+
+    def evaluated_state(job_role: str = "React Developer") -> dict:
+        state = {
+            "job_role": job_role, "experience": 2,
+            "data": [{"question": q, "answer": "", "feedback": {}} for q in QUESTIONS],
+            "summary": [], "current_question_idx": 0, "interview_complete": False, "final_report": "",
+            "report_status": "pending", "last_question": QUESTIONS[0], "last_answer": None,
+        }
+        for idx in range(len(QUESTIONS)):
+            state = main.record_evaluation(state, idx, "React is a library for building user interfaces. " * 5,
+                                           dict(evaluation))
+        return state
+
+    @suite.add("parse_evaluation[labelled]")
+    async def _():
+        yield lambda: parse_evaluation(EVALUATION)
+
+    @suite.add("parse_evaluation[json]")
+    async def _():
+        reply = "```json\n" + json.dumps(evaluation) + "\n```"
+        yield lambda: parse_evaluation(reply)
+
+    @suite.add("parse_report")
+    async def _():
+        yield lambda: parse_report(REPORT)
+
+    @suite.add("report_prompt")
+    async def _():
+        state = evaluated_state()
+
+        def assemble():
+            interview_results, _ = main.render_interview_summary(main.interview_summary(state))
+            return main.FINAL_REPORT_PROMPT.format_messages(
+                job_role=state["job_role"], experience=state["experience"], interview_results=interview_results,
+            )
+        yield assemble
+
+    @suite.add("create_session_graph", is_async=True)
+    async def _():
+        # Every run generates questions for a new role, so none come from the question cache
+        previous_llm, llm_setup.llm = llm_setup.llm, RunnableLambda(lambda _prompt: json.dumps(QUESTIONS))
+        graph = main.workflow.compile(checkpointer=create_checkpointer("memory", compaction="inline"))
+        counter = iter(range(sys.maxsize))
+
+        async def create():
+            n = next(counter)
+            await graph.ainvoke(
+                {"job_role": f"Benchmark Role {n}", "experience": 2, "data": [], "summary": [],
+                 "current_question_idx": 0, "interview_complete": False, "final_report": "",
+                 "report_status": "pending", "last_question": "", "last_answer": None},
+                config={"configurable": {"thread_id": f"create-{n}"}},
+            )
+        try:
+            yield create
+        finally:
+            llm_setup.llm = previous_llm
+
+    for sessions in session_counts:
+        @suite.add(f"session_round_trip[sessions={sessions}]", is_async=True)
+        async def _(sessions=sessions):
+            graph = main.workflow.compile(checkpointer=create_checkpointer("memory", compaction="inline"))
+            state = evaluated_state()
+            for n in range(sessions):
+                await graph.aupdate_state({"configurable": {"thread_id": f"session-{n}"}}, state)
+            counter = iter(range(sys.maxsize))
+
+            async def round_trip():
+                config = {"configurable": {"thread_id": f"session-{next(counter) % sessions}"}}
+                values = (await graph.aget_state(config)).values
+                await graph.aupdate_state(config, {"last_answer": values["last_answer"]})
+            yield round_trip
+
+    @suite.add("serialize_answer_response")
+    async def _():
+        state = evaluated_state()
+        yield lambda: main.build_answer_response(state, 2).model_dump_json()
+
+    @suite.add("serialize_session_state")
+    async def _():
+        state = evaluated_state()
+        yield lambda: main.SessionState(
+            job_role=state["job_role"], experience=state["experience"], data=state["data"],
+            current_question_idx=state["current_question_idx"], final_report="",
+        ).model_dump_json()
+
+    return suite
+
+
+def compare(results: List[dict], baseline: dict, threshold: float) -> List[dict]:
+    """Benchmarks whose median is more than ``threshold`` slower than in ``baseline``."""
+    before = {result["name"]: result for result in baseline.get("benchmarks", [])}
+    regressions = []
+    for result in results:
+        previous = before.get(result["name"])
+        if previous and previous["median"] and result["median"] > previous["median"] * (1 + threshold):
+            regressions.append({
+                "name": result["name"],
+                "baseline_median": previous["median"],
+                "median": result["median"],
+                "change": round(result["median"] / previous["median"] - 1, 3),
+            })
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    cli = argparse.ArgumentParser(description="Benchmark the server's in-process hot paths.")
+    cli.add_argument("--output", help="Write results as JSON to this file")
+    cli.add_argument("--compare", help="Earlier JSON results to check for regressions")
+    cli.add_argument("--threshold", type=float, default=0.2, help="Allowed median slowdown, as a fraction")
+    cli.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    cli.add_argument("--sessions", default="100,1000,10000", help="Stored session counts for the round trip")
+    cli.add_argument("--rounds", type=int, default=15)
+    cli.add_argument("--min-round-seconds", type=float, default=0.05)
+    args = cli.parse_args(argv)
+
+    suite = build_suite([int(count) for count in args.sessions.split(",") if count])
+    results = asyncio.run(suite.run(args.rounds, args.min_round_seconds, args.filter))
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["regressions"] = compare(results, json.load(f), args.threshold)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report))
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
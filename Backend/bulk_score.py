@@ -0,0 +1,257 @@
+"""
+Offline bulk re-scoring of interview answers.
+
+Reads a JSONL file of answers, one per line:
+
+    {"id": "...", "job_role": "React Developer", "experience": 2, "question": "...", "answer": "..."}
+    {"id": "...", "skills": ["react", "nodejs"], "experience": 3, "question": "...", "answer": "..."}
+
+and evaluates each with the same prompts and parsing as the live interview,
+writing one result line per answer as soon as it is scored. Input is read
+lazily and only a bounded window of lines is in flight, so memory stays flat
+however large the file is.
+
+Progress is checkpointed next to the output (``<output>.ckpt``): the line
+number below which everything is done (the watermark), the lines above it
+that are already done, and the output size at that point. An interrupted
+run started again with the same arguments truncates the output to the
+checkpoint and continues from there.
+
+Answers that can't be scored (bad JSON, no answer) get an ``error`` row.
+Lines that failed for a reason that may pass (throttling, a connection
+error, an OpenAI 5xx) get no row; they are listed in the checkpoint and
+scored again by the next run, and counted as ``retryable`` in the summary.
+
+    python bulk_score.py answers.jsonl --output scores.jsonl --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from llm_output import EVALUATION_FORMAT, parse_evaluation
+from llm_setup import (EVALUATE_ANSWER_PROMPT, EVALUATE_SKILL_ANSWER_PROMPT, llm_chain, role_evaluation_inputs,
+                       skill_evaluation_inputs)
+from rate_limit import RateLimitExceeded, is_retryable
+
+
+class LatencyHistogram:
+    """Fixed-size log-scale histogram of latencies in milliseconds."""
+
+    # Bucket i holds latencies up to 2 ** (i / 4) ms, i.e. ~19% wide buckets
+    BUCKETS_PER_DOUBLING = 4
+    BUCKETS = 4 * 20
+
+    def __init__(self):
+        self.counts = [0] * (self.BUCKETS + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float) -> None:
+        bucket = max(0, math.ceil(math.log2(max(ms, 1.0)) * self.BUCKETS_PER_DOUBLING))
+        self.counts[min(bucket, self.BUCKETS)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the ``p``-th percentile."""
+        if not self.total:
+            return 0.0
+        rank = math.ceil(self.total * p / 100)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(2 ** (bucket / self.BUCKETS_PER_DOUBLING), self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "mean": round(self.sum_ms / self.total, 1) if self.total else 0.0,
+            "p50": round(self.percentile(50), 1),
+            "p90": round(self.percentile(90), 1),
+            "p99": round(self.percentile(99), 1),
+            "max": round(self.max_ms, 1),
+        }
+
+
+class Checkpoint:
+    """Resumable progress of one scoring run, saved atomically as JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.watermark = 0  # every line below this is done
+        self.done: Set[int] = set()  # done lines at or above the watermark
+        self.retry: Set[int] = set()  # lines that failed transiently, to be scored again
+        self.output_offset = 0
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        checkpoint = cls(path)
+        if os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            checkpoint.watermark = saved["watermark"]
+            checkpoint.done = set(saved["done"])
+            checkpoint.retry = set(saved.get("retry", []))
+            checkpoint.output_offset = saved["output_offset"]
+        return checkpoint
+
+    def is_done(self, line: int) -> bool:
+        return (line < self.watermark or line in self.done) and line not in self.retry
+
+    def mark_done(self, line: int, retry: bool = False) -> None:
+        """Record ``line`` as handled by this run; ``retry`` leaves it for the next one."""
+        if retry:
+            self.retry.add(line)
+        else:
+            self.retry.discard(line)
+        if line >= self.watermark:
+            self.done.add(line)
+        while self.watermark in self.done:
+            self.done.remove(self.watermark)
+            self.watermark += 1
+
+    def save(self, output_offset: int) -> None:
+        self.output_offset = output_offset
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"watermark": self.watermark, "done": sorted(self.done), "retry": sorted(self.retry),
+                       "output_offset": output_offset}, f)
+        os.replace(tmp_path, self.path)
+
+
+def read_records(path: str) -> Iterator[Tuple[int, str]]:
+    with open(path) as f:
+        for line_no, line in enumerate(f):
+            yield line_no, line
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether scoring the line again later may succeed."""
+    return isinstance(error, (RateLimitExceeded, asyncio.TimeoutError)) or is_retryable(error)
+
+
+async def evaluate_record(record: dict) -> dict:
+    """Score one answer with the live interview's prompts and parser."""
+    answer = str(record.get("answer", "")).strip()
+    if not answer:
+        raise ValueError("No answer provided.")
+    if record.get("skills"):
+        skills = record["skills"]
+        if isinstance(skills, str):
+            skills = [s.strip() for s in skills.split(",")]
+        values = {"skills": skills, "experience": record["experience"]}
+        prompt, inputs = EVALUATE_SKILL_ANSWER_PROMPT, skill_evaluation_inputs(values, record["question"], answer)
+    else:
+        values = {"job_role": record["job_role"], "experience": record["experience"]}
+        prompt, inputs = EVALUATE_ANSWER_PROMPT, role_evaluation_inputs(values, record["question"], answer)
+    chain = llm_chain(prompt, EVALUATION_FORMAT)
+    return parse_evaluation(await chain.ainvoke(inputs))
+
+
+async def score_file(input_path: str, output_path: str, concurrency: int = 8, window: Optional[int] = None,
+                     fresh: bool = False) -> Dict[str, object]:
+    """Score every line of ``input_path`` into ``output_path``, resuming if possible."""
+    checkpoint_path = f"{output_path}.ckpt"
+    if fresh:
+        for path in (output_path, checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+    if os.path.exists(output_path) and not os.path.exists(checkpoint_path):
+        raise FileExistsError(f"{output_path} exists but has no checkpoint; pass --fresh to replace it.")
+    checkpoint = Checkpoint.load(checkpoint_path)
+    window = window or concurrency * 4
+
+    # Drop results written after the last checkpoint; those lines are redone
+    output = open(output_path, "ab")
+    output.truncate(checkpoint.output_offset)
+    output.seek(checkpoint.output_offset)
+
+    queue: "asyncio.Queue[Optional[Tuple[int, str]]]" = asyncio.Queue(maxsize=concurrency)
+    progress = asyncio.Condition()
+    histogram = LatencyHistogram()
+    stats = {"scored": 0, "failed": 0, "retryable": 0, "skipped": 0}
+
+    async def finish(line_no: int, row: Optional[dict], retry: bool = False) -> None:
+        async with progress:
+            if row is not None:
+                output.write((json.dumps(row) + "\n").encode("utf-8"))
+                output.flush()
+            checkpoint.mark_done(line_no, retry)
+            checkpoint.save(output.tell())
+            progress.notify_all()
+
+    async def produce() -> None:
+        for line_no, line in read_records(input_path):
+            if checkpoint.is_done(line_no):
+                stats["skipped"] += 1
+                continue
+            if not line.strip():
+                await finish(line_no, None)
+                continue
+            # Bound how far ahead of the slowest in-flight line we read
+            async with progress:
+                await progress.wait_for(lambda: line_no - checkpoint.watermark < window)
+            await queue.put((line_no, line))
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work() -> None:
+        while (item := await queue.get()) is not None:
+            line_no, line = item
+            start = time.perf_counter()
+            row: Dict[str, object] = {"line": line_no}
+            try:
+                record = json.loads(line)
+                row["id"] = record.get("id")
+                row.update(await evaluate_record(record))
+                stats["scored"] += 1
+            except Exception as e:
+                if is_transient(e):
+                    # No row: the next run scores this line again
+                    stats["retryable"] += 1
+                    await finish(line_no, None, retry=True)
+                    continue
+                row["error"] = str(e)
+                stats["failed"] += 1
+            latency_ms = (time.perf_counter() - start) * 1000
+            row["latency_ms"] = round(latency_ms, 1)
+            histogram.add(latency_ms)
+            await finish(line_no, row)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    finally:
+        output.close()
+    elapsed = time.perf_counter() - start
+    processed = stats["scored"] + stats["failed"]
+    return {
+        **stats,
+        "seconds": round(elapsed, 1),
+        "per_second": round(processed / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": histogram.summary(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    cli = argparse.ArgumentParser(description="Re-score interview answers from a JSONL file.")
+    cli.add_argument("input", help="JSONL file of answers to score")
+    cli.add_argument("--output", required=True, help="JSONL file to append results to")
+    cli.add_argument("--concurrency", type=int, default=8)
+    cli.add_argument("--fresh", action="store_true", help="Ignore and replace earlier progress")
+    args = cli.parse_args(argv)
+
+    summary = asyncio.run(score_file(args.input, args.output, concurrency=args.concurrency, fresh=args.fresh))
+    print(json.dumps({"output": args.output, **summary}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+One pooled HTTP transport shared by every OpenAI client.
+
+ChatOpenAI and the AsyncOpenAI client behind TTS and Whisper each built their
+own httpx client with default settings, so the three call paths kept separate
+connection pools and each paid DNS, TCP and TLS setup on its first request.
+They now share a single client with explicit pool limits and keep-alive,
+speaking HTTP/2 when the ``h2`` package is installed, while every operation
+passes its own timeout. ``warm_up`` opens connections at startup so the first
+interview after a deploy doesn't pay for the handshakes.
+"""
+
+import asyncio
+import importlib.util
+from typing import Awaitable, Callable
+
+import httpx
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def operation_timeout(seconds: float, connect_seconds: float = 5.0) -> httpx.Timeout:
+    """Timeout for one kind of call: a short connect, the rest sized to the operation."""
+    return httpx.Timeout(seconds, connect=connect_seconds)
+
+
+def create_http_client(max_connections: int = 100, max_keepalive: int = 20, keepalive_seconds: float = 60.0,
+                       http2: bool = True, connect_seconds: float = 5.0) -> httpx.AsyncClient:
+    """Async client for the OpenAI SDKs (they accept any httpx.AsyncClient).
+
+    HTTP/2 is only negotiated when asked for and ``h2`` is importable.
+    """
+    return httpx.AsyncClient(
+        http2=http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_seconds,
+        ),
+        timeout=operation_timeout(60.0, connect_seconds),
+        follow_redirects=True,
+    )
+
+
+async def warm_up(request: Callable[[], Awaitable[object]], connections: int) -> int:
+    """Run ``connections`` requests at once so the pool keeps that many connections open.
+
+    Failures are not raised: a cold pool is slower, not broken. Returns how
+    many requests succeeded.
+    """
+    if connections <= 0:
+        return 0
+    results = await asyncio.gather(*(request() for _ in range(connections)), return_exceptions=True)
+    return sum(not isinstance(result, BaseException) for result in results)
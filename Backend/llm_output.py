@@ -0,0 +1,327 @@
+"""
+Parsing of LLM completions into the fields the interview stores.
+
+The evaluation and report prompts ask for labelled sections
+("USER_FEEDBACK: ...", "ADMIN_SCORE: 7") and the question prompts for a JSON
+array; models that support structured output are asked for JSON following a
+schema instead. One engine reads all of these, and is tolerant of what GPT
+actually sends back: replies wrapped in a Markdown code fence, bold or
+lower-case labels, scores written as "7/10", and output that was cut off.
+
+- ``parse_fields`` reads labelled sections, or a JSON object (complete or
+  truncated), in a single pass over the text.
+- ``parse_questions`` reads a JSON array, a ``{"questions": [...]}`` object
+  or a numbered list.
+- ``FieldStreamParser`` releases one text field while the completion streams.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional
+
+TEXT = "text"
+SCORE = "score"
+
+EVALUATION_FIELDS = {
+    "user_feedback": TEXT,
+    "admin_score": SCORE,
+    "admin_technical_accuracy": SCORE,
+    "admin_completeness": SCORE,
+    "admin_clarity": SCORE,
+    "admin_key_strength": TEXT,
+    "admin_key_gap": TEXT,
+    "admin_feedback": TEXT,
+}
+
+REPORT_FIELDS = {
+    "user_report": TEXT,
+    "admin_report": TEXT,
+}
+
+# Model families that accept response_format={"type": "json_schema"}
+STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+
+
+def supports_structured_output(model: str) -> bool:
+    return model.startswith(STRUCTURED_OUTPUT_MODELS)
+
+
+def json_schema_format(name: str, properties: Dict[str, dict]) -> dict:
+    """OpenAI ``response_format`` requiring exactly ``properties``."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def fields_format(name: str, fields: Dict[str, str]) -> dict:
+    return json_schema_format(name, {
+        key: {"type": "integer" if kind == SCORE else "string"} for key, kind in fields.items()
+    })
+
+
+EVALUATION_FORMAT = fields_format("evaluation", EVALUATION_FIELDS)
+REPORT_FORMAT = fields_format("report", REPORT_FIELDS)
+QUESTIONS_FORMAT = json_schema_format("questions", {"questions": {"type": "array", "items": {"type": "string"}}})
+
+SCORE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:/|out of)\s*(\d+(?:\.\d+)?)|(\d+(?:\.\d+)?)", re.I)
+JSON_PAIR = re.compile(r'"(\w+)"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?)')
+JSON_TRAILING_STRING = re.compile(r'"(\w+)"\s*:\s*"((?:[^"\\]|\\.)*)\\?$')
+LIST_ITEM = re.compile(r'^\s*(?:\d+[.)]|[-*•])\s+(.+?)\s*$|^\s*"(.+)"\s*,?\s*$')
+JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def strip_code_fence(text: str) -> str:
+    """The body of a reply wrapped in a Markdown code fence (closing fence optional)."""
+    stripped = text.strip()
+    if not stripped.startswith("```"):
+        return text
+    body = stripped.split("\n", 1)[1] if "\n" in stripped else ""
+    end = body.rfind("```")
+    return body[:end] if end >= 0 else body
+
+
+def parse_score(value) -> int:
+    """Score out of 10 from 7, "7", "7/10", "**8**" or "3.5 out of 5"; 0 if there is none."""
+    if isinstance(value, bool) or value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        score = float(value)
+    else:
+        match = SCORE_PATTERN.search(str(value))
+        if match is None:
+            return 0
+        if match.group(1):
+            scale = float(match.group(2))
+            score = float(match.group(1)) * 10 / scale if scale else 0.0
+        else:
+            score = float(match.group(3))
+    return max(0, min(10, int(score + 0.5)))
+
+
+def label_pattern(fields) -> "re.Pattern":
+    """Matches a line starting a section, e.g. "ADMIN_SCORE: 7" or "**Admin score:** 7"."""
+    names = "|".join(name.replace("_", "[ _]") for name in sorted(fields, key=len, reverse=True))
+    return re.compile(rf"^[\s>*#-]*\**({names})\**\s*:\**\s*(.*)$", re.I)
+
+
+def parse_labelled_fields(text: str, fields: Dict[str, str]) -> Dict[str, str]:
+    """Text after each label up to the next one.
+
+    Line breaks inside a section are kept, as FieldStreamParser streams them.
+    """
+    pattern = label_pattern(fields)
+    sections: Dict[str, List[str]] = {}
+    current = None
+    for line in text.splitlines():
+        match = pattern.match(line)
+        if match:
+            current = match.group(1).lower().replace(" ", "_")
+            sections[current] = [match.group(2)]
+        elif current is not None:
+            sections[current].append(line)
+    return {key: "\n".join(parts).strip() for key, parts in sections.items()}
+
+
+def parse_json_fields(text: str, fields: Dict[str, str]) -> Optional[dict]:
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text)
+    except ValueError:
+        # Cut off mid-object: keep the complete pairs and whatever the last string got to
+        values = {}
+        for key, raw in JSON_PAIR.findall(text):
+            values[key.lower()] = json.loads(raw)
+        trailing = JSON_TRAILING_STRING.search(text)
+        if trailing and trailing.group(1).lower() not in values:
+            try:
+                values[trailing.group(1).lower()] = json.loads(f'"{trailing.group(2)}"')
+            except ValueError:
+                pass
+        values = {key: value for key, value in values.items() if key in fields}
+        return values or None
+    if not isinstance(value, dict):
+        return None
+    return {str(key).lower(): item for key, item in value.items()}
+
+
+def parse_fields(text: str, fields: Dict[str, str]) -> dict:
+    """Parse a completion into ``fields``; missing text is "" and missing scores 0."""
+    body = strip_code_fence(text).strip()
+    values = parse_json_fields(body, fields) if body.startswith("{") else None
+    if values is None:
+        values = parse_labelled_fields(body, fields)
+        if not values and "{" in body:
+            values = parse_json_fields(body[body.index("{"):], fields) or {}
+    parsed = {}
+    for key, kind in fields.items():
+        value = values.get(key)
+        if kind == SCORE:
+            parsed[key] = parse_score(value)
+        else:
+            parsed[key] = "" if value is None else str(value).strip()
+    return parsed
+
+
+def parse_evaluation(evaluation: str) -> dict:
+    """Parse an EVALUATE_*_PROMPT completion into user and admin feedback."""
+    return parse_fields(evaluation, EVALUATION_FIELDS)
+
+
+def parse_report(report: str) -> dict:
+    """Parse a FINAL_*_REPORT_PROMPT completion into the user and admin reports."""
+    return parse_fields(report, REPORT_FIELDS)
+
+
+def parse_questions(text: str) -> List[str]:
+    """Questions from a JSON array, a {"questions": [...]} object or a numbered list.
+
+    Raises ValueError when the reply contains none.
+    """
+    body = strip_code_fence(text)
+    for opener in ("[", "{"):
+        start = body.find(opener)
+        if start < 0:
+            continue
+        try:
+            value, _ = json.JSONDecoder().raw_decode(body[start:])
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            value = value.get("questions")
+        if isinstance(value, list):
+            questions = []
+            for item in value:
+                if isinstance(item, dict):
+                    item = item.get("question") or item.get("text") or ""
+                if str(item).strip():
+                    questions.append(str(item).strip())
+            if questions:
+                return questions
+    # A list the model numbered instead, or a JSON array that was cut off
+    questions = []
+    for line in body.splitlines():
+        match = LIST_ITEM.match(line)
+        if match:
+            questions.append((match.group(1) or match.group(2)).strip().rstrip(",").strip('"').strip())
+    questions = [question for question in questions if question]
+    if not questions:
+        raise ValueError("No questions found in the model's reply.")
+    return questions
+
+
+class FieldStreamParser:
+    """Incrementally extract one text field from a streamed completion.
+
+    feed() returns the field text that became safe to show since the last
+    call. In labelled output the field ends at the next label; text after a
+    newline is held back until it is clear the line doesn't start one. In
+    JSON output the field's string value is decoded as it arrives.
+    """
+
+    def __init__(self, field: str, fields: Dict[str, str]):
+        self.field = field
+        self.fields = fields
+        self.text = ""
+        name = field.replace("_", "[ _]")
+        self._label = re.compile(rf"^[\s>*#-]*\**{name}\**\s*:\**[ \t]*", re.I | re.M)
+        self._json_key = re.compile(rf'"{field}"\s*:\s*"', re.I)
+        # Lines that end a labelled field: any other label, or a closing code fence
+        self._ends = [key.upper() for key in fields if key != field] + ["```"]
+        self._json: Optional[bool] = None
+        self._pos: Optional[int] = None  # index of the next unsent character
+        self._leading = True
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        self.text += chunk
+        if self._done:
+            return ""
+        if self._pos is None:
+            label = self._label.search(self.text)
+            key = self._json_key.search(self.text)
+            if label is None and key is None:
+                return ""
+            self._json = key is not None and (label is None or key.start() < label.start())
+            if not self._json and label.end() == len(self.text):
+                return ""  # more "**" or spaces may follow the label
+            self._pos = key.end() if self._json else label.end()
+
+        if self._leading:
+            while self._pos < len(self.text) and self.text[self._pos].isspace():
+                self._pos += 1
+            if self._pos == len(self.text):
+                return ""
+            self._leading = False
+
+        delta = self._feed_json() if self._json else self._feed_labelled()
+        return delta.rstrip() if self._done else delta
+
+    def _feed_labelled(self) -> str:
+        limit = len(self.text)
+        newline = self.text.find("\n", self._pos)
+        while newline >= 0:
+            line = self.text[newline + 1:].lstrip().split("\n", 1)[0]
+            start = line.lstrip(">*#- \t").upper().replace(" ", "_")
+            if any(start.startswith(end) for end in self._ends):
+                limit = newline
+                self._done = True
+                break
+            if any(end.startswith(start) for end in self._ends):
+                # Could still turn into a label; wait for more tokens
+                limit = newline
+                break
+            newline = self.text.find("\n", newline + 1)
+
+        delta = self.text[self._pos:limit]
+        self._pos = limit
+        return delta
+
+    def _feed_json(self) -> str:
+        out = []
+        text, i = self.text, self._pos
+        while i < len(text):
+            char = text[i]
+            if char == '"':
+                self._done = True
+                break
+            if char != "\\":
+                out.append(char)
+                i += 1
+                continue
+            if i + 1 >= len(text):
+                break  # escape split across chunks
+            if text[i + 1] != "u":
+                out.append(JSON_ESCAPES.get(text[i + 1], text[i + 1]))
+                i += 2
+                continue
+            # \\uXXXX, or a surrogate pair \\uXXXX\\uXXXX
+            length = 12 if text[i + 2:i + 3].lower() == "d" and text[i + 3:i + 4].lower() in "89ab" else 6
+            if i + length > len(text):
+                break
+            try:
+                out.append(json.loads(f'"{text[i:i + length]}"'))
+            except ValueError:
+                pass
+            i += length
+        self._pos = i
+        return "".join(out)
+
+    def result(self) -> dict:
+        """Parse the complete completion once the stream has finished."""
+        return parse_fields(self.text, self.fields)
+
+
+class EvaluationStreamParser(FieldStreamParser):
+    """Streams the USER_FEEDBACK section of an evaluation."""
+
+    def __init__(self):
+        super().__init__("user_feedback", EVALUATION_FIELDS)
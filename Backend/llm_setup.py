@@ -0,0 +1,303 @@
+"""
+The LLM, its rate limits and usage accounting, and the interview prompts.
+
+Shared by the server and the offline tools (``question_bank.py build``,
+``bulk_score.py``), which import this module instead of main so they don't
+open the server's caches, session store and tracing just to call a prompt.
+"""
+
+import json
+import os
+from typing import Optional
+
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from dotenv import load_dotenv
+
+from http_pool import create_http_client, operation_timeout
+from llm_output import supports_structured_output
+from llm_usage import PromptUsage, TrackedRunnable, UsageRecorder
+from metrics import MetricsRegistry, UpstreamCalls
+from rate_limit import RateLimitedRunnable, RateLimiter
+
+load_dotenv()
+
+# Prometheus metrics; the server serves this registry at /metrics and adds its own metrics to it
+metrics_registry = MetricsRegistry()
+upstream_calls = UpstreamCalls(metrics_registry)
+
+# ---------------------------
+# LLM Setup (use env var OPENAI_API_KEY)
+# ---------------------------
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+if not OPENAI_API_KEY:
+    raise ValueError("OPENAI_API_KEY environment variable is required. Please set it in your .env file.")
+
+# One connection pool for the LLM, TTS and Whisper clients (HTTP/2 when h2 is installed)
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5"))
+http_client = create_http_client(
+    max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+    max_keepalive=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_seconds=float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "60")),
+    http2=os.getenv("OPENAI_HTTP2", "1") == "1",
+    connect_seconds=OPENAI_CONNECT_TIMEOUT_SECONDS,
+)
+LLM_TIMEOUT = operation_timeout(float(os.getenv("LLM_TIMEOUT_SECONDS", "60")), OPENAI_CONNECT_TIMEOUT_SECONDS)
+
+# Retries are left to rate_limits (below), which backs off for every caller at once
+LLM_MODEL = "gpt-4"
+llm = ChatOpenAI(model=LLM_MODEL, temperature=0.7, api_key=OPENAI_API_KEY,
+                 http_async_client=http_client, request_timeout=LLM_TIMEOUT, max_retries=0, stream_usage=True)
+parser = StrOutputParser()
+
+# Per-model request/token budgets shared by every call site, e.g.
+# OPENAI_RATE_LIMITS='{"gpt-4": {"requests_per_minute": 500, "tokens_per_minute": 10000}}'
+rate_limits = RateLimiter(
+    json.loads(os.getenv("OPENAI_RATE_LIMITS", "{}")),
+    max_wait_seconds=float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "30")),
+    max_retries=int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3")),
+)
+metrics_registry.callback(
+    "rate_limit_queue_depth", "Calls waiting for rate-limit admission.",
+    lambda: {(model,): limiter["queue_depth"] for model, limiter in rate_limits.stats().items()}, ("model",),
+)
+# Completion tokens budgeted per LLM call on top of the prompt
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "500"))
+
+# Ask for JSON-schema output where the model supports it ("auto"; gpt-4 doesn't).
+# The parsers in llm_output.py read either form.
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "auto")
+STRUCTURED_OUTPUT = (supports_structured_output(LLM_MODEL) if LLM_STRUCTURED_OUTPUT == "auto"
+                     else LLM_STRUCTURED_OUTPUT == "1")
+
+# Cached vs. uncached input tokens per prompt, from the responses' usage
+prompt_usage = PromptUsage()
+
+def prompt_usage_metric(field: str):
+    return lambda: {(site,): counts[field] for site, counts in prompt_usage.stats().items()}
+
+for field, documentation in (("input_tokens", "Prompt tokens sent to the LLM."),
+                             ("cached_input_tokens", "Prompt tokens served from OpenAI's prompt cache."),
+                             ("output_tokens", "Completion tokens received from the LLM.")):
+    metrics_registry.callback(f"llm_{field}_total", documentation, prompt_usage_metric(field), ("site",), "counter")
+
+def llm_chain(prompt, response_format: Optional[dict] = None):
+    """``prompt | llm | parser`` with the model call going through its rate limiter.
+
+    ``response_format`` is requested only when structured output is enabled.
+    Token usage is recorded under the prompt's name.
+    """
+    model = llm.bind(response_format=response_format) if response_format and STRUCTURED_OUTPUT else llm
+    limited = RateLimitedRunnable(rate_limits.for_model(LLM_MODEL), model, LLM_COMPLETION_TOKENS_ESTIMATE)
+    site = prompt.name or "llm"
+    return prompt | TrackedRunnable(limited, upstream_calls, site, LLM_MODEL) | UsageRecorder(prompt_usage, site) | parser
+
+# ---------------------------
+# Prompts
+# ---------------------------
+# Instructions and examples go in a static system message and the per-call
+# values in the human message after it, so every call to a prompt starts with
+# the same prefix and OpenAI can serve it from its prompt cache.
+GENERATE_QUESTIONS_PROMPT = ChatPromptTemplate([
+    ("system", """
+You are an expert technical interviewer. Based on the job role and experience level, generate exactly 5 relevant technical questions.
+
+Generate 5 questions that are:
+1. Appropriate for the experience level
+2. Technical and role-specific
+3. Progressive in difficulty
+4. Cover different aspects of the role
+
+Return ONLY a JSON array of 5 questions, no explanations:
+[
+    "Question 1",
+    "Question 2",
+    "Question 3",
+    "Question 4",
+    "Question 5"
+]
+"""),
+    ("human", """
+Job Role: {job_role}
+Experience Level: {experience} years
+"""),
+], name="generate_questions")
+
+EVALUATE_ANSWER_PROMPT = ChatPromptTemplate([
+    ("system", """
+You are an expert technical interviewer evaluating a candidate's answer. You need to provide TWO different types of feedback:
+
+1. USER_FEEDBACK: Encouraging, constructive feedback for the candidate to help them improve
+2. ADMIN_FEEDBACK: Detailed scoring and assessment for the hiring manager
+
+Please provide your evaluation in this EXACT format:
+
+USER_FEEDBACK: [Write encouraging, constructive feedback for the candidate. Focus on what they did well, areas for improvement, and specific suggestions. Be supportive and helpful, as if you're mentoring them. Keep it conversational and positive.]
+
+ADMIN_SCORE: [Overall score from 1-10]
+ADMIN_TECHNICAL_ACCURACY: [Score from 1-10]
+ADMIN_COMPLETENESS: [Score from 1-10]
+ADMIN_CLARITY: [Score from 1-10]
+ADMIN_KEY_STRENGTH: [One short phrase naming the strongest point of the answer, or "None"]
+ADMIN_KEY_GAP: [One short phrase naming the most important gap in the answer, or "None"]
+ADMIN_FEEDBACK: [Detailed assessment for hiring manager. Include technical evaluation, strengths, weaknesses, and hiring recommendation. Be objective and professional.]
+
+Example format:
+USER_FEEDBACK: Great effort on this question! I can see you're thinking about the key concepts. For React components, you might want to explore the differences between class and functional components. Class components use lifecycle methods and can manage state, while functional components are simpler and now support hooks for state management. Try practicing with both types to get comfortable with their use cases.
+
+ADMIN_SCORE: 3
+ADMIN_TECHNICAL_ACCURACY: 2
+ADMIN_COMPLETENESS: 3
+ADMIN_CLARITY: 4
+ADMIN_KEY_STRENGTH: Knows that functional components can use hooks
+ADMIN_KEY_GAP: Cannot explain lifecycle methods or when to use class components
+ADMIN_FEEDBACK: Candidate shows basic understanding but lacks depth. For 3 years experience, expected more detailed explanation of React component types. Recommend additional training in React fundamentals before proceeding.
+"""),
+    ("human", """
+Job Role: {job_role}
+Experience Level: {experience} years
+Question: {question}
+Candidate's Answer: {answer}
+"""),
+], name="evaluate_answer")
+
+FINAL_REPORT_PROMPT = ChatPromptTemplate([
+    ("system", """
+You are an expert technical interviewer creating a comprehensive interview report. You need to provide TWO different types of reports:
+
+1. USER_REPORT: Encouraging, constructive report for the candidate
+2. ADMIN_REPORT: Detailed assessment for the hiring manager
+
+Please provide your reports in this EXACT format:
+
+USER_REPORT: [Write an encouraging, constructive report for the candidate. Focus on their strengths, areas for improvement, and specific recommendations for growth. Be supportive and motivating, as if you're mentoring them. Include actionable advice and next steps for their career development.]
+
+ADMIN_REPORT: [Write a detailed professional assessment for the hiring manager. Include:
+- Overall technical competency assessment
+- Strengths and weaknesses analysis
+- Specific technical gaps identified
+- Recommendation (Pass/Fail/Consider with conditions)
+- Detailed breakdown of each question performance
+- Hiring recommendation with justification
+- Suggested next steps if considering the candidate]
+
+Example format:
+USER_REPORT: Congratulations on completing your technical interview! You showed good understanding of fundamental concepts and demonstrated problem-solving skills. Your communication was clear, and you handled the questions thoughtfully. To continue growing, I recommend focusing on [specific areas]. Keep practicing with [specific technologies/concepts] and consider working on [specific skills]. You're on the right track!
+
+ADMIN_REPORT: Candidate demonstrates basic competency in [role] fundamentals but shows gaps in [specific areas]. Technical accuracy: 6/10, Communication: 7/10, Problem-solving: 5/10. Strengths: [list]. Weaknesses: [list]. Recommendation: Consider with conditions - candidate shows potential but requires additional training in [specific areas] before being ready for [specific level] position.
+"""),
+    ("human", """
+Job Role: {job_role}
+Experience Level: {experience} years
+
+Interview Results:
+{interview_results}
+"""),
+], name="final_report")
+
+# Skill-based interview prompts
+GENERATE_SKILL_QUESTIONS_PROMPT = ChatPromptTemplate([
+    ("system", """
+You are an expert technical interviewer specializing in skill-based assessments. Based on the selected skills and experience level, generate exactly 5 relevant technical questions.
+
+Generate 5 questions that are:
+1. Focused on the selected technical skills
+2. Appropriate for the experience level
+3. Progressive in difficulty
+4. Cover practical application of the skills
+5. Include both theoretical and hands-on aspects
+
+Return ONLY a JSON array of 5 questions, no explanations:
+[
+    "Question 1",
+    "Question 2", 
+    "Question 3",
+    "Question 4",
+    "Question 5"
+]
+"""),
+    ("human", """
+Selected Skills: {skills}
+Experience Level: {experience} years
+"""),
+], name="generate_skill_questions")
+
+EVALUATE_SKILL_ANSWER_PROMPT = ChatPromptTemplate([
+    ("system", """
+You are an expert technical interviewer evaluating a candidate's answer for skill-specific questions. You need to provide TWO different types of feedback:
+
+1. USER_FEEDBACK: Encouraging, constructive feedback for the candidate to help them improve
+2. ADMIN_FEEDBACK: Detailed scoring and assessment for the hiring manager
+
+Please provide your evaluation in this EXACT format:
+
+USER_FEEDBACK: [Write encouraging, constructive feedback for the candidate. Focus on what they did well, areas for improvement, and specific suggestions. Be supportive and helpful, as if you're mentoring them. Keep it conversational and positive.]
+
+ADMIN_SCORE: [Overall score from 1-10]
+ADMIN_TECHNICAL_ACCURACY: [Score from 1-10]
+ADMIN_COMPLETENESS: [Score from 1-10]
+ADMIN_CLARITY: [Score from 1-10]
+ADMIN_KEY_STRENGTH: [One short phrase naming the strongest point of the answer, or "None"]
+ADMIN_KEY_GAP: [One short phrase naming the most important gap in the answer, or "None"]
+ADMIN_FEEDBACK: [Detailed assessment for hiring manager. Include technical evaluation, strengths, weaknesses, and hiring recommendation. Be objective and professional.]
+
+Example format:
+USER_FEEDBACK: Great effort on this React question! I can see you understand the basic concepts. For state management, you might want to explore the differences between useState and useReducer. useState is perfect for simple state, while useReducer is better for complex state logic. Try building a small project using both to get comfortable with their use cases.
+
+ADMIN_SCORE: 4
+ADMIN_TECHNICAL_ACCURACY: 3
+ADMIN_COMPLETENESS: 4
+ADMIN_CLARITY: 5
+ADMIN_KEY_STRENGTH: Understands useState for simple component state
+ADMIN_KEY_GAP: No grasp of useReducer or complex state patterns
+ADMIN_FEEDBACK: Candidate shows basic understanding of React concepts but lacks depth. For 2 years experience, expected more detailed explanation of state management patterns. Recommend additional training in React fundamentals before proceeding.
+"""),
+    ("human", """
+Selected Skills: {skills}
+Experience Level: {experience} years
+Question: {question}
+Candidate's Answer: {answer}
+"""),
+], name="evaluate_skill_answer")
+
+FINAL_SKILL_REPORT_PROMPT = ChatPromptTemplate([
+    ("system", """
+You are an expert technical interviewer creating a comprehensive skill-based interview report. You need to provide TWO different types of reports:
+
+1. USER_REPORT: Encouraging, constructive report for the candidate
+2. ADMIN_REPORT: Detailed assessment for the hiring manager
+
+Please provide your reports in this EXACT format:
+
+USER_REPORT: [Write an encouraging, constructive report for the candidate. Focus on their strengths, areas for improvement, and specific recommendations for growth. Be supportive and motivating, as if you're mentoring them. Include actionable advice and next steps for their career development.]
+
+ADMIN_REPORT: [Write a detailed professional assessment for the hiring manager. Include:
+- Overall technical competency assessment for each skill
+- Strengths and weaknesses analysis
+- Specific technical gaps identified
+- Recommendation (Pass/Fail/Consider with conditions)
+- Detailed breakdown of each question performance
+- Hiring recommendation with justification
+- Suggested next steps if considering the candidate]
+
+Example format:
+USER_REPORT: Congratulations on completing your skill-based interview! You showed good understanding of fundamental concepts and demonstrated problem-solving skills. Your communication was clear, and you handled the questions thoughtfully. To continue growing, I recommend focusing on [specific areas]. Keep practicing with [specific technologies/concepts] and consider working on [specific skills]. You're on the right track!
+
+ADMIN_REPORT: Candidate demonstrates basic competency in [skills] fundamentals but shows gaps in [specific areas]. Technical accuracy: 6/10, Communication: 7/10, Problem-solving: 5/10. Strengths: [list]. Weaknesses: [list]. Recommendation: Consider with conditions - candidate shows potential but requires additional training in [specific areas] before being ready for [specific level] position.
+"""),
+    ("human", """
+Selected Skills: {skills}
+Experience Level: {experience} years
+
+Interview Results:
+{interview_results}
+"""),
+], name="final_skill_report")
+
+def role_evaluation_inputs(values: dict, question: str, answer: str) -> dict:
+    return {"job_role": values["job_role"], "experience": values["experience"], "question": question, "answer": answer}
+
+def skill_evaluation_inputs(values: dict, question: str, answer: str) -> dict:
+    return {"skills": ", ".join(values["skills"]), "experience": values["experience"], "question": question, "answer": answer}
@@ -0,0 +1,125 @@
+"""
+Input-token accounting per LLM call site, split into cached and uncached.
+
+OpenAI reuses the prefill of a prompt prefix it has seen recently (from 1024
+tokens, in 128-token steps), which lowers time to first token and bills the
+cached tokens at a discount. The prompts in llm_setup.py keep their instructions
+in a static system message and the per-call payload last, so that prefix is
+byte-identical across calls; these counters show how much of it actually
+hits the cache, as reported in each response's usage. ``TrackedRunnable``
+adds the call's latency to the upstream-call metrics under the same name,
+and traces it.
+"""
+
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from langchain_core.messages.ai import UsageMetadata, add_usage
+from langchain_core.runnables import Runnable
+
+from metrics import UpstreamCalls
+from tracing import set_usage, span
+
+
+class PromptUsage:
+    """Token counts by call site (prompt name)."""
+
+    def __init__(self):
+        self._sites: Dict[str, Dict[str, int]] = {}
+
+    def record(self, site: str, usage: UsageMetadata) -> None:
+        counts = self._sites.setdefault(site, {"calls": 0, "input_tokens": 0, "cached_input_tokens": 0,
+                                               "output_tokens": 0})
+        counts["calls"] += 1
+        counts["input_tokens"] += usage.get("input_tokens", 0)
+        counts["cached_input_tokens"] += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+        counts["output_tokens"] += usage.get("output_tokens", 0)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for site, counts in self._sites.items():
+            input_tokens, cached = counts["input_tokens"], counts["cached_input_tokens"]
+            report[site] = {
+                **counts,
+                "uncached_input_tokens": input_tokens - cached,
+                "cached_ratio": round(cached / input_tokens, 3) if input_tokens else 0.0,
+            }
+        return report
+
+
+class UsageRecorder(Runnable):
+    """Passes model output through unchanged, recording its usage under ``site``.
+
+    Streams are passed chunk by chunk; their usage (sent with the last chunk
+    when the model has ``stream_usage`` on) is recorded once they end. Output
+    without usage metadata, e.g. from a fake model, is not counted.
+    """
+
+    def __init__(self, usage: PromptUsage, site: str):
+        self.usage = usage
+        self.site = site
+
+    def _record(self, usage: Optional[UsageMetadata]) -> None:
+        if usage:
+            self.usage.record(self.site, usage)
+
+    def invoke(self, input, config=None, **kwargs):
+        self._record(getattr(input, "usage_metadata", None))
+        return input
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return self.invoke(input, config)
+
+    def transform(self, input: Iterator, config=None, **kwargs) -> Iterator:
+        total = None
+        for chunk in input:
+            usage = getattr(chunk, "usage_metadata", None)
+            if usage:
+                total = add_usage(total, usage)
+            yield chunk
+        self._record(total)
+
+    async def atransform(self, input: AsyncIterator, config=None, **kwargs) -> AsyncIterator:
+        total = None
+        async for chunk in input:
+            usage = getattr(chunk, "usage_metadata", None)
+            if usage:
+                total = add_usage(total, usage)
+            yield chunk
+        self._record(total)
+
+
+class TrackedRunnable(Runnable):
+    """Times a model call (or stream, with its first chunk) as upstream call ``site``,
+    in a span recording the model and token counts."""
+
+    def __init__(self, runnable: Runnable, upstream: UpstreamCalls, site: str, model: Optional[str] = None):
+        self.runnable = runnable
+        self.upstream = upstream
+        self.site = site
+        self.attributes = {"gen_ai.system": "openai", "gen_ai.request.model": model, "call_site": site}
+
+    def invoke(self, input, config=None, **kwargs):
+        # The server only makes async calls
+        return self.runnable.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        async with self.upstream.track(self.site):
+            with span(f"openai.{self.site}", self.attributes) as current:
+                output = await self.runnable.ainvoke(input, config, **kwargs)
+                set_usage(current, getattr(output, "usage_metadata", None))
+                return output
+
+    async def astream(self, input, config=None, **kwargs):
+        async with self.upstream.track(self.site) as start:
+            with span(f"openai.{self.site}", self.attributes) as current:
+                first = True
+                total = None
+                async for chunk in self.runnable.astream(input, config, **kwargs):
+                    if first:
+                        self.upstream.first_chunk_after(start, self.site)
+                        first = False
+                    usage = getattr(chunk, "usage_metadata", None)
+                    if usage:
+                        total = add_usage(total, usage)
+                    yield chunk
+                set_usage(current, total)
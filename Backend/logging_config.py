@@ -0,0 +1,47 @@
+"""
+Structured, level-gated logging for the server.
+
+Records go to stderr as one JSON object per line (``LOG_FORMAT=text`` for
+plain lines when developing), at ``LOG_LEVEL`` and above. Fields passed with
+``extra={...}`` become keys of the object, so log a session id or a size
+rather than formatting values into the message. Candidate answers,
+generated questions and reports are never logged.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+
+LOGGER_NAME = "intervue"
+
+# Attributes every LogRecord has; anything else on a record came from ``extra``
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = "INFO", log_format: str = "json") -> logging.Logger:
+    """Set up and return the server's logger; calling it again replaces the handler."""
+    handler = logging.StreamHandler()
+    if log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers[:] = [handler]
+    logger.setLevel(level.upper())
+    # uvicorn configures its own loggers; don't duplicate ours through the root
+    logger.propagate = False
+    return logger
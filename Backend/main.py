@@ -1,26 +1,79 @@
 import os
 import json
 import uuid
-import io
+import asyncio
+import re
+import math
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import List, Dict, Optional, Literal, TypedDict
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from dotenv import load_dotenv
 import openai
 
+from audio_cache import AudioCache, AudioCacheWriter, audio_media_type, negotiate_audio_format, tts_cache_key
+from audio_upload import AudioUpload, receive_audio_upload
+from http_pool import operation_timeout, warm_up
+from llm_output import (EVALUATION_FORMAT, QUESTIONS_FORMAT, REPORT_FORMAT, EvaluationStreamParser, parse_evaluation,
+                        parse_questions, parse_report)
+from llm_setup import (EVALUATE_ANSWER_PROMPT, EVALUATE_SKILL_ANSWER_PROMPT, FINAL_REPORT_PROMPT,
+                       FINAL_SKILL_REPORT_PROMPT, GENERATE_QUESTIONS_PROMPT, GENERATE_SKILL_QUESTIONS_PROMPT,
+                       LLM_MODEL, OPENAI_API_KEY, OPENAI_CONNECT_TIMEOUT_SECONDS, http_client, llm_chain,
+                       metrics_registry, prompt_usage, rate_limits, role_evaluation_inputs, skill_evaluation_inputs,
+                       upstream_calls)
+from logging_config import configure_logging
+from metrics import CONTENT_TYPE, LOOP_LAG_BUCKETS, MetricsMiddleware, monitor_event_loop
+from question_bank import QuestionBank
+from question_cache import QuestionSetCache, check_question_set, role_key, skills_key
+from rate_limit import RateLimitExceeded
+from session_store import create_checkpointer
+from single_flight import SharedStream, SingleFlight
+from tracing import TracingMiddleware, configure_tracing, instrument_checkpointer, set_session, span, traced
+from transcript_cache import TranscriptCache
+
 load_dotenv()
 
+logger = configure_logging(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_FORMAT", "json"))
+
+# Prometheus metrics served at /metrics (the registry lives in llm_setup with the LLM's
+# metrics); further metrics are registered next to what they measure
+event_loop_lag = metrics_registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a periodic timer.", buckets=LOOP_LAG_BUCKETS,
+)
+EVENT_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+
+# OpenTelemetry spans per request, graph node, OpenAI call and session-store access
+# (TRACING_EXPORTER=console|file|otlp|module:factory; needs opentelemetry-sdk)
+tracer_provider = configure_tracing(os.getenv("TRACING_EXPORTER", "none"), os.getenv("TRACING_FILE", "traces.jsonl"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up OpenAI connections, then run periodic maintenance and the event-loop
+    lag monitor for the lifetime of the server."""
+    if OPENAI_WARMUP_CONNECTIONS:
+        warmed = await warm_up(
+            lambda: openai_client.models.list(timeout=OPENAI_WARMUP_TIMEOUT), OPENAI_WARMUP_CONNECTIONS
+        )
+        logger.info("Warmed up OpenAI connections", extra={"warmed": warmed, "requested": OPENAI_WARMUP_CONNECTIONS})
+    maintenance = asyncio.create_task(session_maintenance())
+    loop_monitor = asyncio.create_task(monitor_event_loop(event_loop_lag, EVENT_LOOP_LAG_INTERVAL_SECONDS))
+    try:
+        yield
+    finally:
+        maintenance.cancel()
+        loop_monitor.cancel()
+        if tracer_provider is not None:
+            tracer_provider.force_flush()
+
 
-app = FastAPI(title="AI Interviewer Backend", version="0.1.0")
+app = FastAPI(title="AI Interviewer Backend", version="0.1.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -30,197 +83,109 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    MetricsMiddleware,
+    duration=metrics_registry.histogram(
+        "http_request_duration_seconds", "HTTP request latency, to the end of the response body.",
+        ("method", "route", "status"),
+    ),
+    in_progress=metrics_registry.gauge("http_requests_in_progress", "HTTP requests being served.", ("method",)),
+)
+app.add_middleware(TracingMiddleware)
 
 @app.get("/")
 async def root():
     return {"message": "Hello from AI Interviewer Backend!"}
 
-# ---------------------------
-# LLM Setup (use env var OPENAI_API_KEY)
-# ---------------------------
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable is required. Please set it in your .env file.")
-
-llm = ChatOpenAI(model="gpt-4", temperature=0.7, api_key=OPENAI_API_KEY)
-parser = StrOutputParser()
+@app.get("/stats")
+async def stats():
+    """Cache counters for capacity planning."""
+    return {
+        "question_cache": question_cache.stats(),
+        "question_bank": question_bank.stats() if question_bank is not None else None,
+        "session_store": checkpointer.stats() if hasattr(checkpointer, "stats") else None,
+        "tts_cache": tts_cache.stats(),
+        "transcript_cache": transcript_cache.stats(),
+        "rate_limits": rate_limits.stats(),
+        "prompt_usage": prompt_usage.stats(),
+        "single_flight": {"llm": llm_flights.stats(), "tts": speech_flight_stats},
+    }
 
-# Initialize OpenAI client for TTS
-openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: request and upstream latency, tokens, event-loop lag, sessions."""
+    return Response(metrics_registry.render(), media_type=CONTENT_TYPE)
 
 # ---------------------------
-# Prompts
+# OpenAI clients (the LLM, its rate limits and the prompts are in llm_setup.py)
 # ---------------------------
-GENERATE_QUESTIONS_PROMPT = ChatPromptTemplate.from_template("""
-You are an expert technical interviewer. Based on the job role and experience level, generate exactly 5 relevant technical questions.
-
-Job Role: {job_role}
-Experience Level: {experience} years
-
-Generate 5 questions that are:
-1. Appropriate for the experience level
-2. Technical and role-specific
-3. Progressive in difficulty
-4. Cover different aspects of the role
-
-Return ONLY a JSON array of 5 questions, no explanations:
-[
-    "Question 1",
-    "Question 2",
-    "Question 3",
-    "Question 4",
-    "Question 5"
-]
-""")
-
-EVALUATE_ANSWER_PROMPT = ChatPromptTemplate.from_template("""
-You are an expert technical interviewer evaluating a candidate's answer. You need to provide TWO different types of feedback:
-
-1. USER_FEEDBACK: Encouraging, constructive feedback for the candidate to help them improve
-2. ADMIN_FEEDBACK: Detailed scoring and assessment for the hiring manager
-
-Job Role: {job_role}
-Experience Level: {experience} years
-Question: {question}
-Candidate's Answer: {answer}
-
-Please provide your evaluation in this EXACT format:
-
-USER_FEEDBACK: [Write encouraging, constructive feedback for the candidate. Focus on what they did well, areas for improvement, and specific suggestions. Be supportive and helpful, as if you're mentoring them. Keep it conversational and positive.]
-
-ADMIN_SCORE: [Overall score from 1-10]
-ADMIN_TECHNICAL_ACCURACY: [Score from 1-10]
-ADMIN_COMPLETENESS: [Score from 1-10]
-ADMIN_CLARITY: [Score from 1-10]
-ADMIN_FEEDBACK: [Detailed assessment for hiring manager. Include technical evaluation, strengths, weaknesses, and hiring recommendation. Be objective and professional.]
-
-Example format:
-USER_FEEDBACK: Great effort on this question! I can see you're thinking about the key concepts. For React components, you might want to explore the differences between class and functional components. Class components use lifecycle methods and can manage state, while functional components are simpler and now support hooks for state management. Try practicing with both types to get comfortable with their use cases.
-
-ADMIN_SCORE: 3
-ADMIN_TECHNICAL_ACCURACY: 2
-ADMIN_COMPLETENESS: 3
-ADMIN_CLARITY: 4
-ADMIN_FEEDBACK: Candidate shows basic understanding but lacks depth. For 3 years experience, expected more detailed explanation of React component types. Recommend additional training in React fundamentals before proceeding.
-""")
-
-FINAL_REPORT_PROMPT = ChatPromptTemplate.from_template("""
-You are an expert technical interviewer creating a comprehensive interview report. You need to provide TWO different types of reports:
-
-1. USER_REPORT: Encouraging, constructive report for the candidate
-2. ADMIN_REPORT: Detailed assessment for the hiring manager
-
-Job Role: {job_role}
-Experience Level: {experience} years
-
-Interview Results:
-{interview_results}
-
-Please provide your reports in this EXACT format:
-
-USER_REPORT: [Write an encouraging, constructive report for the candidate. Focus on their strengths, areas for improvement, and specific recommendations for growth. Be supportive and motivating, as if you're mentoring them. Include actionable advice and next steps for their career development.]
-
-ADMIN_REPORT: [Write a detailed professional assessment for the hiring manager. Include:
-- Overall technical competency assessment
-- Strengths and weaknesses analysis
-- Specific technical gaps identified
-- Recommendation (Pass/Fail/Consider with conditions)
-- Detailed breakdown of each question performance
-- Hiring recommendation with justification
-- Suggested next steps if considering the candidate]
-
-Example format:
-USER_REPORT: Congratulations on completing your technical interview! You showed good understanding of fundamental concepts and demonstrated problem-solving skills. Your communication was clear, and you handled the questions thoughtfully. To continue growing, I recommend focusing on [specific areas]. Keep practicing with [specific technologies/concepts] and consider working on [specific skills]. You're on the right track!
-
-ADMIN_REPORT: Candidate demonstrates basic competency in [role] fundamentals but shows gaps in [specific areas]. Technical accuracy: 6/10, Communication: 7/10, Problem-solving: 5/10. Strengths: [list]. Weaknesses: [list]. Recommendation: Consider with conditions - candidate shows potential but requires additional training in [specific areas] before being ready for [specific level] position.
-""")
-
-# Skill-based interview prompts
-GENERATE_SKILL_QUESTIONS_PROMPT = ChatPromptTemplate.from_template("""
-You are an expert technical interviewer specializing in skill-based assessments. Based on the selected skills and experience level, generate exactly 5 relevant technical questions.
-
-Selected Skills: {skills}
-Experience Level: {experience} years
-
-Generate 5 questions that are:
-1. Focused on the selected technical skills
-2. Appropriate for the experience level
-3. Progressive in difficulty
-4. Cover practical application of the skills
-5. Include both theoretical and hands-on aspects
-
-Return ONLY a JSON array of 5 questions, no explanations:
-[
-    "Question 1",
-    "Question 2", 
-    "Question 3",
-    "Question 4",
-    "Question 5"
-]
-""")
-
-EVALUATE_SKILL_ANSWER_PROMPT = ChatPromptTemplate.from_template("""
-You are an expert technical interviewer evaluating a candidate's answer for skill-specific questions. You need to provide TWO different types of feedback:
-
-1. USER_FEEDBACK: Encouraging, constructive feedback for the candidate to help them improve
-2. ADMIN_FEEDBACK: Detailed scoring and assessment for the hiring manager
-
-Selected Skills: {skills}
-Experience Level: {experience} years
-Question: {question}
-Candidate's Answer: {answer}
-
-Please provide your evaluation in this EXACT format:
-
-USER_FEEDBACK: [Write encouraging, constructive feedback for the candidate. Focus on what they did well, areas for improvement, and specific suggestions. Be supportive and helpful, as if you're mentoring them. Keep it conversational and positive.]
-
-ADMIN_SCORE: [Overall score from 1-10]
-ADMIN_TECHNICAL_ACCURACY: [Score from 1-10]
-ADMIN_COMPLETENESS: [Score from 1-10]
-ADMIN_CLARITY: [Score from 1-10]
-ADMIN_FEEDBACK: [Detailed assessment for hiring manager. Include technical evaluation, strengths, weaknesses, and hiring recommendation. Be objective and professional.]
-
-Example format:
-USER_FEEDBACK: Great effort on this React question! I can see you understand the basic concepts. For state management, you might want to explore the differences between useState and useReducer. useState is perfect for simple state, while useReducer is better for complex state logic. Try building a small project using both to get comfortable with their use cases.
-
-ADMIN_SCORE: 4
-ADMIN_TECHNICAL_ACCURACY: 3
-ADMIN_COMPLETENESS: 4
-ADMIN_CLARITY: 5
-ADMIN_FEEDBACK: Candidate shows basic understanding of React concepts but lacks depth. For 2 years experience, expected more detailed explanation of state management patterns. Recommend additional training in React fundamentals before proceeding.
-""")
-
-FINAL_SKILL_REPORT_PROMPT = ChatPromptTemplate.from_template("""
-You are an expert technical interviewer creating a comprehensive skill-based interview report. You need to provide TWO different types of reports:
-
-1. USER_REPORT: Encouraging, constructive report for the candidate
-2. ADMIN_REPORT: Detailed assessment for the hiring manager
-
-Selected Skills: {skills}
-Experience Level: {experience} years
-
-Interview Results:
-{interview_results}
-
-Please provide your reports in this EXACT format:
+# Per-operation timeouts: a spoken question is quick, a long recording is not
+TTS_TIMEOUT = operation_timeout(float(os.getenv("TTS_TIMEOUT_SECONDS", "30")), OPENAI_CONNECT_TIMEOUT_SECONDS)
+WHISPER_TIMEOUT = operation_timeout(float(os.getenv("WHISPER_TIMEOUT_SECONDS", "120")), OPENAI_CONNECT_TIMEOUT_SECONDS)
+# Connections to open at startup, before the worker reports ready (0 disables warmup)
+OPENAI_WARMUP_CONNECTIONS = int(os.getenv("OPENAI_WARMUP_CONNECTIONS", "0"))
+OPENAI_WARMUP_TIMEOUT = operation_timeout(float(os.getenv("OPENAI_WARMUP_TIMEOUT_SECONDS", "10")),
+                                          OPENAI_CONNECT_TIMEOUT_SECONDS)
+
+# Initialize async OpenAI client for TTS and Whisper so audio calls don't block the event loop
+openai_client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client, max_retries=0)
+
+# Identical prompts in flight at the same time share one completion. Question
+# generation always coalesces; evaluations of identical answers only if enabled.
+llm_flights = SingleFlight()
+COALESCE_EVALUATIONS = os.getenv("COALESCE_EVALUATIONS", "0") == "1"
+
+async def invoke_llm(prompt, inputs: dict, coalesce: bool = True, response_format: Optional[dict] = None) -> str:
+    """Run ``llm_chain(prompt)`` on ``inputs``, sharing the call with identical ones in flight."""
+    chain = llm_chain(prompt, response_format)
+    if not coalesce:
+        return await chain.ainvoke(inputs)
+    return await llm_flights.do((LLM_MODEL, prompt.format(**inputs)), lambda: chain.ainvoke(inputs))
+
+def too_many_requests(e: RateLimitExceeded) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+# Pool of generated question sets per normalized role/skills + experience bucket
+question_cache = QuestionSetCache(
+    pool_size=int(os.getenv("QUESTION_CACHE_POOL_SIZE", "3")),
+    max_keys=int(os.getenv("QUESTION_CACHE_MAX_KEYS", "1000")),
+    ttl_seconds=float(os.getenv("QUESTION_CACHE_TTL_SECONDS", "86400")),
+)
 
-USER_REPORT: [Write an encouraging, constructive report for the candidate. Focus on their strengths, areas for improvement, and specific recommendations for growth. Be supportive and motivating, as if you're mentoring them. Include actionable advice and next steps for their career development.]
+# Synthesized speech stored on disk by content hash (TTS_CACHE_MAX_BYTES=0 disables it)
+TTS_MODEL = "tts-1"
+TTS_STREAM_CHUNK_SIZE = 16 * 1024
+TTS_VOICE = "alloy"  # Voice the interview pages speak with
+# Synthesize question and feedback audio in the background before it is requested
+TTS_PREFETCH = os.getenv("TTS_PREFETCH", "1") == "1"
+tts_cache = AudioCache(
+    os.getenv("TTS_CACHE_DIR", "tts_cache"),
+    max_bytes=int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+)
 
-ADMIN_REPORT: [Write a detailed professional assessment for the hiring manager. Include:
-- Overall technical competency assessment for each skill
-- Strengths and weaknesses analysis
-- Specific technical gaps identified
-- Recommendation (Pass/Fail/Consider with conditions)
-- Detailed breakdown of each question performance
-- Hiring recommendation with justification
-- Suggested next steps if considering the candidate]
+# Recorded answers are spooled to disk above WHISPER_SPOOL_BYTES and capped in size
+# (OpenAI rejects files over 25 MB) and in client-declared duration
+WHISPER_MAX_UPLOAD_BYTES = int(os.getenv("WHISPER_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+WHISPER_SPOOL_BYTES = int(os.getenv("WHISPER_SPOOL_BYTES", str(1024 * 1024)))
+WHISPER_MAX_DURATION_SECONDS = float(os.getenv("WHISPER_MAX_DURATION_SECONDS", "600"))
+WHISPER_MODEL = "whisper-1"
+
+# Transcripts of previously seen recordings, keyed by audio hash (0 entries disables it)
+transcript_cache = TranscriptCache(
+    os.getenv("TRANSCRIPT_CACHE_PATH", "transcripts.db"),
+    max_entries=int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "10000")),
+)
 
-Example format:
-USER_REPORT: Congratulations on completing your skill-based interview! You showed good understanding of fundamental concepts and demonstrated problem-solving skills. Your communication was clear, and you handled the questions thoughtfully. To continue growing, I recommend focusing on [specific areas]. Keep practicing with [specific technologies/concepts] and consider working on [specific skills]. You're on the right track!
+# Prebuilt question bank (see question_bank.py), memory-mapped and shared by all workers
+question_bank = QuestionBank.open_optional(os.getenv("QUESTION_BANK_PATH", "question_bank.qbk"))
 
-ADMIN_REPORT: Candidate demonstrates basic competency in [skills] fundamentals but shows gaps in [specific areas]. Technical accuracy: 6/10, Communication: 7/10, Problem-solving: 5/10. Strengths: [list]. Weaknesses: [list]. Recommendation: Consider with conditions - candidate shows potential but requires additional training in [specific areas] before being ready for [specific level] position.
-""")
+async def get_question_set(key: str, generate) -> List[str]:
+    """Serve questions from the prebuilt bank, then the cache, then the LLM."""
+    if question_bank is not None:
+        questions = question_bank.sample(key)
+        if questions is not None:
+            return questions
+    return await question_cache.get_or_generate(key, generate)
 
 # ---------------------------
 # LangGraph State Definition
@@ -230,13 +195,27 @@ class InterviewQA(TypedDict):
     answer: str
     feedback: str
 
+class QuestionSummary(TypedDict):
+    question: str
+    score: int
+    technical_accuracy: int
+    completeness: int
+    clarity: int
+    strength: str
+    gap: str
+    note: str
+
 class InterviewState(TypedDict):
     job_role: str
     experience: int
     data: List[InterviewQA]
+    summary: List[QuestionSummary]  # Compact running summary used by the final report
     current_question_idx: int
     interview_complete: bool
     final_report: str
+    report_status: str  # pending / running / ready / failed
+    report_started_at: float  # When the worker in report_owner claimed the running report
+    report_owner: str
     last_question: str
     last_answer: Optional[str]  # For API input
 
@@ -244,29 +223,116 @@ class SkillInterviewState(TypedDict):
     skills: List[str]
     experience: int
     data: List[InterviewQA]
+    summary: List[QuestionSummary]  # Compact running summary used by the final report
     current_question_idx: int
     interview_complete: bool
     final_report: str
+    report_status: str  # pending / running / ready / failed
+    report_started_at: float  # When the worker in report_owner claimed the running report
+    report_owner: str
     last_question: str
     last_answer: Optional[str]  # For API input
 
+# ---------------------------
+# Evaluation Results
+# ---------------------------
+def question_summary(question: str, feedback_data: dict) -> QuestionSummary:
+    """Condense one evaluated answer into scores plus its key strength and gap."""
+    def phrase(key: str) -> str:
+        value = (feedback_data.get(key) or "").strip()
+        return "" if value.lower() in ("none", "n/a") else value[:200]
+
+    strength = phrase("admin_key_strength")
+    gap = phrase("admin_key_gap")
+    note = ""
+    if not strength and not gap:
+        # Evaluations without key strength/gap keep the first sentence of the admin assessment
+        note = (feedback_data.get("admin_feedback") or "").strip().split(". ")[0][:200]
+    return {
+        "question": question,
+        "score": feedback_data.get("admin_score", 0),
+        "technical_accuracy": feedback_data.get("admin_technical_accuracy", 0),
+        "completeness": feedback_data.get("admin_completeness", 0),
+        "clarity": feedback_data.get("admin_clarity", 0),
+        "strength": strength,
+        "gap": gap,
+        "note": note,
+    }
+
+def interview_summary(state: dict) -> List[QuestionSummary]:
+    """Return the running summary, rebuilding it for sessions that predate it."""
+    if state.get("summary"):
+        return state["summary"]
+    return [
+        question_summary(qd["question"], qd["feedback"])
+        for qd in state.get("data", [])[:5]
+        if isinstance(qd.get("feedback"), dict)
+    ]
+
+def render_interview_summary(summary: List[QuestionSummary]) -> tuple[str, float]:
+    """Render the running summary as report prompt input and compute the average score."""
+    lines = []
+    for i, item in enumerate(summary):
+        lines.append(f"Question {i+1}: {item['question']}")
+        lines.append(
+            f"Scores: overall {item['score']}/10, technical accuracy {item['technical_accuracy']}/10, "
+            f"completeness {item['completeness']}/10, clarity {item['clarity']}/10"
+        )
+        if item["strength"]:
+            lines.append(f"Key strength: {item['strength']}")
+        if item["gap"]:
+            lines.append(f"Key gap: {item['gap']}")
+        if item.get("note"):
+            lines.append(f"Assessment: {item['note']}")
+        lines.append("")
+    scores = [item["score"] for item in summary]
+    avg_score = sum(scores) / len(scores) if scores else 0
+    return "\n".join(lines), avg_score
+
+def record_evaluation(state: dict, idx: int, answer_text: str, feedback_data: dict) -> dict:
+    """Store an evaluated answer and advance the state to the next question."""
+    data_copy = state["data"].copy()
+    data_copy[idx]["answer"] = answer_text
+    data_copy[idx]["feedback"] = feedback_data
+
+    summary = list(state.get("summary") or [])
+    summary.append(question_summary(data_copy[idx]["question"], feedback_data))
+
+    new_idx = idx + 1
+    next_question = data_copy[new_idx]["question"] if new_idx < 5 else ""
+    
+    return {
+        **state,
+        "data": data_copy,
+        "summary": summary,
+        "current_question_idx": new_idx,
+        "last_question": next_question,
+        "last_answer": None  # Clear the answer after processing
+    }
+
 # ---------------------------
 # LangGraph Nodes
 # ---------------------------
+@traced("graph.get_job_role_and_experience")
 def get_job_role_and_experience(state: InterviewState) -> InterviewState:
     """Validate job role and experience are provided."""
     if not state.get("job_role") or state.get("experience") is None:
         raise ValueError("job_role and experience must be provided.")
     return state
 
-def generate_questions(state: InterviewState) -> InterviewState:
+@traced("graph.generate_questions")
+async def generate_questions(state: InterviewState) -> InterviewState:
     """Generate interview questions based on job role and experience."""
-    chain = GENERATE_QUESTIONS_PROMPT | llm | parser
-    questions_json = chain.invoke({
-        "job_role": state["job_role"],
-        "experience": state["experience"]
-    })
-    questions = json.loads(questions_json)
+    async def generate() -> List[str]:
+        questions_json = await invoke_llm(GENERATE_QUESTIONS_PROMPT, {
+            "job_role": state["job_role"],
+            "experience": state["experience"]
+        }, response_format=QUESTIONS_FORMAT)
+        return check_question_set(parse_questions(questions_json))
+
+    questions = await get_question_set(
+        role_key(state["job_role"], state["experience"]), generate
+    )
     question_list: List[InterviewQA] = [{"question": q, "answer": "", "feedback": ""} for q in questions]
     
     return {
@@ -278,6 +344,7 @@ def generate_questions(state: InterviewState) -> InterviewState:
         "last_question": question_list[0]["question"] if question_list else ""
     }
 
+@traced("graph.ask_question")
 def ask_question(state: InterviewState) -> InterviewState:
     """Get the current question."""
     idx = state.get("current_question_idx", 0)
@@ -286,7 +353,8 @@ def ask_question(state: InterviewState) -> InterviewState:
     q_text = state["data"][idx]["question"]
     return {**state, "last_question": q_text}
 
-def evaluate_answer(state: InterviewState) -> InterviewState:
+@traced("graph.evaluate_answer")
+async def evaluate_answer(state: InterviewState) -> InterviewState:
     """Evaluate the candidate's answer and generate feedback."""
     idx = state.get("current_question_idx", 0)
     if idx >= 5:
@@ -304,171 +372,50 @@ def evaluate_answer(state: InterviewState) -> InterviewState:
     if not answer_text:
         raise ValueError("No answer provided for current question.")
 
-    chain = EVALUATE_ANSWER_PROMPT | llm | parser
-    evaluation = chain.invoke({
+    evaluation = await invoke_llm(EVALUATE_ANSWER_PROMPT, {
         "job_role": state["job_role"],
         "experience": state["experience"],
         "question": question_text,
         "answer": answer_text
-    })
+    }, coalesce=COALESCE_EVALUATIONS, response_format=EVALUATION_FORMAT)
     
-    # Parse the evaluation to extract user and admin feedback
-    lines = evaluation.strip().split('\n')
-    user_feedback = ""
-    admin_feedback = ""
-    admin_score = 0
-    admin_technical_accuracy = 0
-    admin_completeness = 0
-    admin_clarity = 0
-    
-    current_section = None
-    for line in lines:
-        line = line.strip()
-        if line.startswith("USER_FEEDBACK:"):
-            current_section = "user"
-            user_feedback = line.replace("USER_FEEDBACK:", "").strip()
-        elif line.startswith("ADMIN_FEEDBACK:"):
-            current_section = "admin"
-            admin_feedback = line.replace("ADMIN_FEEDBACK:", "").strip()
-        elif line.startswith("ADMIN_SCORE:"):
-            try:
-                admin_score = int(line.replace("ADMIN_SCORE:", "").strip())
-            except:
-                admin_score = 0
-        elif line.startswith("ADMIN_TECHNICAL_ACCURACY:"):
-            try:
-                admin_technical_accuracy = int(line.replace("ADMIN_TECHNICAL_ACCURACY:", "").strip())
-            except:
-                admin_technical_accuracy = 0
-        elif line.startswith("ADMIN_COMPLETENESS:"):
-            try:
-                admin_completeness = int(line.replace("ADMIN_COMPLETENESS:", "").strip())
-            except:
-                admin_completeness = 0
-        elif line.startswith("ADMIN_CLARITY:"):
-            try:
-                admin_clarity = int(line.replace("ADMIN_CLARITY:", "").strip())
-            except:
-                admin_clarity = 0
-        elif current_section == "user" and line:
-            user_feedback += " " + line
-        elif current_section == "admin" and line:
-            admin_feedback += " " + line
-    
-    # Store both user and admin feedback
-    feedback_data = {
-        "user_feedback": user_feedback.strip(),
-        "admin_feedback": admin_feedback.strip(),
-        "admin_score": admin_score,
-        "admin_technical_accuracy": admin_technical_accuracy,
-        "admin_completeness": admin_completeness,
-        "admin_clarity": admin_clarity
-    }
-    
-    data_copy = state["data"].copy()
-    data_copy[idx]["answer"] = answer_text
-    data_copy[idx]["feedback"] = feedback_data
+    return record_evaluation(state, idx, answer_text, parse_evaluation(evaluation))
 
-    new_idx = idx + 1
-    next_question = data_copy[new_idx]["question"] if new_idx < 5 else ""
-    
-    return {
-        **state,
-        "data": data_copy,
-        "current_question_idx": new_idx,
-        "last_question": next_question,
-        "last_answer": None  # Clear the answer after processing
-    }
-
-def generate_final_report(state: InterviewState) -> InterviewState:
+@traced("graph.generate_final_report")
+async def generate_final_report(state: InterviewState) -> InterviewState:
     """Generate the final interview report."""
-    print("Starting final report generation...")
-    print(f"State data length: {len(state.get('data', []))}")
-    
-    interview_results = ""
-    total_scores = []
+    logger.debug("Generating final report", extra={"answers": len(state.get("data", []))})
     
     # Check if we have data
     if not state.get("data"):
-        print("No data found in state!")
+        logger.warning("No answers to report on")
         return state
-    
-    for i in range(min(5, len(state["data"]))):
-        qd = state["data"][i]
-        print(f"Processing question {i+1}: {qd.get('question', 'No question')}")
-        print(f"Answer: {qd.get('answer', 'No answer')}")
-        print(f"Feedback type: {type(qd.get('feedback', 'No feedback'))}")
-        
-        interview_results += f"\nQuestion {i+1}: {qd['question']}\n"
-        interview_results += f"Answer: {qd['answer']}\n"
-        
-        # Handle both old and new feedback formats
-        if isinstance(qd.get('feedback'), dict):
-            # New format with user and admin feedback
-            feedback_data = qd['feedback']
-            interview_results += f"User Feedback: {feedback_data.get('user_feedback', '')}\n"
-            interview_results += f"Admin Feedback: {feedback_data.get('admin_feedback', '')}\n"
-            interview_results += f"Admin Score: {feedback_data.get('admin_score', 0)}/10\n"
-            total_scores.append(feedback_data.get('admin_score', 0))
-        else:
-            # Old format (fallback)
-            interview_results += f"Feedback: {qd.get('feedback', '')}\n"
-        
-        interview_results += "-" * 40 + "\n"
 
-    # Calculate average score
-    avg_score = sum(total_scores) / len(total_scores) if total_scores else 0
-    print(f"Average score: {avg_score}")
-    print(f"Interview results length: {len(interview_results)}")
+    # The report only sees the compact running summary, not full answers
+    interview_results, avg_score = render_interview_summary(interview_summary(state))
+    logger.debug("Summarized interview", extra={"average_score": avg_score, "summary_chars": len(interview_results)})
 
     try:
-        chain = FINAL_REPORT_PROMPT | llm | parser
-        report_response = chain.invoke({
+        chain = llm_chain(FINAL_REPORT_PROMPT, REPORT_FORMAT)
+        report_response = await chain.ainvoke({
             "job_role": state["job_role"],
             "experience": state["experience"],
             "interview_results": interview_results
         })
         
-        print(f"Report response length: {len(report_response)}")
-        print(f"Report response preview: {report_response[:200]}...")
-        
-        # Parse the report to extract user and admin reports
-        lines = report_response.strip().split('\n')
-        user_report = ""
-        admin_report = ""
-        
-        current_section = None
-        for line in lines:
-            line = line.strip()
-            if line.startswith("USER_REPORT:"):
-                current_section = "user"
-                user_report = line.replace("USER_REPORT:", "").strip()
-            elif line.startswith("ADMIN_REPORT:"):
-                current_section = "admin"
-                admin_report = line.replace("ADMIN_REPORT:", "").strip()
-            elif current_section == "user" and line:
-                user_report += " " + line
-            elif current_section == "admin" and line:
-                admin_report += " " + line
+        logger.debug("Received final report", extra={"report_chars": len(report_response)})
         
         # Store both reports
-        final_report_data = {
-            "user_report": user_report.strip(),
-            "admin_report": admin_report.strip(),
-            "average_score": round(avg_score, 1)
-        }
-        
-        print(f"Final report data: {final_report_data}")
+        final_report_data = {**parse_report(report_response), "average_score": round(avg_score, 1)}
         
         return {
             **state, 
             "final_report": final_report_data, 
+            "report_status": "ready",
             "interview_complete": True
         }
-    except Exception as e:
-        print(f"Error generating final report: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error generating final report")
         # Return a fallback report
         return {
             **state,
@@ -477,6 +424,7 @@ def generate_final_report(state: InterviewState) -> InterviewState:
                 "admin_report": "Interview completed. Review individual question responses for detailed assessment.",
                 "average_score": round(avg_score, 1)
             },
+            "report_status": "failed",
             "interview_complete": True
         }
 
@@ -488,20 +436,26 @@ def should_continue_interview(state: InterviewState) -> Literal["continue", "com
 # ---------------------------
 # Skill-based Interview Nodes
 # ---------------------------
+@traced("graph.get_skills_and_experience")
 def get_skills_and_experience(state: SkillInterviewState) -> SkillInterviewState:
     """Validate skills and experience are provided."""
     if not state.get("skills") or state.get("experience") is None:
         raise ValueError("skills and experience must be provided.")
     return state
 
-def generate_skill_questions(state: SkillInterviewState) -> SkillInterviewState:
+@traced("graph.generate_skill_questions")
+async def generate_skill_questions(state: SkillInterviewState) -> SkillInterviewState:
     """Generate interview questions based on selected skills and experience."""
-    chain = GENERATE_SKILL_QUESTIONS_PROMPT | llm | parser
-    questions_json = chain.invoke({
-        "skills": ", ".join(state["skills"]),
-        "experience": state["experience"]
-    })
-    questions = json.loads(questions_json)
+    async def generate() -> List[str]:
+        questions_json = await invoke_llm(GENERATE_SKILL_QUESTIONS_PROMPT, {
+            "skills": ", ".join(state["skills"]),
+            "experience": state["experience"]
+        }, response_format=QUESTIONS_FORMAT)
+        return check_question_set(parse_questions(questions_json))
+
+    questions = await get_question_set(
+        skills_key(state["skills"], state["experience"]), generate
+    )
     question_list: List[InterviewQA] = [{"question": q, "answer": "", "feedback": ""} for q in questions]
     
     return {
@@ -513,6 +467,7 @@ def generate_skill_questions(state: SkillInterviewState) -> SkillInterviewState:
         "last_question": question_list[0]["question"] if question_list else ""
     }
 
+@traced("graph.ask_skill_question")
 def ask_skill_question(state: SkillInterviewState) -> SkillInterviewState:
     """Get the current skill-based question."""
     idx = state.get("current_question_idx", 0)
@@ -521,7 +476,8 @@ def ask_skill_question(state: SkillInterviewState) -> SkillInterviewState:
     q_text = state["data"][idx]["question"]
     return {**state, "last_question": q_text}
 
-def evaluate_skill_answer(state: SkillInterviewState) -> SkillInterviewState:
+@traced("graph.evaluate_skill_answer")
+async def evaluate_skill_answer(state: SkillInterviewState) -> SkillInterviewState:
     """Evaluate the candidate's answer for skill-based questions and generate feedback."""
     idx = state.get("current_question_idx", 0)
     if idx >= 5:
@@ -539,171 +495,50 @@ def evaluate_skill_answer(state: SkillInterviewState) -> SkillInterviewState:
     if not answer_text:
         raise ValueError("No answer provided for current question.")
 
-    chain = EVALUATE_SKILL_ANSWER_PROMPT | llm | parser
-    evaluation = chain.invoke({
+    evaluation = await invoke_llm(EVALUATE_SKILL_ANSWER_PROMPT, {
         "skills": ", ".join(state["skills"]),
         "experience": state["experience"],
         "question": question_text,
         "answer": answer_text
-    })
-    
-    # Parse the evaluation to extract user and admin feedback
-    lines = evaluation.strip().split('\n')
-    user_feedback = ""
-    admin_feedback = ""
-    admin_score = 0
-    admin_technical_accuracy = 0
-    admin_completeness = 0
-    admin_clarity = 0
+    }, coalesce=COALESCE_EVALUATIONS, response_format=EVALUATION_FORMAT)
     
-    current_section = None
-    for line in lines:
-        line = line.strip()
-        if line.startswith("USER_FEEDBACK:"):
-            current_section = "user"
-            user_feedback = line.replace("USER_FEEDBACK:", "").strip()
-        elif line.startswith("ADMIN_FEEDBACK:"):
-            current_section = "admin"
-            admin_feedback = line.replace("ADMIN_FEEDBACK:", "").strip()
-        elif line.startswith("ADMIN_SCORE:"):
-            try:
-                admin_score = int(line.replace("ADMIN_SCORE:", "").strip())
-            except:
-                admin_score = 0
-        elif line.startswith("ADMIN_TECHNICAL_ACCURACY:"):
-            try:
-                admin_technical_accuracy = int(line.replace("ADMIN_TECHNICAL_ACCURACY:", "").strip())
-            except:
-                admin_technical_accuracy = 0
-        elif line.startswith("ADMIN_COMPLETENESS:"):
-            try:
-                admin_completeness = int(line.replace("ADMIN_COMPLETENESS:", "").strip())
-            except:
-                admin_completeness = 0
-        elif line.startswith("ADMIN_CLARITY:"):
-            try:
-                admin_clarity = int(line.replace("ADMIN_CLARITY:", "").strip())
-            except:
-                admin_clarity = 0
-        elif current_section == "user" and line:
-            user_feedback += " " + line
-        elif current_section == "admin" and line:
-            admin_feedback += " " + line
-    
-    # Store both user and admin feedback
-    feedback_data = {
-        "user_feedback": user_feedback.strip(),
-        "admin_feedback": admin_feedback.strip(),
-        "admin_score": admin_score,
-        "admin_technical_accuracy": admin_technical_accuracy,
-        "admin_completeness": admin_completeness,
-        "admin_clarity": admin_clarity
-    }
-    
-    data_copy = state["data"].copy()
-    data_copy[idx]["answer"] = answer_text
-    data_copy[idx]["feedback"] = feedback_data
-
-    new_idx = idx + 1
-    next_question = data_copy[new_idx]["question"] if new_idx < 5 else ""
-    
-    return {
-        **state,
-        "data": data_copy,
-        "current_question_idx": new_idx,
-        "last_question": next_question,
-        "last_answer": None  # Clear the answer after processing
-    }
+    return record_evaluation(state, idx, answer_text, parse_evaluation(evaluation))
 
-def generate_skill_final_report(state: SkillInterviewState) -> SkillInterviewState:
+@traced("graph.generate_skill_final_report")
+async def generate_skill_final_report(state: SkillInterviewState) -> SkillInterviewState:
     """Generate the final skill-based interview report."""
-    print("Starting skill-based final report generation...")
-    print(f"State data length: {len(state.get('data', []))}")
-    
-    interview_results = ""
-    total_scores = []
+    logger.debug("Generating skill-based final report", extra={"answers": len(state.get("data", []))})
     
     # Check if we have data
     if not state.get("data"):
-        print("No data found in state!")
+        logger.warning("No answers to report on")
         return state
-    
-    for i in range(min(5, len(state["data"]))):
-        qd = state["data"][i]
-        print(f"Processing question {i+1}: {qd.get('question', 'No question')}")
-        print(f"Answer: {qd.get('answer', 'No answer')}")
-        print(f"Feedback type: {type(qd.get('feedback', 'No feedback'))}")
-        
-        interview_results += f"\nQuestion {i+1}: {qd['question']}\n"
-        interview_results += f"Answer: {qd['answer']}\n"
-        
-        # Handle both old and new feedback formats
-        if isinstance(qd.get('feedback'), dict):
-            # New format with user and admin feedback
-            feedback_data = qd['feedback']
-            interview_results += f"User Feedback: {feedback_data.get('user_feedback', '')}\n"
-            interview_results += f"Admin Feedback: {feedback_data.get('admin_feedback', '')}\n"
-            interview_results += f"Admin Score: {feedback_data.get('admin_score', 0)}/10\n"
-            total_scores.append(feedback_data.get('admin_score', 0))
-        else:
-            # Old format (fallback)
-            interview_results += f"Feedback: {qd.get('feedback', '')}\n"
-        
-        interview_results += "-" * 40 + "\n"
 
-    # Calculate average score
-    avg_score = sum(total_scores) / len(total_scores) if total_scores else 0
-    print(f"Average score: {avg_score}")
-    print(f"Interview results length: {len(interview_results)}")
+    # The report only sees the compact running summary, not full answers
+    interview_results, avg_score = render_interview_summary(interview_summary(state))
+    logger.debug("Summarized interview", extra={"average_score": avg_score, "summary_chars": len(interview_results)})
 
     try:
-        chain = FINAL_SKILL_REPORT_PROMPT | llm | parser
-        report_response = chain.invoke({
+        chain = llm_chain(FINAL_SKILL_REPORT_PROMPT, REPORT_FORMAT)
+        report_response = await chain.ainvoke({
             "skills": ", ".join(state["skills"]),
             "experience": state["experience"],
             "interview_results": interview_results
         })
         
-        print(f"Report response length: {len(report_response)}")
-        print(f"Report response preview: {report_response[:200]}...")
-        
-        # Parse the report to extract user and admin reports
-        lines = report_response.strip().split('\n')
-        user_report = ""
-        admin_report = ""
-        
-        current_section = None
-        for line in lines:
-            line = line.strip()
-            if line.startswith("USER_REPORT:"):
-                current_section = "user"
-                user_report = line.replace("USER_REPORT:", "").strip()
-            elif line.startswith("ADMIN_REPORT:"):
-                current_section = "admin"
-                admin_report = line.replace("ADMIN_REPORT:", "").strip()
-            elif current_section == "user" and line:
-                user_report += " " + line
-            elif current_section == "admin" and line:
-                admin_report += " " + line
+        logger.debug("Received final report", extra={"report_chars": len(report_response)})
         
         # Store both reports
-        final_report_data = {
-            "user_report": user_report.strip(),
-            "admin_report": admin_report.strip(),
-            "average_score": round(avg_score, 1)
-        }
-        
-        print(f"Final report data: {final_report_data}")
+        final_report_data = {**parse_report(report_response), "average_score": round(avg_score, 1)}
         
         return {
             **state, 
             "final_report": final_report_data, 
+            "report_status": "ready",
             "interview_complete": True
         }
-    except Exception as e:
-        print(f"Error generating final report: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error generating final report")
         # Return a fallback report
         return {
             **state,
@@ -712,6 +547,7 @@ def generate_skill_final_report(state: SkillInterviewState) -> SkillInterviewSta
                 "admin_report": "Skill-based interview completed. Review individual question responses for detailed assessment.",
                 "average_score": round(avg_score, 1)
             },
+            "report_status": "failed",
             "interview_complete": True
         }
 
@@ -736,8 +572,55 @@ workflow.add_edge("get_job_role_and_experience", "generate_questions")
 workflow.add_edge("generate_questions", "ask_question")
 workflow.add_edge("ask_question", END)
 
-# Compile with memory checkpointer for session persistence
-checkpointer = MemorySaver()
+# Compile with the configured session store (SESSION_STORE=memory|sqlite) for session persistence
+checkpointer = instrument_checkpointer(create_checkpointer(
+    os.getenv("SESSION_STORE", "memory"),
+    sqlite_path=os.getenv("SESSION_DB_PATH", "sessions.db"),
+    pool_size=int(os.getenv("SESSION_DB_POOL_SIZE", "4")),
+    # Keep the latest checkpoint per session plus SESSION_CHECKPOINT_HISTORY older ones
+    compaction=os.getenv("SESSION_COMPACTION", "inline"),
+    history=int(os.getenv("SESSION_CHECKPOINT_HISTORY", "0")),
+    # In-memory store limits (0 disables a limit)
+    max_sessions=int(os.getenv("SESSION_MAX_LIVE", "5000")),
+    max_bytes=int(os.getenv("SESSION_MAX_BYTES", "0")),
+    idle_ttl_seconds=float(os.getenv("SESSION_IDLE_TTL_SECONDS", "7200")),
+    completed_idle_seconds=float(os.getenv("SESSION_COMPLETED_IDLE_SECONDS", "300")),
+    archive_dir=os.getenv("SESSION_ARCHIVE_DIR", "session_archive") or None,
+    archive_ttl_seconds=float(os.getenv("SESSION_ARCHIVE_TTL_SECONDS", str(30 * 86400))),
+))
+def session_store_gauge(key: str):
+    """Read one number from the session store's stats, if this store reports it."""
+    def read():
+        value = checkpointer.stats().get(key) if hasattr(checkpointer, "stats") else None
+        return {(): value} if value is not None else {}
+    return read
+
+metrics_registry.callback(
+    "live_sessions", "Sessions held in memory by the in-memory session store.", session_store_gauge("live_sessions"),
+)
+metrics_registry.callback(
+    "stored_sessions", "Sessions in the SQLite session store, finished or not, as of the last maintenance sweep.",
+    session_store_gauge("stored_sessions"),
+)
+SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "60"))
+
+async def session_maintenance():
+    """Periodically compact checkpoints, expire idle sessions, archive completed ones
+    and recount stored sessions."""
+    while True:
+        try:
+            if hasattr(checkpointer, "count_sessions"):
+                # A table scan; keep it off the event loop and out of /metrics scrapes
+                await asyncio.to_thread(checkpointer.count_sessions)
+        except Exception:
+            logger.exception("Error counting stored sessions")
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_SECONDS)
+        try:
+            await checkpointer.acompact()
+            if hasattr(checkpointer, "asweep"):
+                await checkpointer.asweep()
+        except Exception:
+            logger.exception("Error sweeping session store")
 compiled_graph = workflow.compile(checkpointer=checkpointer)
 
 # ---------------------------
@@ -756,7 +639,7 @@ skill_workflow.add_edge("get_skills_and_experience", "generate_skill_questions")
 skill_workflow.add_edge("generate_skill_questions", "ask_skill_question")
 skill_workflow.add_edge("ask_skill_question", END)
 
-# Compile skill workflow with memory checkpointer
+# Compile skill workflow with the same session store
 skill_compiled_graph = skill_workflow.compile(checkpointer=checkpointer)
 
 class CreateSessionRequest(BaseModel):
@@ -796,47 +679,230 @@ class SubmitAnswerResponse(BaseModel):
     next_question_idx: Optional[int] = None
     next_question: Optional[str] = None
 
+def build_answer_response(state: dict, idx: int) -> SubmitAnswerResponse:
+    """Build the answer response for question ``idx`` from the evaluated state."""
+    feedback_data = state["data"][idx]["feedback"]
+    next_q_idx = state["current_question_idx"] if state["current_question_idx"] < 5 else None
+    return SubmitAnswerResponse(
+        question_idx=idx,
+        question=state["data"][idx]["question"],
+        user_feedback=feedback_data["user_feedback"],
+        admin_feedback=feedback_data["admin_feedback"],
+        admin_score=feedback_data["admin_score"],
+        admin_technical_accuracy=feedback_data["admin_technical_accuracy"],
+        admin_completeness=feedback_data["admin_completeness"],
+        admin_clarity=feedback_data["admin_clarity"],
+        next_question_idx=next_q_idx,
+        next_question=state["data"][next_q_idx]["question"] if next_q_idx is not None else None,
+    )
+
+async def commit_evaluation(graph, config, idx: int, updated_state: dict, final_report_node,
+                            first_idx: Optional[int] = None) -> SubmitAnswerResponse:
+    """Save evaluated answers in one state write and start follow-up work.
+
+    Prefetches the feedback audio of every answer from ``first_idx`` (a batch)
+    to ``idx`` and, after the last question, schedules the final report in the
+    background.
+    """
+    interview_finished = updated_state["current_question_idx"] >= 5
+    if interview_finished:
+        updated_state["report_status"] = "pending"
+    await graph.aupdate_state(config, updated_state)
+    answered = range(idx if first_idx is None else first_idx, idx + 1)
+    prefetch_speech([updated_state["data"][i]["feedback"]["user_feedback"] for i in answered])
+    if interview_finished:
+        session_id = config["configurable"]["thread_id"]
+        logger.info("Interview complete, generating final report", extra={"session_id": session_id})
+        schedule_final_report(graph, session_id, updated_state, final_report_node)
+    return build_answer_response(updated_state, idx)
+
+# ---------------------------
+# Background Final Reports
+# ---------------------------
+REPORT_MAX_WAIT_SECONDS = float(os.getenv("REPORT_MAX_WAIT_SECONDS", "30"))
+REPORT_POLL_INTERVAL_SECONDS = 0.5
+# A report still "running" after this long belongs to a worker that died and is started again
+REPORT_STALE_SECONDS = float(os.getenv("REPORT_STALE_SECONDS", "300"))
+
+# Identifies this worker as the owner of the reports it generates
+WORKER_ID = uuid.uuid4().hex
+
+# In-flight report generation per session in this worker
+report_tasks: Dict[str, asyncio.Task] = {}
+
+def schedule_final_report(graph, session_id: str, state: dict, report_node) -> asyncio.Task:
+    """Generate the final report for a finished interview in the background."""
+    task = report_tasks.get(session_id)
+    if task is None or task.done():
+        task = asyncio.create_task(run_final_report(graph, session_id, state, report_node))
+        report_tasks[session_id] = task
+        task.add_done_callback(lambda _: report_tasks.pop(session_id, None))
+    return task
+
+async def claim_report(graph, config) -> Optional[dict]:
+    """Mark the report as running in this worker; None if another worker claimed it.
+
+    The store has no compare-and-set, so the claim is written and read back:
+    of two workers claiming at once, the one whose write landed last wins.
+    """
+    claim = {"report_status": "running", "report_started_at": time.time(), "report_owner": WORKER_ID}
+    await graph.aupdate_state(config, claim)
+    values = (await graph.aget_state(config)).values
+    if values.get("report_owner") != WORKER_ID or values.get("report_started_at") != claim["report_started_at"]:
+        return None
+    return claim
+
+async def run_final_report(graph, session_id: str, state: dict, report_node) -> None:
+    config = {"configurable": {"thread_id": session_id}}
+    try:
+        claim = await claim_report(graph, config)
+        if claim is None:
+            logger.info("Final report claimed by another worker", extra={"session_id": session_id})
+            return
+        final_state = await report_node({**state, **claim})
+        await graph.aupdate_state(config, final_state)
+    except Exception:
+        logger.exception("Error generating final report", extra={"session_id": session_id})
+        try:
+            # Terminal like a finished report: archived by the session store, retried on request
+            await graph.aupdate_state(config, {"report_status": "failed", "interview_complete": True})
+        except Exception:
+            logger.exception("Failed to record report failure", extra={"session_id": session_id})
+
+def report_status(values: dict) -> str:
+    """Report status for a session, including ones created before statuses existed."""
+    if values.get("report_status"):
+        return values["report_status"]
+    return "ready" if values.get("final_report") else "pending"
+
+def report_needs_start(values: dict, retry: bool = False) -> bool:
+    """Whether nobody is generating this finished interview's report.
+
+    True for a report never started, for one left "running" by a worker
+    that stopped before finishing it, and for a failed one if ``retry``.
+    """
+    status = report_status(values)
+    if status == "running":
+        return time.time() - (values.get("report_started_at") or 0) > REPORT_STALE_SECONDS
+    return status == "pending" or (retry and status == "failed")
+
+async def wait_for_report(graph, session_id: str, wait: float, report_node, retry: bool = False) -> dict:
+    """Return the session values, long-polling up to ``wait`` seconds for the report.
+
+    With ``retry`` a failed report is generated again.
+    """
+    config = {"configurable": {"thread_id": session_id}}
+    values = (await graph.aget_state(config)).values
+    if not values or values.get("current_question_idx", 0) < 5:
+        return values
+
+    if session_id not in report_tasks and report_needs_start(values, retry):
+        # Finished interview whose report was never started, whose worker stopped (e.g. restart),
+        # or whose failed report the client asked to retry
+        schedule_final_report(graph, session_id, values, report_node)
+        values = {**values, "report_status": "pending"}
+
+    deadline = asyncio.get_running_loop().time() + wait
+    while report_status(values) in ("pending", "running"):
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            break
+        task = report_tasks.get(session_id)
+        if task is not None:
+            await asyncio.wait({task}, timeout=remaining)
+        else:
+            # Report is being generated by another worker
+            await asyncio.sleep(min(REPORT_POLL_INTERVAL_SECONDS, remaining))
+        values = (await graph.aget_state(config)).values
+    return values
+
+# ---------------------------
+# Server-Sent Events
+# ---------------------------
+def wants_event_stream(request: Request) -> bool:
+    return "text/event-stream" in request.headers.get("accept", "")
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def event_stream_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def stream_answer_events(graph, config, values, idx, answer_text, prompt, inputs, final_report_node):
+    """Stream an answer evaluation as Server-Sent Events.
+
+    Emits ``feedback`` events with USER_FEEDBACK text as tokens arrive, then
+    commits the evaluated state to the checkpointer once and emits a
+    ``result`` event with the full SubmitAnswerResponse. The final report for
+    a finished interview is generated in the background. Failures are
+    reported as an ``error`` event and leave the session unchanged.
+    """
+    stream_parser = EvaluationStreamParser()
+    try:
+        chain = llm_chain(prompt, EVALUATION_FORMAT)
+        async for chunk in chain.astream(inputs):
+            delta = stream_parser.feed(chunk)
+            if delta:
+                yield sse_event("feedback", {"delta": delta})
+
+        updated_state = record_evaluation(values, idx, answer_text, stream_parser.result())
+        response = await commit_evaluation(graph, config, idx, updated_state, final_report_node)
+        yield sse_event("result", response.model_dump())
+    except RateLimitExceeded as e:
+        yield sse_event("error", {"detail": str(e), "status": 429, "retry_after": math.ceil(e.retry_after)})
+    except Exception as e:
+        logger.exception("Error streaming answer evaluation")
+        yield sse_event("error", {"detail": f"Failed to submit answer: {str(e)}"})
+
 class TTSRequest(BaseModel):
     text: str
     voice: str = "alloy"  # Default voice
+    # mp3 unless requested here or negotiated from the Accept header
+    response_format: Optional[Literal["mp3", "opus", "aac"]] = None
 
 @app.post("/sessions")
 async def create_session(payload:CreateSessionRequest):
     try:
-        print(f"Creating session for job_role: {payload.job_role}, experience: {payload.experience}")
+        logger.info("Creating session", extra={"job_role": payload.job_role, "experience": payload.experience})
         
         session_id = str(uuid.uuid4())
+        set_session(session_id)
         config = {"configurable":{"thread_id":session_id}}
         initial_state:InterviewState = {
             "job_role":payload.job_role,
             "experience":payload.experience,
             "data": [],
+            "summary": [],
             "current_question_idx": 0,
             "interview_complete": False,
             "final_report": "",
+            "report_status": "pending",
             "last_question": "",
             "last_answer": None
         }
 
-        print("Invoking compiled graph...")
-        compiled_graph.invoke(initial_state,config=config)
-        print("Graph invocation successful")
+        await compiled_graph.ainvoke(initial_state,config=config)
 
-        state = compiled_graph.get_state(config)
+        state = await compiled_graph.aget_state(config)
         values = state.values
-        print(f"State values: {values}")
 
         # Validate that data was generated
         if "data" not in values or not values["data"]:
             raise HTTPException(status_code=500, detail="Failed to generate interview questions.")
         
         questions = [row["question"] for row in values.get("data",[])]
-        print(f"Generated questions: {questions}")
+        logger.debug("Generated questions", extra={"session_id": session_id, "questions": len(questions)})
 
         # Validate questions were generated
         if not questions or len(questions) == 0:
             raise HTTPException(status_code=500, detail="No questions were generated for this session.")
 
+        prefetch_speech(questions)
+
         return CreateSessionResponse(
             session_id=session_id,
             job_role= values["job_role"],
@@ -844,49 +910,51 @@ async def create_session(payload:CreateSessionRequest):
             questions=questions,
             current_question_idx=values.get("current_question_idx",0)
         )
+    except RateLimitExceeded as e:
+        raise too_many_requests(e)
     except Exception as e:
-        print(f"Error creating session: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating session")
         raise HTTPException(status_code=500, detail=f"Failed to create session: {str(e)}")
 
 @app.post("/skill-sessions")
 async def create_skill_session(payload: CreateSkillSessionRequest):
     try:
-        print(f"Creating skill session for skills: {payload.skills}, experience: {payload.experience}")
+        logger.info("Creating skill session", extra={"skills": payload.skills, "experience": payload.experience})
         
         session_id = str(uuid.uuid4())
+        set_session(session_id)
         config = {"configurable":{"thread_id":session_id}}
         initial_state: SkillInterviewState = {
             "skills": payload.skills,
             "experience": payload.experience,
             "data": [],
+            "summary": [],
             "current_question_idx": 0,
             "interview_complete": False,
             "final_report": "",
+            "report_status": "pending",
             "last_question": "",
             "last_answer": None
         }
 
-        print("Invoking skill compiled graph...")
-        skill_compiled_graph.invoke(initial_state, config=config)
-        print("Skill graph invocation successful")
+        await skill_compiled_graph.ainvoke(initial_state, config=config)
 
-        state = skill_compiled_graph.get_state(config)
+        state = await skill_compiled_graph.aget_state(config)
         values = state.values
-        print(f"Skill state values: {values}")
 
         # Validate that data was generated
         if "data" not in values or not values["data"]:
             raise HTTPException(status_code=500, detail="Failed to generate skill interview questions.")
         
         questions = [row["question"] for row in values.get("data",[])]
-        print(f"Generated skill questions: {questions}")
+        logger.debug("Generated skill questions", extra={"session_id": session_id, "questions": len(questions)})
 
         # Validate questions were generated
         if not questions or len(questions) == 0:
             raise HTTPException(status_code=500, detail="No questions were generated for this skill session.")
 
+        prefetch_speech(questions)
+
         return CreateSessionResponse(
             session_id=session_id,
             job_role=", ".join(payload.skills),  # Use skills as job_role for compatibility
@@ -894,21 +962,19 @@ async def create_skill_session(payload: CreateSkillSessionRequest):
             questions=questions,
             current_question_idx=values.get("current_question_idx",0)
         )
+    except RateLimitExceeded as e:
+        raise too_many_requests(e)
     except Exception as e:
-        print(f"Error creating skill session: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating skill session")
         raise HTTPException(status_code=500, detail=f"Failed to create skill session: {str(e)}")
 
 @app.get("/sessions/{session_id}")
 async def get_session(session_id:str):
     try:
         config = {"configurable":{"thread_id":session_id}}
-        state = compiled_graph.get_state(config)
+        state = await compiled_graph.aget_state(config)
         values = state.values
         
-        print(f"Get session request for {session_id}, values: {values}")
-        
         # Check if session exists
         if not values:
             raise HTTPException(status_code=404, detail="Session not found.")
@@ -921,21 +987,17 @@ async def get_session(session_id:str):
             final_report=values.get("final_report", "")
         )
     except Exception as e:
-        print(f"Error in get_session: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_session")
         raise HTTPException(status_code=500, detail=f"Failed to get session: {str(e)}")
 
 
 @app.post("/sessions/{session_id}/answers")
-async def submit_answer(session_id:str,payload:SubmitAnswerRequest):
+async def submit_answer(session_id:str,payload:SubmitAnswerRequest,request:Request):
     try:
         config = {"configurable": {"thread_id": session_id}}
-        current_state = compiled_graph.get_state(config)
+        current_state = await compiled_graph.aget_state(config)
         values = current_state.values
         
-        print(f"Current state values: {values}")
-        
         # Check if data exists and has the expected structure
         if "data" not in values or not values["data"]:
             raise HTTPException(status_code=400, detail="Session data not found. Please create a new session.")
@@ -947,52 +1009,34 @@ async def submit_answer(session_id:str,payload:SubmitAnswerRequest):
             raise HTTPException(status_code=400, detail="Invalid question index.")
         
         question = values["data"][idx]["question"]
-        print(f"Processing answer for question {idx}: {question}")
-
-        eval_state={**values,"last_answer":payload.answer}
-        updated_state = evaluate_answer(eval_state)
-
-        compiled_graph.update_state(config,updated_state)
-        feedback_data = updated_state["data"][idx]["feedback"]
-        
-        # Check if this was the last question (question 5, index 4)
-        if updated_state.get("current_question_idx", 0) >= 5:
-            print("Interview complete! Generating final report...")
-            final_state = generate_final_report(updated_state)
-            compiled_graph.update_state(config, final_state)
-            next_q_idx = None
-            next_q = None
-        else:
-            next_q_idx = updated_state["current_question_idx"]
-            next_q = updated_state["data"][next_q_idx]["question"]
-
-        return SubmitAnswerResponse(
-            question_idx=idx,
-            question=question,
-            user_feedback=feedback_data["user_feedback"],
-            admin_feedback=feedback_data["admin_feedback"],
-            admin_score=feedback_data["admin_score"],
-            admin_technical_accuracy=feedback_data["admin_technical_accuracy"],
-            admin_completeness=feedback_data["admin_completeness"],
-            admin_clarity=feedback_data["admin_clarity"],
-            next_question_idx=next_q_idx,
-            next_question=next_q,
-        )
+        logger.debug("Evaluating answer", extra={"session_id": session_id, "question_idx": idx})
+
+        if wants_event_stream(request):
+            answer_text = payload.answer.strip()
+            if not answer_text:
+                raise HTTPException(status_code=400, detail="No answer provided for current question.")
+            return event_stream_response(stream_answer_events(
+                compiled_graph, config, values, idx, answer_text,
+                EVALUATE_ANSWER_PROMPT,
+                role_evaluation_inputs(values, question, answer_text),
+                generate_final_report,
+            ))
+
+        updated_state = await evaluate_answer({**values, "last_answer": payload.answer})
+        return await commit_evaluation(compiled_graph, config, idx, updated_state, generate_final_report)
+    except RateLimitExceeded as e:
+        raise too_many_requests(e)
     except Exception as e:
-        print(f"Error in submit_answer: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in submit_answer")
         raise HTTPException(status_code=500, detail=f"Failed to submit answer: {str(e)}")
 
 @app.post("/skill-sessions/{session_id}/answers")
-async def submit_skill_answer(session_id: str, payload: SubmitAnswerRequest):
+async def submit_skill_answer(session_id: str, payload: SubmitAnswerRequest, request: Request):
     try:
         config = {"configurable": {"thread_id": session_id}}
-        current_state = skill_compiled_graph.get_state(config)
+        current_state = await skill_compiled_graph.aget_state(config)
         values = current_state.values
         
-        print(f"Current skill state values: {values}")
-        
         # Check if data exists and has the expected structure
         if "data" not in values or not values["data"]:
             raise HTTPException(status_code=400, detail="Skill session data not found. Please create a new session.")
@@ -1004,51 +1048,32 @@ async def submit_skill_answer(session_id: str, payload: SubmitAnswerRequest):
             raise HTTPException(status_code=400, detail="Invalid question index.")
         
         question = values["data"][idx]["question"]
-        print(f"Processing skill answer for question {idx}: {question}")
-
-        eval_state = {**values, "last_answer": payload.answer}
-        updated_state = evaluate_skill_answer(eval_state)
-
-        skill_compiled_graph.update_state(config, updated_state)
-        feedback_data = updated_state["data"][idx]["feedback"]
-        
-        # Check if this was the last question (question 5, index 4)
-        if updated_state.get("current_question_idx", 0) >= 5:
-            print("Skill interview complete! Generating final report...")
-            final_state = generate_skill_final_report(updated_state)
-            skill_compiled_graph.update_state(config, final_state)
-            next_q_idx = None
-            next_q = None
-        else:
-            next_q_idx = updated_state["current_question_idx"]
-            next_q = updated_state["data"][next_q_idx]["question"]
-
-        return SubmitAnswerResponse(
-            question_idx=idx,
-            question=question,
-            user_feedback=feedback_data["user_feedback"],
-            admin_feedback=feedback_data["admin_feedback"],
-            admin_score=feedback_data["admin_score"],
-            admin_technical_accuracy=feedback_data["admin_technical_accuracy"],
-            admin_completeness=feedback_data["admin_completeness"],
-            admin_clarity=feedback_data["admin_clarity"],
-            next_question_idx=next_q_idx,
-            next_question=next_q,
-        )
+        logger.debug("Evaluating skill answer", extra={"session_id": session_id, "question_idx": idx})
+
+        if wants_event_stream(request):
+            answer_text = payload.answer.strip()
+            if not answer_text:
+                raise HTTPException(status_code=400, detail="No answer provided for current question.")
+            return event_stream_response(stream_answer_events(
+                skill_compiled_graph, config, values, idx, answer_text,
+                EVALUATE_SKILL_ANSWER_PROMPT,
+                skill_evaluation_inputs(values, question, answer_text),
+                generate_skill_final_report,
+            ))
+
+        updated_state = await evaluate_skill_answer({**values, "last_answer": payload.answer})
+        return await commit_evaluation(skill_compiled_graph, config, idx, updated_state, generate_skill_final_report)
+    except RateLimitExceeded as e:
+        raise too_many_requests(e)
     except Exception as e:
-        print(f"Error in submit_skill_answer: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in submit_skill_answer")
         raise HTTPException(status_code=500, detail=f"Failed to submit skill answer: {str(e)}")
 
 @app.get("/sessions/{session_id}/report")
-async def get_report(session_id: str):
+async def get_report(session_id: str, wait: float = Query(0, ge=0, le=REPORT_MAX_WAIT_SECONDS, description="Seconds to wait for a pending report"),
+                  retry: bool = Query(False, description="Generate a failed report again")):
     try:
-        config = {"configurable": {"thread_id": session_id}}
-        state = compiled_graph.get_state(config)
-        values = state.values
-        
-        print(f"Report request for session {session_id}, values: {values}")
+        values = await wait_for_report(compiled_graph, session_id, wait, generate_final_report, retry)
 
         # Check if session exists
         if not values:
@@ -1066,6 +1091,7 @@ async def get_report(session_id: str):
                 "admin_report": final_report.get("admin_report", ""),
                 "average_score": final_report.get("average_score", 0),
                 "interview_complete": values.get("interview_complete", False),
+                "status": report_status(values),
                 "total_questions": len(values.get("data", [])),
                 "completed_questions": values.get("current_question_idx", 0)
             }
@@ -1078,23 +1104,19 @@ async def get_report(session_id: str):
                 "admin_report": final_report,
                 "average_score": 0,
                 "interview_complete": values.get("interview_complete", False),
+                "status": report_status(values),
                 "total_questions": len(values.get("data", [])),
                 "completed_questions": values.get("current_question_idx", 0)
             }
     except Exception as e:
-        print(f"Error in get_report: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_report")
         raise HTTPException(status_code=500, detail=f"Failed to get report: {str(e)}")
 
 @app.get("/skill-sessions/{session_id}/report")
-async def get_skill_report(session_id: str):
+async def get_skill_report(session_id: str, wait: float = Query(0, ge=0, le=REPORT_MAX_WAIT_SECONDS, description="Seconds to wait for a pending report"),
+                        retry: bool = Query(False, description="Generate a failed report again")):
     try:
-        config = {"configurable": {"thread_id": session_id}}
-        state = skill_compiled_graph.get_state(config)
-        values = state.values
-        
-        print(f"Skill report request for session {session_id}, values: {values}")
+        values = await wait_for_report(skill_compiled_graph, session_id, wait, generate_skill_final_report, retry)
 
         # Check if session exists
         if not values:
@@ -1112,6 +1134,7 @@ async def get_skill_report(session_id: str):
                 "admin_report": final_report.get("admin_report", ""),
                 "average_score": final_report.get("average_score", 0),
                 "interview_complete": values.get("interview_complete", False),
+                "status": report_status(values),
                 "total_questions": len(values.get("data", [])),
                 "completed_questions": values.get("current_question_idx", 0)
             }
@@ -1124,67 +1147,509 @@ async def get_skill_report(session_id: str):
                 "admin_report": final_report,
                 "average_score": 0,
                 "interview_complete": values.get("interview_complete", False),
+                "status": report_status(values),
                 "total_questions": len(values.get("data", [])),
                 "completed_questions": values.get("current_question_idx", 0)
             }
     except Exception as e:
-        print(f"Error in get_skill_report: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in get_skill_report")
         raise HTTPException(status_code=500, detail=f"Failed to get skill report: {str(e)}")
 
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already names ``etag``."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def audio_headers(audio_id: str) -> Dict[str, str]:
+    # The content never changes for a given id, so clients may keep it forever
+    return {
+        "ETag": f'"{audio_id}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Content-Location": f"/tts/{audio_id}",
+        "Content-Disposition": f"inline; filename=speech.{audio_id.rsplit('.', 1)[-1]}",
+        "Vary": "Accept",
+    }
+
+def streamed_audio_headers(audio_id: str, caching: bool) -> Dict[str, str]:
+    """Headers for a clip relayed while it is synthesized.
+
+    The stream can still fail, so clients must not store it; the clip's URL
+    is only named while it is being written to the cache.
+    """
+    headers = {
+        "Cache-Control": "no-store",
+        "Content-Disposition": f"inline; filename=speech.{audio_id.rsplit('.', 1)[-1]}",
+        "Vary": "Accept",
+    }
+    if caching:
+        headers["Content-Location"] = f"/tts/{audio_id}"
+    return headers
+
+def cached_audio_response(request: Request, path: str, audio_id: str) -> Response:
+    """Serve a cached clip with validators; FileResponse handles Range and sendfile."""
+    headers = audio_headers(audio_id)
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=audio_media_type(audio_id), headers=headers)
+
+class SpeechFlight(SharedStream):
+    """One upstream TTS stream, relayed to every request for the same clip.
+
+    Requests that join late replay the start of the clip from its cache file.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.opened = asyncio.get_running_loop().create_future()
+        self.task: Optional[asyncio.Task] = None
+        self.writer: Optional[AudioCacheWriter] = None
+
+    @property
+    def caching(self) -> bool:
+        """Whether the clip is still on its way into the TTS cache."""
+        return self.writer is not None and self.writer.active
+
+# Clips being synthesized, by audio id; concurrent requests for one clip share its TTS call
+speech_flights: Dict[str, SpeechFlight] = {}
+speech_flight_stats = {"calls": 0, "coalesced": 0}
+
+async def run_speech_flight(flight: SpeechFlight, audio_id: str, voice: str, text: str, audio_format: str) -> None:
+    """Stream one clip from OpenAI into ``flight``, teeing it into the TTS cache.
+
+    Runs as its own task, so the clip is finished (and cached) even if the
+    request that started it goes away.
+    """
+    error = None
+    try:
+        async with upstream_calls.track("tts") as start, AsyncExitStack() as upstream:
+            upstream.enter_context(span("openai.tts", {
+                "gen_ai.system": "openai", "gen_ai.request.model": TTS_MODEL, "call_site": "tts", "characters": len(text),
+            }))
+            response = await rate_limits.for_model(TTS_MODEL).call(lambda: upstream.enter_async_context(
+                openai_client.audio.speech.with_streaming_response.create(
+                    model=TTS_MODEL,
+                    voice=voice,
+                    input=text,
+                    response_format=audio_format,
+                    timeout=TTS_TIMEOUT,
+                )
+            ))
+            writer = flight.writer = tts_cache.writer(audio_id)
+            if writer is not None:
+                flight.replay = writer.reopen
+            flight.opened.set_result(None)
+            completed = False
+            try:
+                async for chunk in response.iter_bytes(TTS_STREAM_CHUNK_SIZE):
+                    if not flight.count:
+                        upstream_calls.first_chunk_after(start, "tts")
+                    if writer is not None:
+                        writer.write(chunk)
+                    await flight.add(chunk)
+                completed = True
+            finally:
+                if writer is not None:
+                    writer.commit() if completed else writer.abort()
+    except Exception as e:
+        error = e
+        if not flight.opened.done():
+            flight.opened.set_exception(e)
+    finally:
+        await flight.finish(error)
+
+def start_speech_flight(audio_id: str, voice: str, text: str, audio_format: str) -> SpeechFlight:
+    flight = speech_flights[audio_id] = SpeechFlight()
+    flight.task = asyncio.create_task(run_speech_flight(flight, audio_id, voice, text, audio_format))
+    flight.task.add_done_callback(
+        lambda _: speech_flights.pop(audio_id) if speech_flights.get(audio_id) is flight else None
+    )
+    speech_flight_stats["calls"] += 1
+    return flight
+
+async def join_speech(audio_id: str, voice: str, text: str, audio_format: str) -> SpeechFlight:
+    """Join the synthesis of ``audio_id`` in flight, or start it.
+
+    Returns once the upstream request is open, so provider errors still
+    become an HTTP error instead of a truncated stream.
+    """
+    flight = speech_flights.get(audio_id)
+    if flight is None:
+        flight = start_speech_flight(audio_id, voice, text, audio_format)
+    else:
+        speech_flight_stats["coalesced"] += 1
+    await asyncio.shield(flight.opened)
+    return flight
+
+async def stream_speech(audio_id: str, voice: str, text: str, audio_format: str) -> StreamingResponse:
+    """Start (or join) a streaming TTS call and return a response relaying its chunks.
+
+    The cache publishes the clip only once the stream completes.
+    """
+    flight = speech_flights.get(audio_id)
+    # Registered before waiting, so no chunk is dropped before this request reads it
+    chunks = flight.reader() if flight is not None else None
+    if chunks is None:
+        # Nothing in flight, or joined too late to replay the start (the clip isn't being cached)
+        flight = start_speech_flight(audio_id, voice, text, audio_format)
+        chunks = flight.reader()
+    else:
+        speech_flight_stats["coalesced"] += 1
+    await asyncio.shield(flight.opened)
+    return StreamingResponse(chunks, media_type=audio_media_type(audio_id),
+                             headers=streamed_audio_headers(audio_id, flight.caching))
+
+# ---------------------------
+# Speech Prefetch
+# ---------------------------
+prefetch_tasks: set = set()
+
+async def synthesize_speech(text: str, voice: str = TTS_VOICE, audio_format: str = "mp3") -> str:
+    """Make sure the clip for ``text`` is in the TTS cache and return its id."""
+    audio_id = tts_cache_key(TTS_MODEL, voice, text, audio_format)
+    if audio_id in tts_cache:
+        return audio_id
+    flight = await join_speech(audio_id, voice, text, audio_format)
+    await asyncio.shield(flight.task)
+    if flight.error is not None:
+        raise flight.error
+    return audio_id
+
+def prefetch_speech(texts: List[str]) -> None:
+    """Synthesize ``texts`` concurrently in the background, ahead of playback."""
+    if not TTS_PREFETCH or not tts_cache.enabled:
+        return
+
+    async def prefetch():
+        results = await asyncio.gather(*(synthesize_speech(text) for text in texts), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("Error prefetching speech", exc_info=result)
+
+    task = asyncio.create_task(prefetch())
+    prefetch_tasks.add(task)
+    task.add_done_callback(prefetch_tasks.discard)
+
+async def speech_response(request: Request, text: str) -> Response:
+    """Serve ``text`` as audio from the cache, or relay its synthesis (joining a prefetch in flight)."""
+    audio_format = negotiate_audio_format(request.headers.get("accept"))
+    audio_id = tts_cache_key(TTS_MODEL, TTS_VOICE, text, audio_format)
+    path = tts_cache.get(audio_id)
+    if path is not None:
+        return cached_audio_response(request, path, audio_id)
+    return await stream_speech(audio_id, TTS_VOICE, text, audio_format)
+
+async def session_row(graph, session_id: str, idx: int) -> dict:
+    values = (await graph.aget_state({"configurable": {"thread_id": session_id}})).values
+    if not values.get("data"):
+        raise HTTPException(status_code=404, detail="Session not found.")
+    if not 0 <= idx < len(values["data"]):
+        raise HTTPException(status_code=404, detail="Invalid question index.")
+    return values["data"][idx]
+
+def feedback_text(row: dict) -> str:
+    if not row.get("feedback"):
+        raise HTTPException(status_code=404, detail="This question has not been answered yet.")
+    return row["feedback"]["user_feedback"]
+
 @app.post("/tts")
-async def text_to_speech(request: TTSRequest):
+async def text_to_speech(request: TTSRequest, http_request: Request):
     """Convert text to speech using OpenAI TTS API"""
     try:
-        print(f"Generating TTS for text: {request.text[:100]}...")
-        
-        # Generate speech using OpenAI TTS
-        response = openai_client.audio.speech.create(
-            model="tts-1",
-            voice=request.voice,
-            input=request.text
-        )
-        
-        # Convert response to bytes
-        audio_bytes = response.content
+        audio_format = request.response_format or negotiate_audio_format(http_request.headers.get("accept"))
+        audio_id = tts_cache_key(TTS_MODEL, request.voice, request.text, audio_format)
+        path = tts_cache.get(audio_id)
+        if path is not None:
+            return cached_audio_response(http_request, path, audio_id)
+
+        logger.debug("Synthesizing speech", extra={"characters": len(request.text)})
         
-        # Return audio as streaming response
-        return StreamingResponse(
-            io.BytesIO(audio_bytes),
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": "inline; filename=speech.mp3"}
-        )
+        # Relay audio chunks as OpenAI produces them so playback can start early
+        return await stream_speech(audio_id, request.voice, request.text, audio_format)
         
+    except RateLimitExceeded as e:
+        raise too_many_requests(e)
     except Exception as e:
-        print(f"Error generating TTS: {e}")
+        logger.exception("Error generating TTS")
         raise HTTPException(status_code=500, detail=f"Failed to generate speech: {str(e)}")
 
-@app.post("/whisper")
-async def speech_to_text(audio_file: UploadFile = File(...)):
+@app.get("/tts/{audio_id}")
+async def get_cached_speech(audio_id: str, request: Request):
+    """Replay a clip previously generated by POST /tts"""
+    path = tts_cache.get(audio_id) if re.fullmatch(r"[0-9a-f]{64}\.(mp3|opus|aac)", audio_id) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found.")
+    return cached_audio_response(request, path, audio_id)
+
+@app.get("/sessions/{session_id}/questions/{idx}/audio")
+async def get_question_audio(session_id: str, idx: int, request: Request):
+    row = await session_row(compiled_graph, session_id, idx)
+    return await speech_response(request, row["question"])
+
+@app.get("/sessions/{session_id}/feedback/{idx}/audio")
+async def get_feedback_audio(session_id: str, idx: int, request: Request):
+    row = await session_row(compiled_graph, session_id, idx)
+    return await speech_response(request, feedback_text(row))
+
+@app.get("/skill-sessions/{session_id}/questions/{idx}/audio")
+async def get_skill_question_audio(session_id: str, idx: int, request: Request):
+    row = await session_row(skill_compiled_graph, session_id, idx)
+    return await speech_response(request, row["question"])
+
+@app.get("/skill-sessions/{session_id}/feedback/{idx}/audio")
+async def get_skill_feedback_audio(session_id: str, idx: int, request: Request):
+    row = await session_row(skill_compiled_graph, session_id, idx)
+    return await speech_response(request, feedback_text(row))
+
+# The upload is parsed by hand (see audio_upload.py), so describe the form for the docs
+AUDIO_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["audio_file"],
+            "properties": {
+                "audio_file": {"type": "string", "format": "binary"},
+                "duration": {"type": "number", "description": "Recording length in seconds"},
+            },
+        }}},
+    },
+}
+
+transcriptions_inflight: Dict[str, asyncio.Task] = {}
+
+async def transcribe_upload(audio_file: AudioUpload) -> str:
+    """Transcribe a recording, at most once per distinct audio content.
+
+    Repeats are answered from the transcript cache, and a retry that arrives
+    while the first upload is still being transcribed waits for that result.
+    Takes ownership of ``audio_file`` and closes it when done.
+    """
+    key = f"{WHISPER_MODEL}:{audio_file.sha256}"
+    task = transcriptions_inflight.get(key)
+    if task is None:
+        cached = await asyncio.to_thread(transcript_cache.get, key)
+        if cached is not None:
+            audio_file.close()
+            return cached
+
+    # Re-check: another request may have started while the cache was read
+    task = transcriptions_inflight.get(key)
+    if task is None:
+        async def transcribe():
+            # Transcribe using OpenAI Whisper, streaming the spooled upload as is
+            with span("openai.whisper", {"gen_ai.system": "openai", "gen_ai.request.model": WHISPER_MODEL,
+                                         "call_site": "whisper", "bytes": audio_file.size}):
+                transcript = await upstream_calls.call("whisper", lambda: rate_limits.for_model(WHISPER_MODEL).call(
+                    lambda: openai_client.audio.transcriptions.create(
+                        model=WHISPER_MODEL,
+                        file=audio_file.openai_file(),
+                        response_format="text",
+                        timeout=WHISPER_TIMEOUT,
+                    )
+                ))
+            logger.debug("Transcribed audio", extra={"bytes": audio_file.size, "characters": len(transcript)})
+            text = transcript.strip()
+            await asyncio.to_thread(transcript_cache.put, key, text)
+            return text
+
+        def finished(_):
+            transcriptions_inflight.pop(key, None)
+            audio_file.close()
+
+        task = asyncio.create_task(transcribe())
+        transcriptions_inflight[key] = task
+        task.add_done_callback(finished)
+    else:
+        audio_file.close()
+    # Shielded so a client that gives up doesn't cancel a transcription others wait on
+    return await asyncio.shield(task)
+
+@app.post("/whisper", openapi_extra=AUDIO_UPLOAD_OPENAPI)
+async def speech_to_text(request: Request):
     """Convert speech to text using OpenAI Whisper API"""
+    audio_file = await receive_audio_upload(
+        request,
+        "audio_file",
+        max_bytes=WHISPER_MAX_UPLOAD_BYTES,
+        spool_bytes=WHISPER_SPOOL_BYTES,
+        max_seconds=WHISPER_MAX_DURATION_SECONDS,
+    )
     try:
-        print(f"Processing audio file: {audio_file.filename}")
-        
-        # Read the audio file
-        audio_content = await audio_file.read()
-        
-        # Create a file-like object for OpenAI API
-        audio_file_obj = io.BytesIO(audio_content)
-        audio_file_obj.name = audio_file.filename or "audio.webm"
-        
-        # Transcribe using OpenAI Whisper
-        transcript = openai_client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file_obj,
-            response_format="text"
-        )
-        
-        print(f"Transcription result: {transcript}")
-        
-        return {"text": transcript.strip()}
+        logger.debug("Transcribing upload", extra={"bytes": audio_file.size})
+        return {"text": await transcribe_upload(audio_file)}
         
+    except RateLimitExceeded as e:
+        raise too_many_requests(e)
     except Exception as e:
-        print(f"Error in speech-to-text: {e}")
+        logger.exception("Error in speech-to-text")
         raise HTTPException(status_code=500, detail=f"Failed to transcribe audio: {str(e)}")
 
+# ---------------------------
+# Audio Answers
+# ---------------------------
+class AudioAnswerResponse(SubmitAnswerResponse):
+    transcript: str
+
+async def stream_audio_answer_events(audio_file: AudioUpload, graph, config, values, idx, prompt,
+                                     evaluation_inputs, final_report_node):
+    """Like stream_answer_events, preceded by a ``transcript`` event."""
+    try:
+        transcript = await transcribe_upload(audio_file)
+    except RateLimitExceeded as e:
+        yield sse_event("error", {"detail": str(e), "status": 429, "retry_after": math.ceil(e.retry_after)})
+        return
+    except Exception as e:
+        logger.exception("Error transcribing audio answer")
+        yield sse_event("error", {"detail": f"Failed to transcribe audio: {str(e)}"})
+        return
+    if not transcript:
+        yield sse_event("error", {"detail": "No speech detected in the recording."})
+        return
+    yield sse_event("transcript", {"text": transcript})
+    question = values["data"][idx]["question"]
+    async for event in stream_answer_events(graph, config, values, idx, transcript, prompt,
+                                            evaluation_inputs(values, question, transcript), final_report_node):
+        yield event
+
+async def answer_with_audio(request: Request, graph, session_id: str, evaluate_node, prompt,
+                            evaluation_inputs, final_report_node):
+    """Transcribe a recorded answer and evaluate it as one server-side pipeline."""
+    config = {"configurable": {"thread_id": session_id}}
+    values = (await graph.aget_state(config)).values
+    if not values.get("data"):
+        raise HTTPException(status_code=404, detail="Session not found.")
+    idx = values.get("current_question_idx", 0)
+    if idx >= len(values["data"]):
+        raise HTTPException(status_code=400, detail="Invalid question index.")
+
+    audio_file = await receive_audio_upload(
+        request,
+        "audio_file",
+        max_bytes=WHISPER_MAX_UPLOAD_BYTES,
+        spool_bytes=WHISPER_SPOOL_BYTES,
+        max_seconds=WHISPER_MAX_DURATION_SECONDS,
+    )
+    if wants_event_stream(request):
+        return event_stream_response(stream_audio_answer_events(
+            audio_file, graph, config, values, idx, prompt, evaluation_inputs, final_report_node,
+        ))
+
+    try:
+        transcript = await transcribe_upload(audio_file)
+    except RateLimitExceeded as e:
+        raise too_many_requests(e)
+    except Exception as e:
+        logger.exception("Error transcribing audio answer")
+        raise HTTPException(status_code=500, detail=f"Failed to transcribe audio: {str(e)}")
+    if not transcript:
+        raise HTTPException(status_code=400, detail="No speech detected in the recording.")
+
+    try:
+        updated_state = await evaluate_node({**values, "last_answer": transcript})
+        response = await commit_evaluation(graph, config, idx, updated_state, final_report_node)
+    except RateLimitExceeded as e:
+        raise too_many_requests(e)
+    except Exception as e:
+        logger.exception("Error evaluating audio answer")
+        raise HTTPException(status_code=500, detail=f"Failed to submit answer: {str(e)}")
+    return AudioAnswerResponse(transcript=transcript, **response.model_dump())
+
+@app.post("/sessions/{session_id}/audio-answers", openapi_extra=AUDIO_UPLOAD_OPENAPI)
+async def submit_audio_answer(session_id: str, request: Request):
+    """Transcribe and evaluate a recorded answer in one round trip"""
+    return await answer_with_audio(
+        request, compiled_graph, session_id, evaluate_answer,
+        EVALUATE_ANSWER_PROMPT, role_evaluation_inputs, generate_final_report,
+    )
+
+@app.post("/skill-sessions/{session_id}/audio-answers", openapi_extra=AUDIO_UPLOAD_OPENAPI)
+async def submit_skill_audio_answer(session_id: str, request: Request):
+    """Transcribe and evaluate a recorded skill answer in one round trip"""
+    return await answer_with_audio(
+        request, skill_compiled_graph, session_id, evaluate_skill_answer,
+        EVALUATE_SKILL_ANSWER_PROMPT, skill_evaluation_inputs, generate_skill_final_report,
+    )
+
+# ---------------------------
+# Batch Answers
+# ---------------------------
+BATCH_EVALUATION_CONCURRENCY = int(os.getenv("BATCH_EVALUATION_CONCURRENCY", "5"))
+
+class BatchAnswerRequest(BaseModel):
+    answers: List[str] = Field(..., min_length=1, max_length=5, example=["A UI library", "Functions that use state"])
+
+class BatchAnswerResponse(BaseModel):
+    results: List[SubmitAnswerResponse]
+    status: str
+    final_report: Optional[dict] = None
+
+async def answer_batch(graph, session_id: str, answers: List[str], wait: float, prompt,
+                       evaluation_inputs, final_report_node) -> BatchAnswerResponse:
+    """Evaluate the answers to the next questions concurrently and save them in one write.
+
+    Each evaluation prompt sees only its own question and answer, so the
+    answers are independent. When the batch finishes the interview, the final
+    report is scheduled and awaited for up to ``wait`` seconds.
+    """
+    config = {"configurable": {"thread_id": session_id}}
+    values = (await graph.aget_state(config)).values
+    if not values.get("data"):
+        raise HTTPException(status_code=404, detail="Session not found.")
+    start = values.get("current_question_idx", 0)
+    if start + len(answers) > len(values["data"]):
+        raise HTTPException(status_code=400, detail=f"Only {len(values['data']) - start} questions are left to answer.")
+    answers = [answer.strip() for answer in answers]
+    if not all(answers):
+        raise HTTPException(status_code=400, detail="No answer provided for one of the questions.")
+
+    semaphore = asyncio.Semaphore(BATCH_EVALUATION_CONCURRENCY)
+
+    async def evaluate(idx: int, answer: str) -> dict:
+        async with semaphore:
+            inputs = evaluation_inputs(values, values["data"][idx]["question"], answer)
+            evaluation = await invoke_llm(prompt, inputs, coalesce=COALESCE_EVALUATIONS,
+                                          response_format=EVALUATION_FORMAT)
+        return parse_evaluation(evaluation)
+
+    try:
+        evaluations = await asyncio.gather(*(evaluate(start + i, answer) for i, answer in enumerate(answers)))
+
+        state, results = values, []
+        for offset, (answer, feedback_data) in enumerate(zip(answers, evaluations)):
+            state = record_evaluation(state, start + offset, answer, feedback_data)
+            results.append(build_answer_response(state, start + offset))
+        await commit_evaluation(graph, config, start + len(answers) - 1, state, final_report_node, first_idx=start)
+
+        values = await wait_for_report(graph, session_id, wait, final_report_node)
+    except RateLimitExceeded as e:
+        raise too_many_requests(e)
+    except Exception as e:
+        logger.exception("Error submitting answer batch", extra={"session_id": session_id})
+        raise HTTPException(status_code=500, detail=f"Failed to submit answers: {str(e)}")
+    status = report_status(values)
+    return BatchAnswerResponse(
+        results=results,
+        status=status,
+        final_report=values.get("final_report") if status == "ready" else None,
+    )
+
+@app.post("/sessions/{session_id}/answers:batch")
+async def submit_answer_batch(session_id: str, payload: BatchAnswerRequest,
+                              wait: float = Query(0, ge=0, le=REPORT_MAX_WAIT_SECONDS, description="Seconds to wait for the final report")):
+    """Evaluate several answers at once, e.g. for take-home interviews"""
+    return await answer_batch(
+        compiled_graph, session_id, payload.answers, wait,
+        EVALUATE_ANSWER_PROMPT, role_evaluation_inputs, generate_final_report,
+    )
+
+@app.post("/skill-sessions/{session_id}/answers:batch")
+async def submit_skill_answer_batch(session_id: str, payload: BatchAnswerRequest,
+                                    wait: float = Query(0, ge=0, le=REPORT_MAX_WAIT_SECONDS, description="Seconds to wait for the final report")):
+    """Evaluate several skill answers at once, e.g. for take-home interviews"""
+    return await answer_batch(
+        skill_compiled_graph, session_id, payload.answers, wait,
+        EVALUATE_SKILL_ANSWER_PROMPT, skill_evaluation_inputs, generate_skill_final_report,
+    )
@@ -0,0 +1,271 @@
+"""
+Prometheus metrics for request, upstream-call and event-loop health.
+
+A small registry of counters, gauges and histograms rendered in the
+Prometheus text exposition format (version 0.0.4) for ``GET /metrics``,
+so the server needs no metrics client library. Values that other
+components already count (cache and session stats) are read at scrape time
+through callback metrics rather than mirrored.
+
+- ``MetricsMiddleware`` times every request by route template.
+- ``UpstreamCalls`` tracks OpenAI calls per call site: in flight, latency,
+  time to first chunk and outcome.
+- ``monitor_event_loop`` samples how late the event loop runs a timer,
+  which is how long a coroutine blocked it.
+"""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request and upstream latencies: from a cache hit to a long transcription
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Labels = Tuple[str, ...]
+T = TypeVar("T")
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def _key(self, labels: Dict[str, str]) -> Labels:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self) -> Iterable[Tuple[str, Sequence[str], Labels, float]]:
+        """(name, label names, label values, value) for every series."""
+        return []
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, names, values, value in self.samples():
+            lines.append(f"{name}{format_labels(names, values)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        for key, value in sorted(self._values.items()):
+            yield self.name, self.labels, key, value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[Labels, List[float]] = {}  # bucket counts, then sum
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0.0] * (len(self.buckets) + 1)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self):
+        names = self.labels + ("le",)
+        for key, series in sorted(self._series.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket", names, key + (format_value(bound),), cumulative
+            yield f"{self.name}_sum", self.labels, key, series[-1]
+            yield f"{self.name}_count", self.labels, key, cumulative
+
+
+class CallbackMetric(Metric):
+    """A counter or gauge whose series are read from ``read()`` at scrape time."""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], Dict[Labels, float]],
+                 labels: Sequence[str] = (), kind: str = "gauge"):
+        super().__init__(name, documentation, labels)
+        self.kind = kind
+        self.read = read
+
+    def samples(self):
+        for key, value in sorted(self.read().items()):
+            yield self.name, self.labels, key, value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def callback(self, name: str, documentation: str, read: Callable[[], Dict[Labels, float]],
+                 labels: Sequence[str] = (), kind: str = "gauge") -> CallbackMetric:
+        return self._register(CallbackMetric(name, documentation, read, labels, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # One broken callback shouldn't take the whole scrape down
+                continue
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request until its last byte is sent.
+
+    Requests are labelled with the route template ("/sessions/{session_id}")
+    so label values stay bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app, duration: Histogram, in_progress: Gauge):
+        self.app = app
+        self.duration = duration  # labels: method, route, status
+        self.in_progress = in_progress  # labels: method
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = "500"
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        self.in_progress.inc(method=method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_progress.dec(method=method)
+            route = scope.get("route")
+            self.duration.observe(time.perf_counter() - start, method=method,
+                                  route=getattr(route, "path", "unmatched"), status=status)
+
+
+class UpstreamCalls:
+    """In-flight count, latency and outcomes of OpenAI calls by call site.
+
+    A call is timed as the caller sees it, including any wait for rate-limit
+    admission and retries (those are counted separately by the limiter).
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.in_flight = registry.gauge("upstream_calls_in_flight", "OpenAI calls in progress.", ("site",))
+        self.duration = registry.histogram(
+            "upstream_call_duration_seconds", "OpenAI call latency, to the end of the response.", ("site", "outcome"),
+        )
+        self.first_chunk = registry.histogram(
+            "upstream_time_to_first_chunk_seconds", "Latency until the first streamed chunk arrives.", ("site",),
+        )
+
+    @asynccontextmanager
+    async def track(self, site: str):
+        """Time the enclosed call; an exception marks it as an error."""
+        start = time.perf_counter()
+        outcome = "error"
+        self.in_flight.inc(site=site)
+        try:
+            yield start
+            outcome = "ok"
+        finally:
+            self.in_flight.dec(site=site)
+            self.duration.observe(time.perf_counter() - start, site=site, outcome=outcome)
+
+    async def call(self, site: str, request: Callable[[], Awaitable[T]]) -> T:
+        async with self.track(site):
+            return await request()
+
+    def first_chunk_after(self, start: float, site: str) -> None:
+        self.first_chunk.observe(time.perf_counter() - start, site=site)
+
+
+async def monitor_event_loop(lag: Histogram, interval: float = 0.5,
+                             last: Optional[Gauge] = None) -> None:
+    """Record how late a ``interval``-second sleep wakes up, until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        delay = max(0.0, loop.time() - start - interval)
+        lag.observe(delay)
+        if last is not None:
+            last.set(delay)
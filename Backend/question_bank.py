@@ -0,0 +1,286 @@
+"""
+Prebuilt question bank for the roles and skills offered by the frontend.
+
+The bank is produced offline by ``python question_bank.py build`` and stored as
+a single indexed file that each uvicorn worker memory-maps at startup, so all
+workers on a host share the same pages instead of holding their own copy.
+
+File layout (all integers little-endian):
+
+    header   magic "IQBK" | version u16 | reserved u16 | entries u32 | index offset u64
+    records  zlib-compressed JSON {"key": ..., "sets": [[question, ...], ...]}
+    index    entries x (key hash u64 | record offset u64 | record length u32),
+             sorted by key hash
+
+Keys are the canonical cache keys from ``question_cache`` so a bank entry and a
+cache entry for the same request always agree. The bank covers each role, each
+single skill and the skill combinations in ``CATALOG_SKILL_SETS`` (plus any
+given with ``--skill-set``); other multi-skill selections fall back to the
+question cache and the LLM.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+import time
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from llm_output import QUESTIONS_FORMAT, parse_questions
+from question_cache import EXPERIENCE_BUCKETS, check_question_set, role_key, skills_key
+
+MAGIC = b"IQBK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQ")
+INDEX_ENTRY = struct.Struct("<QQI")
+
+# Popular roles typed into JobSelection (the role field is free text).
+CATALOG_ROLES = [
+    "Software Engineer",
+    "Senior Software Engineer",
+    "Frontend Developer",
+    "Backend Developer",
+    "Full Stack Developer",
+    "React Developer",
+    "Python Developer",
+    "Java Developer",
+    "Node.js Developer",
+    "Mobile Developer",
+    "DevOps Engineer",
+    "Cloud Engineer",
+    "Data Engineer",
+    "Data Scientist",
+    "Machine Learning Engineer",
+    "QA Engineer",
+    "Security Engineer",
+    "Product Manager",
+    "UX Designer",
+]
+
+# Skill ids offered by SkillSelection.
+CATALOG_SKILLS = [
+    "react", "vue", "angular", "javascript", "typescript", "html", "css", "sass",
+    "nodejs", "python", "java", "csharp", "php", "ruby", "go", "rust",
+    "react-native", "flutter", "swift", "kotlin", "ionic", "xamarin",
+    "aws", "azure", "gcp", "docker", "kubernetes", "terraform", "jenkins", "gitlab",
+    "sql", "mongodb", "postgresql", "redis", "elasticsearch", "spark", "hadoop", "tensorflow",
+    "owasp", "penetration", "cryptography", "oauth", "jwt", "ssl",
+]
+
+# Skill combinations commonly picked together in SkillSelection. Every selection
+# has its own cache key, so only these multi-skill sets are prebuilt.
+CATALOG_SKILL_SETS = [
+    ["react", "javascript"],
+    ["react", "typescript"],
+    ["react", "nodejs"],
+    ["html", "css", "javascript"],
+    ["nodejs", "mongodb"],
+    ["python", "sql"],
+    ["java", "sql"],
+    ["sql", "postgresql"],
+    ["docker", "kubernetes"],
+    ["aws", "terraform"],
+    ["aws", "docker"],
+    ["oauth", "jwt"],
+]
+
+
+def key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class QuestionBank:
+    """Read-only, memory-mapped view of a question bank file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        magic, version, _, entries, index_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a question bank file.")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported question bank version {version} in {path}.")
+        self.entries = entries
+        self._index_offset = index_offset
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open_optional(cls, path: Optional[str]) -> Optional["QuestionBank"]:
+        """Open the bank at ``path`` if it exists, otherwise return None."""
+        if not path or not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def _entry(self, i: int) -> Tuple[int, int, int]:
+        return INDEX_ENTRY.unpack_from(self._mmap, self._index_offset + i * INDEX_ENTRY.size)
+
+    def get(self, key: str) -> Optional[List[List[str]]]:
+        """Return every question set stored for ``key``, or None."""
+        target = key_hash(key)
+        lo, hi = 0, self.entries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.entries:
+            h, offset, length = self._entry(lo)
+            if h != target:
+                break
+            record = json.loads(zlib.decompress(self._mmap[offset:offset + length]))
+            if record["key"] == key:
+                return record["sets"]
+            lo += 1
+        return None
+
+    def sample(self, key: str) -> Optional[List[str]]:
+        """Return one random question set for ``key``, counting hits and misses."""
+        sets = self.get(key)
+        if not sets:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(random.choice(sets))
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def stats(self) -> Dict[str, object]:
+        return {"path": self.path, "keys": self.entries, "hits": self.hits, "misses": self.misses}
+
+
+def write_bank(path: str, records: Dict[str, List[List[str]]]) -> None:
+    """Write ``records`` (key -> question sets) to ``path`` atomically.
+
+    Workers that already mapped an older bank keep reading their inode until
+    they restart.
+    """
+    tmp_path = f"{path}.tmp"
+    index = []
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        for key in sorted(records):
+            blob = zlib.compress(json.dumps({"key": key, "sets": records[key]}).encode("utf-8"), 9)
+            index.append((key_hash(key), f.tell(), len(blob)))
+            f.write(blob)
+        index_offset = f.tell()
+        for entry in sorted(index):
+            f.write(INDEX_ENTRY.pack(*entry))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(index), index_offset))
+    os.replace(tmp_path, path)
+
+
+async def build_bank(output: str, sets_per_key: int, concurrency: int, roles: List[str], skills: List[str],
+                     skill_sets: Sequence[List[str]] = ()) -> Dict[str, int]:
+    """Generate question sets for the catalog with bounded concurrency.
+
+    ``skills`` are prebuilt one at a time and each of ``skill_sets`` as one selection.
+    """
+    # Reading a bank (the server, ``show``) doesn't need the LLM or an API key
+    from llm_setup import GENERATE_QUESTIONS_PROMPT, GENERATE_SKILL_QUESTIONS_PROMPT, llm_chain
+
+    jobs = []
+    for experience in EXPERIENCE_BUCKETS:
+        for role in roles:
+            inputs = {"job_role": role, "experience": experience}
+            jobs.append((role_key(role, experience), GENERATE_QUESTIONS_PROMPT, inputs))
+        for selection in [[skill] for skill in skills] + [list(skill_set) for skill_set in skill_sets]:
+            inputs = {"skills": ", ".join(selection), "experience": experience}
+            jobs.append((skills_key(selection, experience), GENERATE_SKILL_QUESTIONS_PROMPT, inputs))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    records: Dict[str, List[List[str]]] = {}
+    failures = 0
+
+    async def generate(key, prompt, inputs):
+        nonlocal failures
+        async with semaphore:
+            try:
+                questions = parse_questions(await llm_chain(prompt, QUESTIONS_FORMAT).ainvoke(inputs))
+            except Exception as e:
+                failures += 1
+                print(f"Failed to generate questions for {key}: {e}")
+                return
+        try:
+            check_question_set(questions)
+        except ValueError as e:
+            failures += 1
+            print(f"Skipping malformed question set for {key}: {e}")
+            return
+        records.setdefault(key, []).append(list(questions))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        generate(key, prompt, inputs)
+        for key, prompt, inputs in jobs
+        for _ in range(sets_per_key)
+    ))
+    write_bank(output, records)
+    return {
+        "keys": len(records),
+        "question_sets": sum(len(sets) for sets in records.values()),
+        "failures": failures,
+        "seconds": round(time.perf_counter() - start, 1),
+    }
+
+
+def main() -> None:
+    cli = argparse.ArgumentParser(description="Build or inspect the prebuilt question bank.")
+    commands = cli.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Generate question sets for the whole catalog.")
+    build.add_argument("--output", default=os.getenv("QUESTION_BANK_PATH", "question_bank.qbk"))
+    build.add_argument("--sets-per-key", type=int, default=3)
+    build.add_argument("--concurrency", type=int, default=8)
+    build.add_argument("--roles-only", action="store_true")
+    build.add_argument("--skills-only", action="store_true")
+    build.add_argument("--skill-set", action="append", default=[],
+                       help="Comma-separated skills to prebuild as one selection, e.g. react,nodejs (repeatable)")
+
+    show = commands.add_parser("show", help="Print the question sets stored for one role or skill.")
+    show.add_argument("--bank", default=os.getenv("QUESTION_BANK_PATH", "question_bank.qbk"))
+    show.add_argument("--role")
+    show.add_argument("--skill", action="append")
+    show.add_argument("--experience", type=int, default=0)
+
+    args = cli.parse_args()
+    if args.command == "build":
+        summary = asyncio.run(build_bank(
+            args.output,
+            sets_per_key=args.sets_per_key,
+            concurrency=args.concurrency,
+            roles=[] if args.skills_only else CATALOG_ROLES,
+            skills=[] if args.roles_only else CATALOG_SKILLS,
+            skill_sets=[] if args.roles_only else CATALOG_SKILL_SETS + [
+                [skill.strip() for skill in skill_set.split(",") if skill.strip()] for skill_set in args.skill_set
+            ],
+        ))
+        print(json.dumps({"output": args.output, **summary}))
+    else:
+        bank = QuestionBank(args.bank)
+        key = role_key(args.role, args.experience) if args.role else skills_key(args.skill or [], args.experience)
+        print(json.dumps({"key": key, "sets": bank.get(key)}, indent=2))
+        bank.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Question-set cache for interview session creation.
+
+Sessions for popular roles and skill combinations ask GPT-4 for the same five
+questions over and over. The cache keeps a small pool of generated question
+sets per canonical request key and hands out a random set from the pool once
+it is full, so candidates still see some variety.
+"""
+
+import random
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple
+
+# Every session asks exactly this many questions
+QUESTIONS_PER_SET = 5
+
+# Lower bounds of the experience options offered by the frontend
+# ("0-1", "1-2", "2-3", "3-5", "5-7", "7-10", "10+").
+EXPERIENCE_BUCKETS = (0, 1, 2, 3, 5, 7, 10)
+
+# Common spellings mapped onto the skill ids used by the frontend.
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "node": "nodejs",
+    "node.js": "nodejs",
+    "py": "python",
+    "python3": "python",
+    "c#": "csharp",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "mongo": "mongodb",
+    "scss": "sass",
+    "sass/scss": "sass",
+    "reactnative": "react-native",
+    "react native": "react-native",
+    "google cloud": "gcp",
+    "tls": "ssl",
+    "ssl/tls": "ssl",
+}
+
+
+def normalize_role(job_role: str) -> str:
+    """Lowercase a job role and collapse internal whitespace."""
+    return " ".join(job_role.lower().split())
+
+
+def normalize_skill(skill: str) -> str:
+    """Lowercase a skill name and map known aliases onto their canonical id."""
+    name = " ".join(skill.lower().split())
+    return SKILL_ALIASES.get(name, name)
+
+
+def canonical_skills(skills: Iterable[str]) -> Tuple[str, ...]:
+    """Return the sorted, de-duplicated, de-aliased form of a skill list."""
+    return tuple(sorted({normalize_skill(s) for s in skills if s and s.strip()}))
+
+
+def experience_bucket(experience: int) -> int:
+    """Map years of experience onto the lower bound of its frontend bucket."""
+    bucket = EXPERIENCE_BUCKETS[0]
+    for lower in EXPERIENCE_BUCKETS:
+        if experience >= lower:
+            bucket = lower
+    return bucket
+
+
+def role_key(job_role: str, experience: int) -> str:
+    """Cache key for a job-role interview."""
+    return f"role:{normalize_role(job_role)}|exp:{experience_bucket(experience)}"
+
+
+def skills_key(skills: Iterable[str], experience: int) -> str:
+    """Cache key for a skill-based interview."""
+    return f"skills:{','.join(canonical_skills(skills))}|exp:{experience_bucket(experience)}"
+
+
+def check_question_set(questions: List[str]) -> List[str]:
+    """Return ``questions`` if it is a full set of non-empty questions.
+
+    Raises ValueError otherwise, so a short or malformed reply is never
+    pooled or turned into a session that fails partway through.
+    """
+    if not isinstance(questions, list) or len(questions) != QUESTIONS_PER_SET:
+        count = len(questions) if isinstance(questions, list) else 0
+        raise ValueError(f"Expected {QUESTIONS_PER_SET} questions, got {count}.")
+    if not all(isinstance(q, str) and q.strip() for q in questions):
+        raise ValueError("Generated question set contains an empty question.")
+    return questions
+
+
+class QuestionSetCache:
+    """LRU + TTL cache holding a pool of question sets per key.
+
+    A key's pool fills up one generated set per miss until it holds
+    ``pool_size`` sets; after that every lookup is a hit that returns a
+    random set from the pool. Sets older than ``ttl_seconds`` are dropped on
+    access, and the least recently used key is evicted once more than
+    ``max_keys`` keys are cached. A ``pool_size`` of 0 disables caching.
+    """
+
+    def __init__(self, pool_size: int = 3, max_keys: int = 1000, ttl_seconds: float = 86400):
+        self.pool_size = pool_size
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._pools: "OrderedDict[str, List[Tuple[float, List[str]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _live_pool(self, key: str) -> List[Tuple[float, List[str]]]:
+        pool = self._pools.get(key, [])
+        cutoff = time.monotonic() - self.ttl_seconds
+        live = [entry for entry in pool if entry[0] >= cutoff]
+        self.expirations += len(pool) - len(live)
+        if live:
+            self._pools[key] = live
+            self._pools.move_to_end(key)
+        else:
+            self._pools.pop(key, None)
+        return live
+
+    def get(self, key: str) -> List[str] | None:
+        """Return a random cached set for ``key`` once its pool is full."""
+        if self.pool_size <= 0:
+            return None
+        pool = self._live_pool(key)
+        if len(pool) < self.pool_size:
+            return None
+        return list(random.choice(pool)[1])
+
+    def add(self, key: str, questions: List[str]) -> None:
+        """Add a freshly generated set to the pool for ``key``."""
+        if self.pool_size <= 0:
+            return
+        pool = self._live_pool(key)
+        if len(pool) >= self.pool_size:
+            return
+        if any(entry[1] == questions for entry in pool):
+            # Coalesced generations hand the same set to every caller
+            return
+        pool.append((time.monotonic(), list(questions)))
+        self._pools[key] = pool
+        self._pools.move_to_end(key)
+        while len(self._pools) > self.max_keys:
+            self._pools.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_generate(self, key: str, generate: Callable[[], Awaitable[List[str]]]) -> List[str]:
+        """Serve a pooled set for ``key`` or generate (and pool) a new one."""
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        questions = await generate()
+        self.add(key, questions)
+        return list(questions)
+
+    def clear(self) -> None:
+        self._pools.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "keys": len(self._pools),
+            "question_sets": sum(len(pool) for pool in self._pools.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,256 @@
+"""
+Per-model rate limiting for OpenAI calls.
+
+During a hiring-event spike every interview hits the same few models at once,
+OpenAI answers with 429s, and the SDK's own quick retries only add to the
+burst. Each model gets token buckets for its requests and tokens per minute,
+shared by every call site. A call reserves its share up front and waits its
+turn, so bursts are smoothed into the budget instead of failing; a call that
+would have to wait longer than ``max_wait_seconds`` is refused at once with
+``RateLimitExceeded`` so the client can come back later (HTTP 429).
+
+When OpenAI still answers 429 the model is paused for its ``Retry-After``
+(plus jittered exponential backoff) and the call is retried. Limits of 0 mean
+unlimited; 429 handling applies either way.
+"""
+
+import asyncio
+import email.utils
+import random
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+from langchain_core.runnables import Runnable
+
+T = TypeVar("T")
+
+# Statuses worth retrying, as the OpenAI SDK itself does
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RateLimitExceeded(Exception):
+    """A call could not be admitted within the allowed wait."""
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"Rate limit for {model} reached; retry in {retry_after:.0f}s.")
+        self.model = model
+        self.retry_after = retry_after
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay the server asked for in a 429/503, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time()) if retry_at else None
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUSES
+    return isinstance(error, openai.APIConnectionError)
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units a minute, holding at most a minute's worth.
+
+    Callers reserve capacity even when the bucket is empty and wait until
+    their debt is repaid, so they are admitted in arrival order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take ``amount`` and return the seconds until it is actually available."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float) -> None:
+        self.level += min(amount, self.capacity)
+
+
+class ModelLimiter:
+    """Admission control and 429 retries for one model."""
+
+    def __init__(self, model: str, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_wait_seconds: float = 30.0, max_retries: int = 3, backoff_seconds: float = 1.0,
+                 max_backoff_seconds: float = 20.0):
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_wait_seconds = max_wait_seconds
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.paused_until = 0.0  # set from Retry-After, holds back every caller
+        self.queued = 0
+        self.max_queued = 0
+        self.admitted = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.retries = 0
+        self.upstream_429s = 0
+        self.wait_seconds = 0.0
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait for a slot for one request of ``tokens`` tokens.
+
+        Raises RateLimitExceeded instead of waiting longer than allowed.
+        """
+        now = time.monotonic()
+        delay = max(0.0, self.paused_until - now)
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1, now))
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.reserve(tokens, now))
+        if delay > self.max_wait_seconds:
+            if self.requests is not None:
+                self.requests.refund(1)
+            if self.tokens is not None and tokens:
+                self.tokens.refund(tokens)
+            self.rejected += 1
+            raise RateLimitExceeded(self.model, delay)
+        self.admitted += 1
+        if delay <= 0:
+            return
+        self.throttled += 1
+        self.wait_seconds += delay
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.queued -= 1
+
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        """Delay before retrying ``error``; raises once retries are used up."""
+        retry_after = retry_after_seconds(error)
+        limited = getattr(error, "status_code", None) == 429
+        if limited:
+            self.upstream_429s += 1
+        if attempt >= self.max_retries:
+            if limited:
+                self.rejected += 1
+                raise RateLimitExceeded(self.model, retry_after or self.backoff_seconds) from error
+            raise error
+        # Full jitter, but never sooner than the server asked for
+        backoff = random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt))
+        delay = max(retry_after or 0.0, backoff)
+        self.retries += 1
+        if limited:
+            # Everyone backs off, and acquire() waits out the pause
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            return 0.0
+        return delay
+
+    async def call(self, request: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """Run ``request()`` within the limits, retrying throttled and transient failures."""
+        attempt = 0
+        while True:
+            await self.acquire(tokens)
+            try:
+                return await request()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                delay = self._backoff(e, attempt)
+            attempt += 1
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def stream(self, request: Callable[[], AsyncIterator[T]], tokens: int = 0) -> AsyncIterator[T]:
+        """Like ``call`` for a streamed response; retried only before its first chunk."""
+        attempt = 0
+        while True:
+            await self.acquire(tokens)
+            started = False
+            try:
+                async for chunk in request():
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not is_retryable(e):
+                    raise
+                delay = self._backoff(e, attempt)
+            attempt += 1
+            if delay:
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queued,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "retries": self.retries,
+            "upstream_429s": self.upstream_429s,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+
+class RateLimiter:
+    """Limiters by model name; models without configured limits get 429 handling only."""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None, **defaults):
+        self.limits = limits or {}
+        self.defaults = defaults
+        self._models: Dict[str, ModelLimiter] = {}
+
+    def for_model(self, model: str) -> ModelLimiter:
+        limiter = self._models.get(model)
+        if limiter is None:
+            limiter = self._models[model] = ModelLimiter(model, **{**self.defaults, **self.limits.get(model, {})})
+        return limiter
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {model: limiter.stats() for model, limiter in self._models.items()}
+
+
+class RateLimitedRunnable(Runnable):
+    """Runs a chat model through a ModelLimiter, budgeting the prompt plus ``completion_tokens``."""
+
+    def __init__(self, limiter: ModelLimiter, model: Runnable, completion_tokens: int = 500):
+        self.limiter = limiter
+        self.model = model
+        self.completion_tokens = completion_tokens
+
+    def _tokens(self, input) -> int:
+        text = input.to_string() if hasattr(input, "to_string") else str(input)
+        return estimate_tokens(text) + self.completion_tokens
+
+    def invoke(self, input, config=None, **kwargs):
+        # The server only makes async calls; sync use bypasses the limiter
+        return self.model.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return await self.limiter.call(lambda: self.model.ainvoke(input, config, **kwargs), self._tokens(input))
+
+    async def astream(self, input, config=None, **kwargs):
+        async for chunk in self.limiter.stream(lambda: self.model.astream(input, config, **kwargs),
+                                               self._tokens(input)):
+            yield chunk
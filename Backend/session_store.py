@@ -0,0 +1,869 @@
+"""
+Session stores (LangGraph checkpointers) for interview sessions.
+
+``SESSION_STORE=memory`` keeps sessions in process memory, bounded by a live
+session count / byte budget and an idle TTL, with completed sessions moved to
+a compressed on-disk archive. ``SESSION_STORE=sqlite`` persists them in a
+SQLite database in WAL mode so sessions survive restarts and can be shared by
+several uvicorn workers on the same host.
+"""
+
+import asyncio
+import hashlib
+import os
+import pickle
+import queue
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+# Primary keys lead with thread_id and the tables are WITHOUT ROWID, so rows
+# are clustered by thread and every session lookup is an index range scan.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+Statement = Tuple[str, Sequence[Sequence[Any]]]
+
+# Checkpoint compaction: "off" keeps the full history of every session,
+# "inline" prunes a session's old checkpoints whenever a new one is written and
+# "periodic" leaves pruning to compact(), called by the maintenance task.
+COMPACTION_MODES = ("off", "inline", "periodic")
+
+# Archived sessions of BoundedMemorySaver: finished interviews, and unfinished ones evicted for budget
+ARCHIVE_SUFFIX = ".ckpt.z"
+OPEN_ARCHIVE_SUFFIX = ".open.ckpt.z"
+
+
+def _check_compaction(compaction: str, history: int) -> None:
+    if compaction not in COMPACTION_MODES:
+        raise ValueError(f"Unknown compaction mode '{compaction}'. Expected one of {', '.join(COMPACTION_MODES)}.")
+    if history < 0:
+        raise ValueError("Checkpoint history must not be negative.")
+
+
+def _connect(path: str, busy_timeout_ms: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=busy_timeout_ms / 1000, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+    return conn
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpointer backed by SQLite in WAL mode.
+
+    Reads use a small pool of connections. Writes from all threads are queued
+    to a single writer thread that commits everything pending in one
+    transaction (group commit), so a burst of checkpoint writes costs one
+    fsync instead of one per write. Cross-process writers are serialized by
+    SQLite's own locking with a busy timeout.
+
+    With compaction enabled only the latest checkpoint of a session, plus
+    ``history`` older ones, is kept (see COMPACTION_MODES).
+    """
+
+    def __init__(self, path: str, *, pool_size: int = 4, busy_timeout_ms: int = 5000,
+                 compaction: str = "off", history: int = 0, serde=None):
+        super().__init__(serde=serde)
+        _check_compaction(compaction, history)
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.compaction = compaction
+        self.history = history
+        self._dirty: set = set()
+        setup = _connect(path, busy_timeout_ms)
+        setup.executescript(SCHEMA)
+        setup.close()
+
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(_connect(path, busy_timeout_ms))
+
+        self._pending: "queue.Queue[Optional[Tuple[List[Statement], Future]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-checkpoint-writer", daemon=True)
+        self._writer.start()
+        self.batches = 0
+        self.batched_writes = 0
+        self.stored_sessions: Optional[int] = None
+
+    # ---------------------------
+    # Connections and writes
+    # ---------------------------
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _write_loop(self) -> None:
+        conn = _connect(self.path, self.busy_timeout_ms)
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            batch = [item]
+            while True:
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)
+                    break
+                batch.append(item)
+            try:
+                self._commit(conn, [statements for statements, _ in batch])
+            except Exception:
+                # Retry one by one so a single bad write doesn't fail the whole batch
+                for statements, future in batch:
+                    try:
+                        self._commit(conn, [statements])
+                    except Exception as e:
+                        future.set_exception(e)
+                    else:
+                        future.set_result(None)
+                continue
+            self.batches += 1
+            self.batched_writes += len(batch)
+            for _, future in batch:
+                future.set_result(None)
+        conn.close()
+
+    @staticmethod
+    def _commit(conn: sqlite3.Connection, groups: List[List[Statement]]) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statements in groups:
+                for sql, rows in statements:
+                    conn.executemany(sql, rows)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _submit(self, statements: List[Statement]) -> Future:
+        future: Future = Future()
+        self._pending.put((statements, future))
+        return future
+
+    def _execute(self, statements: List[Statement]) -> None:
+        self._submit(statements).result()
+
+    async def _aexecute(self, statements: List[Statement]) -> None:
+        await asyncio.wrap_future(self._submit(statements))
+
+    def count_sessions(self) -> int:
+        """Count every session in the database, finished or not, for stats().
+
+        This scans the checkpoints table, so it is run periodically off the
+        event loop rather than on every stats() call.
+        """
+        with self._connection() as conn:
+            self.stored_sessions = conn.execute("SELECT COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()[0]
+        return self.stored_sessions
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "stored_sessions": self.stored_sessions,
+            "write_batches": self.batches,
+            "batched_writes": self.batched_writes,
+            "compaction": self.compaction,
+        }
+
+    def close(self) -> None:
+        self._pending.put(None)
+        self._writer.join()
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    # ---------------------------
+    # Reads
+    # ---------------------------
+    def _load_writes(self, conn, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        rows = conn.execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        rows.sort(key=lambda r: writes_sort_key(r[5], r[0], r[1]))
+        return [(task_id, channel, self.serde.loads_typed((type_, value))) for task_id, _, channel, type_, value, _ in rows]
+
+    def _to_tuple(self, conn, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": parent_id,
+                }}
+                if parent_id else None
+            ),
+            pending_writes=self._load_writes(conn, thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    _COLUMNS = "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._connection() as conn:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = conn.execute(
+                    f"SELECT {self._COLUMNS} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    f"SELECT {self._COLUMNS} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._to_tuple(conn, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT {self._COLUMNS} FROM checkpoints {where} ORDER BY checkpoint_id DESC", params
+            ).fetchall()
+            for row in rows:
+                if limit is not None and limit <= 0:
+                    break
+                checkpoint_tuple = self._to_tuple(conn, row)
+                if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                if limit is not None:
+                    limit -= 1
+                yield checkpoint_tuple
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+    def _put_statements(self, config, checkpoint, metadata) -> Tuple[List[Statement], RunnableConfig]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        statement = (
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+              type_, blob, metadata_type, metadata_blob)],
+        )
+        next_config = {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+        }}
+        statements = [statement]
+        if self.compaction == "inline":
+            statements += self._compact_statements([thread_id])
+        elif self.compaction == "periodic":
+            self._dirty.add(thread_id)
+        return statements, next_config
+
+    def _compact_statements(self, thread_ids: Sequence[str]) -> List[Statement]:
+        """Delete all but the newest ``history + 1`` checkpoints and their writes."""
+        return [
+            ("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id NOT IN ("
+             "SELECT kept.checkpoint_id FROM checkpoints AS kept WHERE kept.thread_id = checkpoints.thread_id "
+             "AND kept.checkpoint_ns = checkpoints.checkpoint_ns ORDER BY kept.checkpoint_id DESC LIMIT ?)",
+             [(thread_id, self.history + 1) for thread_id in thread_ids]),
+            ("DELETE FROM writes WHERE thread_id = ? AND NOT EXISTS ("
+             "SELECT 1 FROM checkpoints AS c WHERE c.thread_id = writes.thread_id "
+             "AND c.checkpoint_ns = writes.checkpoint_ns AND c.checkpoint_id = writes.checkpoint_id)",
+             [(thread_id,) for thread_id in thread_ids]),
+        ]
+
+    def _take_dirty(self) -> List[str]:
+        dirty, self._dirty = self._dirty, set()
+        return sorted(dirty)
+
+    def compact(self) -> None:
+        """Prune sessions written since the last compaction (periodic mode)."""
+        dirty = self._take_dirty()
+        if dirty:
+            self._execute(self._compact_statements(dirty))
+
+    async def acompact(self) -> None:
+        dirty = self._take_dirty()
+        if dirty:
+            await self._aexecute(self._compact_statements(dirty))
+
+    def _writes_statements(self, config, writes, task_id, task_path) -> List[Statement]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes (errors, interrupts) replace earlier ones; regular writes are idempotent
+        verb = "INSERT OR REPLACE" if all(c in WRITES_IDX_MAP for c, _ in writes) else "INSERT OR IGNORE"
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id,
+                         WRITES_IDX_MAP.get(channel, idx), channel, type_, blob, task_path))
+        return [(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)]
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        statements, next_config = self._put_statements(config, checkpoint, metadata)
+        self._execute(statements)
+        return next_config
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        self._execute(self._writes_statements(config, writes, task_id, task_path))
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._execute([
+            ("DELETE FROM checkpoints WHERE thread_id = ?", [(thread_id,)]),
+            ("DELETE FROM writes WHERE thread_id = ?", [(thread_id,)]),
+        ])
+
+    # ---------------------------
+    # Async API
+    # ---------------------------
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter=None, before=None,
+                    limit=None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        statements, next_config = self._put_statements(config, checkpoint, metadata)
+        await self._aexecute(statements)
+        return next_config
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await self._aexecute(self._writes_statements(config, writes, task_id, task_path))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self._aexecute([
+            ("DELETE FROM checkpoints WHERE thread_id = ?", [(thread_id,)]),
+            ("DELETE FROM writes WHERE thread_id = ?", [(thread_id,)]),
+        ])
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+class BoundedMemorySaver(MemorySaver):
+    """In-memory checkpointer with bounded size, idle expiry and cold archival.
+
+    - At most ``max_sessions`` live sessions and ``max_bytes`` of serialized
+      checkpoint data (0 disables either limit). Over budget, the least
+      recently used session is evicted, completed sessions first.
+    - Sessions idle for ``idle_ttl_seconds`` are dropped (abandoned interviews).
+    - Completed sessions (``interview_complete=True``) idle for
+      ``completed_idle_seconds`` are moved to a compressed file in
+      ``archive_dir``, as are sessions evicted for budget. Archived sessions
+      are loaded back transparently the next time they are read.
+    - Archive files keep the session's last access time: unfinished ones are
+      deleted once idle for ``idle_ttl_seconds`` like live sessions, and any
+      archive older than ``archive_ttl_seconds`` is deleted (0 keeps them).
+
+    - With compaction enabled only the latest checkpoint of a session, plus
+      ``history`` older ones, is kept (see COMPACTION_MODES).
+
+    ``sweep()`` and ``compact()`` are meant to be called periodically. The
+    async API (and ``asweep()``) reads and writes archive files in a worker
+    thread; an evicted session waits in memory until its file is written, so
+    it can always be found.
+    """
+
+    def __init__(self, *, max_sessions: int = 0, max_bytes: int = 0, idle_ttl_seconds: float = 0,
+                 completed_idle_seconds: float = 300, archive_dir: Optional[str] = None,
+                 archive_ttl_seconds: float = 0, compaction: str = "off", history: int = 0, serde=None):
+        super().__init__(serde=serde)
+        _check_compaction(compaction, history)
+        self.compaction = compaction
+        self.history = history
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.completed_idle_seconds = completed_idle_seconds
+        self.archive_dir = archive_dir
+        self.archive_ttl_seconds = archive_ttl_seconds
+
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._blob_keys: Dict[str, set] = {}
+        self._write_keys: Dict[str, set] = {}
+        self._completed: set = set()
+        self._dirty: set = set()
+        # Evicted sessions whose archive file is not written yet: thread_id -> (record, last access)
+        self._pending_archives: Dict[str, Tuple[dict, float]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.compacted_checkpoints = 0
+        self.evicted_idle = 0
+        self.evicted_budget = 0
+        self.archived = 0
+        self.restored = 0
+        self.expired_archives = 0
+
+    # ---------------------------
+    # Bookkeeping
+    # ---------------------------
+    def _touch(self, thread_id: str) -> None:
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _is_live(self, thread_id: str) -> bool:
+        return bool(self.storage.get(thread_id))
+
+    def _forget(self, thread_id: str) -> None:
+        self.storage.pop(thread_id, None)
+        for key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(key, None)
+        for key in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        self._last_access.pop(thread_id, None)
+        self._sizes.pop(thread_id, None)
+        self._completed.discard(thread_id)
+        self._dirty.discard(thread_id)
+
+    def _archive_path(self, thread_id: str, completed: bool = True) -> str:
+        # Thread ids come from URLs, so never use them as file names directly
+        name = hashlib.sha256(thread_id.encode("utf-8")).hexdigest()
+        # Unfinished sessions are told apart by name, so pruning needn't open files
+        suffix = ARCHIVE_SUFFIX if completed else OPEN_ARCHIVE_SUFFIX
+        return os.path.join(self.archive_dir, f"{name}{suffix}")
+
+    def _archive_record(self, thread_id: str) -> dict:
+        return {
+            "storage": {ns: dict(checkpoints) for ns, checkpoints in self.storage[thread_id].items()},
+            "writes": {key: dict(self.writes[key]) for key in self._write_keys.get(thread_id, ()) if key in self.writes},
+            "blobs": {key: self.blobs[key] for key in self._blob_keys.get(thread_id, ()) if key in self.blobs},
+            "completed": thread_id in self._completed,
+        }
+
+    def _write_archive(self, thread_id: str, record: dict, last_access: float) -> None:
+        path = self._archive_path(thread_id, record["completed"])
+        # Created with the first archive, so a store that never archives leaves no directory
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(zlib.compress(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)))
+        # The file's mtime is the session's last access, which archive expiry goes by
+        os.utime(f"{path}.tmp", (last_access, last_access))
+        os.replace(f"{path}.tmp", path)
+        try:
+            # An older archive of the session from before it finished (or the reverse)
+            os.remove(self._archive_path(thread_id, not record["completed"]))
+        except FileNotFoundError:
+            pass
+
+    def _flush_archives(self) -> None:
+        """Write the archive files of evicted sessions (blocking; run off the event loop)."""
+        with self._flush_lock:
+            while True:
+                with self._pending_lock:
+                    if not self._pending_archives:
+                        return
+                    thread_id, (record, last_access) = next(iter(self._pending_archives.items()))
+                self._write_archive(thread_id, record, last_access)
+                with self._pending_lock:
+                    if self._pending_archives.get(thread_id, (None,))[0] is record:
+                        del self._pending_archives[thread_id]
+                        self.archived += 1
+                        continue
+                # Restored while it was being written: the file is stale
+                if thread_id not in self._pending_archives:
+                    self._remove_archives(thread_id)
+
+    def _remove_archives(self, thread_id: str) -> None:
+        for path in (self._archive_path(thread_id), self._archive_path(thread_id, False)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _read_archive(self, thread_id: str) -> Optional[Tuple[str, dict]]:
+        """The archive file of ``thread_id`` and its record, if there is one (blocking)."""
+        for path in (self._archive_path(thread_id), self._archive_path(thread_id, False)):
+            try:
+                with open(path, "rb") as f:
+                    return path, pickle.loads(zlib.decompress(f.read()))
+            except FileNotFoundError:
+                continue
+        return None
+
+    def _take_pending(self, thread_id: str) -> Optional[dict]:
+        with self._pending_lock:
+            pending = self._pending_archives.pop(thread_id, None)
+        return pending[0] if pending else None
+
+    def _load(self, thread_id: str, record: dict, path: Optional[str] = None) -> None:
+        """Put an archived session back in memory, deleting its file if it came from one."""
+        for ns, checkpoints in record["storage"].items():
+            self.storage[thread_id][ns].update(checkpoints)
+        for key, writes in record["writes"].items():
+            self.writes[key] = writes
+        self.blobs.update(record["blobs"])
+        self._write_keys[thread_id] = set(record["writes"])
+        self._blob_keys[thread_id] = set(record["blobs"])
+        self._sizes[thread_id] = self._measure(thread_id)
+        if record["completed"]:
+            self._completed.add(thread_id)
+        if path is not None:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.restored += 1
+        self._touch(thread_id)
+
+    def _restore(self, thread_id: str) -> None:
+        """Load an archived session back into memory if it is not live."""
+        if not self.archive_dir or self._is_live(thread_id):
+            return
+        record = self._take_pending(thread_id)
+        if record is not None:
+            self._load(thread_id, record)
+            return
+        found = self._read_archive(thread_id)
+        if found is not None:
+            self._load(thread_id, found[1], found[0])
+
+    async def _arestore(self, thread_id: str) -> None:
+        """``_restore`` with the file read in a worker thread."""
+        if not self.archive_dir or self._is_live(thread_id):
+            return
+        record = self._take_pending(thread_id)
+        if record is not None:
+            self._load(thread_id, record)
+            return
+        found = await asyncio.to_thread(self._read_archive, thread_id)
+        if self._is_live(thread_id):
+            return  # restored by another request meanwhile
+        record = self._take_pending(thread_id)
+        if record is not None:
+            # Restored and evicted again meanwhile: the file read is older
+            self._load(thread_id, record)
+        elif found is not None:
+            self._load(thread_id, found[1], found[0])
+
+    def _measure(self, thread_id: str) -> int:
+        size = 0
+        for checkpoints in self.storage.get(thread_id, {}).values():
+            for checkpoint, metadata, _ in checkpoints.values():
+                size += len(checkpoint[1]) + len(metadata[1])
+        for key in self._blob_keys.get(thread_id, ()):
+            size += len(self.blobs[key][1]) if key in self.blobs else 0
+        for key in self._write_keys.get(thread_id, ()):
+            size += sum(len(w[2][1]) for w in self.writes.get(key, {}).values())
+        return size
+
+    def _compact_thread(self, thread_id: str) -> None:
+        self._dirty.discard(thread_id)
+        namespaces = self.storage.get(thread_id, {})
+        removed = 0
+        for checkpoint_ns, checkpoints in namespaces.items():
+            for checkpoint_id in sorted(checkpoints, reverse=True)[self.history + 1:]:
+                del checkpoints[checkpoint_id]
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                self._write_keys.get(thread_id, set()).discard((thread_id, checkpoint_ns, checkpoint_id))
+                removed += 1
+        if not removed:
+            return
+
+        # Keep only the channel values some remaining checkpoint still points to
+        referenced = set()
+        for checkpoint_ns, checkpoints in namespaces.items():
+            for checkpoint, _, _ in checkpoints.values():
+                versions = self.serde.loads_typed(checkpoint)["channel_versions"]
+                referenced.update((thread_id, checkpoint_ns, channel, version) for channel, version in versions.items())
+        blob_keys = self._blob_keys.get(thread_id, set())
+        for key in blob_keys - referenced:
+            self.blobs.pop(key, None)
+        blob_keys &= referenced
+        self._sizes[thread_id] = self._measure(thread_id)
+        self.compacted_checkpoints += removed
+
+    def compact(self) -> None:
+        """Prune sessions written since the last compaction (periodic mode)."""
+        for thread_id in list(self._dirty):
+            self._compact_thread(thread_id)
+
+    async def acompact(self) -> None:
+        self.compact()
+
+    def _evict(self, thread_id: str, archive: bool) -> None:
+        """Drop a session from memory, queueing it for archival; see ``_flush_archives``."""
+        if archive and self.archive_dir and self._is_live(thread_id):
+            if self.compaction != "off":
+                self._compact_thread(thread_id)
+            idle = time.monotonic() - self._last_access.get(thread_id, time.monotonic())
+            with self._pending_lock:
+                self._pending_archives[thread_id] = (self._archive_record(thread_id), time.time() - idle)
+        self._forget(thread_id)
+
+    def _enforce_budget(self, keep: str) -> None:
+        def over_budget() -> bool:
+            return ((self.max_sessions and len(self._last_access) > self.max_sessions)
+                    or (self.max_bytes and sum(self._sizes.values()) > self.max_bytes))
+
+        while over_budget():
+            candidates = [t for t in self._last_access if t != keep]
+            if not candidates:
+                break
+            completed = [t for t in candidates if t in self._completed]
+            self._evict((completed or candidates)[0], archive=True)
+            self.evicted_budget += 1
+
+    def sweep(self) -> None:
+        """Drop abandoned sessions and archive idle completed ones."""
+        self._sweep_memory()
+        self._sweep_disk()
+
+    async def asweep(self) -> None:
+        """``sweep`` with the archive files written and pruned in a worker thread."""
+        self._sweep_memory()
+        await asyncio.to_thread(self._sweep_disk)
+
+    def _sweep_disk(self) -> None:
+        self._flush_archives()
+        if self.archive_dir:
+            self._expire_archives()
+
+    def _sweep_memory(self) -> None:
+        now = time.monotonic()
+        for thread_id, last_access in list(self._last_access.items()):
+            idle = now - last_access
+            if thread_id in self._completed and self.archive_dir and idle >= self.completed_idle_seconds:
+                self._evict(thread_id, archive=True)
+            elif self.idle_ttl_seconds and idle >= self.idle_ttl_seconds:
+                self._evict(thread_id, archive=thread_id in self._completed)
+                self.evicted_idle += 1
+
+    def _expire_archives(self) -> None:
+        """Delete archived sessions past their idle TTL (unfinished) or the archive TTL."""
+        now = time.time()
+        if not os.path.isdir(self.archive_dir):
+            return
+        with os.scandir(self.archive_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(ARCHIVE_SUFFIX):
+                    continue
+                try:
+                    age = now - entry.stat().st_mtime
+                    if entry.name.endswith(OPEN_ARCHIVE_SUFFIX) and self.idle_ttl_seconds and age >= self.idle_ttl_seconds:
+                        os.remove(entry.path)
+                        self.evicted_idle += 1
+                        self.expired_archives += 1
+                    elif self.archive_ttl_seconds and age >= self.archive_ttl_seconds:
+                        os.remove(entry.path)
+                        self.expired_archives += 1
+                except FileNotFoundError:
+                    # Restored by a read while we were looking
+                    continue
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "live_sessions": len(self._last_access),
+            "live_bytes": sum(self._sizes.values()),
+            "completed_sessions": len(self._completed),
+            "evicted_idle": self.evicted_idle,
+            "evicted_budget": self.evicted_budget,
+            "archived": self.archived,
+            "restored": self.restored,
+            "expired_archives": self.expired_archives,
+            "compaction": self.compaction,
+            "compacted_checkpoints": self.compacted_checkpoints,
+        }
+
+    # ---------------------------
+    # Checkpointer API
+    # ---------------------------
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        self._restore(config["configurable"]["thread_id"])
+        return self._get_live_tuple(config)
+
+    def _get_live_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        result = super().get_tuple(config)
+        if result is not None:
+            self._touch(thread_id)
+        elif not self._is_live(thread_id):
+            # MemorySaver's defaultdict creates empty entries for unknown threads
+            self.storage.pop(thread_id, None)
+        return result
+
+    def list(self, config: Optional[RunnableConfig], **kwargs) -> Iterator[CheckpointTuple]:
+        if config:
+            self._restore(config["configurable"]["thread_id"])
+        return super().list(config, **kwargs)
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        self._restore(config["configurable"]["thread_id"])
+        next_config = self._put_live(config, checkpoint, metadata, new_versions)
+        self._flush_archives()
+        return next_config
+
+    def _put_live(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                  new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+
+        self._blob_keys.setdefault(thread_id, set()).update(
+            (thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items()
+        )
+        stored_checkpoint, stored_metadata, _ = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+        self._sizes[thread_id] = self._sizes.get(thread_id, 0) + len(stored_checkpoint[1]) + len(stored_metadata[1]) + sum(
+            len(self.blobs[(thread_id, checkpoint_ns, channel, version)][1]) for channel, version in new_versions.items()
+        )
+        complete = checkpoint["channel_values"].get("interview_complete")
+        if complete is True:
+            self._completed.add(thread_id)
+        elif complete is False:
+            self._completed.discard(thread_id)
+        if self.compaction == "inline":
+            self._compact_thread(thread_id)
+        elif self.compaction == "periodic":
+            self._dirty.add(thread_id)
+        self._touch(thread_id)
+        self._enforce_budget(keep=thread_id)
+        return next_config
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        key = (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+        before = sum(len(w[2][1]) for w in self.writes.get(key, {}).values())
+        super().put_writes(config, writes, task_id, task_path)
+        after = sum(len(w[2][1]) for w in self.writes.get(key, {}).values())
+        self._write_keys.setdefault(thread_id, set()).add(key)
+        self._sizes[thread_id] = self._sizes.get(thread_id, 0) + after - before
+        self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._forget(thread_id)
+        self._take_pending(thread_id)
+        if self.archive_dir:
+            self._remove_archives(thread_id)
+
+    # Archive files are read and written in a worker thread; the in-memory
+    # bookkeeping stays on the event loop.
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        await self._arestore(config["configurable"]["thread_id"])
+        return self._get_live_tuple(config)
+
+    async def alist(self, config: Optional[RunnableConfig], **kwargs) -> AsyncIterator[CheckpointTuple]:
+        if config:
+            await self._arestore(config["configurable"]["thread_id"])
+        for item in super().list(config, **kwargs):
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        await self._arestore(config["configurable"]["thread_id"])
+        next_config = self._put_live(config, checkpoint, metadata, new_versions)
+        if self._pending_archives:
+            await asyncio.to_thread(self._flush_archives)
+        return next_config
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self._forget(thread_id)
+        self._take_pending(thread_id)
+        if self.archive_dir:
+            await asyncio.to_thread(self._remove_archives, thread_id)
+
+
+def create_checkpointer(store: str, *, sqlite_path: str = "sessions.db", pool_size: int = 4,
+                        compaction: str = "off", history: int = 0, **memory_limits) -> BaseCheckpointSaver:
+    """Build the session store selected by the SESSION_STORE setting.
+
+    ``memory_limits`` are passed to BoundedMemorySaver for the memory store.
+    """
+    if store == "memory":
+        return BoundedMemorySaver(compaction=compaction, history=history, **memory_limits)
+    if store == "sqlite":
+        return SqliteCheckpointSaver(sqlite_path, pool_size=pool_size, compaction=compaction, history=history)
+    raise ValueError(f"Unknown SESSION_STORE '{store}'. Expected 'memory' or 'sqlite'.")
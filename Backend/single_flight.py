@@ -0,0 +1,156 @@
+"""
+Coalescing of identical concurrent calls.
+
+When a cohort starts an assessment in the same minute, dozens of requests ask
+the LLM for exactly the same thing at once. A ``SingleFlight`` runs the first
+of them and hands its result (or exception) to every caller that arrives with
+the same key while it is still running, so upstream load follows the amount
+of distinct work rather than the number of requests. Nothing is kept once the
+call finishes; caching is left to the caches.
+
+Streamed results are shared through a ``SharedStream``: one producer, and
+any number of readers that each get every chunk from the beginning, with
+only the chunks not yet relayed to every reader held in memory.
+"""
+
+import asyncio
+import itertools
+from collections import deque
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Deque, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Read size when replaying dropped chunks from a file
+REPLAY_CHUNK_SIZE = 16 * 1024
+
+
+class SingleFlight:
+    """At most one in-flight call per key; concurrent callers share it."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Return the result of ``call()``, or of the identical call already running.
+
+        The shared call runs as its own task, so a caller that is cancelled
+        doesn't cancel it for the others.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even when every caller went away
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
+
+
+class SharedStream:
+    """Chunks from one producer, relayed to every reader from the start.
+
+    Only the chunks some registered reader hasn't consumed yet are held in
+    memory, so memory follows how far the slowest reader lags rather than
+    the length of the stream. A reader joining after earlier chunks were
+    dropped replays them from ``replay``, a callable the producer sets that
+    opens a file holding at least every byte produced so far (or returns
+    None when it can't). A reader re-raises the producer's error after the
+    chunks that came before it.
+    """
+
+    def __init__(self):
+        self.replay: Optional[Callable[[], Optional[BinaryIO]]] = None
+        self.count = 0  # chunks produced
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self._buffer: Deque[bytes] = deque()
+        self._base = 0  # index of the first buffered chunk
+        self._dropped_bytes = 0  # size of the chunks before it
+        self._readers: Dict[object, int] = {}  # reader -> index of its next chunk
+        self._changed = asyncio.Condition()
+
+    @property
+    def buffered_bytes(self) -> int:
+        return sum(len(chunk) for chunk in self._buffer)
+
+    def _trim(self) -> None:
+        """Drop the chunks every reader has consumed."""
+        low = min(self._readers.values(), default=self.count)
+        while self._base < low:
+            self._dropped_bytes += len(self._buffer.popleft())
+            self._base += 1
+
+    async def add(self, chunk: bytes) -> None:
+        async with self._changed:
+            self._buffer.append(chunk)
+            self.count += 1
+            self._trim()
+            self._changed.notify_all()
+
+    async def finish(self, error: Optional[BaseException] = None) -> None:
+        async with self._changed:
+            self.finished = True
+            self.error = error
+            self._changed.notify_all()
+
+    def reader(self) -> Optional[AsyncIterator[bytes]]:
+        """Register a reader now and return its chunks from the start.
+
+        Returns None if earlier chunks were dropped and can't be replayed.
+        """
+        replay = None
+        if self._dropped_bytes:
+            replay = self.replay() if self.replay is not None else None
+            if replay is None:
+                return None
+        key = object()
+        self._readers[key] = self._base
+        return self._relay(key, replay, self._dropped_bytes)
+
+    async def _relay(self, key: object, replay: Optional[BinaryIO], replay_bytes: int) -> AsyncIterator[bytes]:
+        try:
+            if replay is not None:
+                with replay:
+                    while replay_bytes > 0:
+                        data = replay.read(min(replay_bytes, REPLAY_CHUNK_SIZE))
+                        if not data:
+                            raise EOFError("Replay file is shorter than the chunks it replaces.")
+                        replay_bytes -= len(data)
+                        yield data
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self._readers[key] < self.count or self.finished)
+                    position = self._readers[key]
+                    chunks = list(itertools.islice(self._buffer, position - self._base, None))
+                    self._readers[key] = position + len(chunks)
+                    finished = self.finished and self._readers[key] == self.count
+                    self._trim()
+                for chunk in chunks:
+                    yield chunk
+                if finished:
+                    if self.error is not None:
+                        raise self.error
+                    return
+        finally:
+            self._readers.pop(key, None)
+            self._trim()
@@ -4,16 +4,69 @@ Tests all endpoints, LangGraph workflow, and error handling
 """
 
 import pytest
+import atexit
 import json
 import uuid
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import os
-from main import app, compiled_graph
+import asyncio
+import time
+import httpx
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from langchain_core.runnables import RunnableGenerator, RunnableLambda
+
+# Files the server keeps on disk go to a scratch directory, not the working tree
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="intervue-tests-")
+atexit.register(shutil.rmtree, TEST_DATA_DIR, ignore_errors=True)
+os.environ.setdefault("TTS_CACHE_DIR", os.path.join(TEST_DATA_DIR, "tts_cache"))
+os.environ.setdefault("TRANSCRIPT_CACHE_PATH", os.path.join(TEST_DATA_DIR, "transcripts.db"))
+os.environ.setdefault("SESSION_ARCHIVE_DIR", os.path.join(TEST_DATA_DIR, "session_archive"))
+
+from main import app, compiled_graph, question_cache
 
 # Test client
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def reset_question_cache():
+    """Keep cached question sets from leaking between tests"""
+    question_cache.clear()
+    yield
+
+@pytest.fixture(autouse=True)
+def no_speech_prefetch():
+    """Only the prefetch tests synthesize audio in the background"""
+    with patch('main.TTS_PREFETCH', False):
+        yield
+
+QUESTIONS = ["What is React?", "Explain hooks", "What is JSX?", "How to handle state?", "What are props?"]
+
+EVALUATION = """USER_FEEDBACK: Good start, try to mention the virtual DOM.
+
+ADMIN_SCORE: 7
+ADMIN_TECHNICAL_ACCURACY: 7
+ADMIN_COMPLETENESS: 6
+ADMIN_CLARITY: 8
+ADMIN_FEEDBACK: Solid basics for 2 years of experience."""
+
+REPORT = """USER_REPORT: Well done, keep practicing state management.
+
+ADMIN_REPORT: Candidate is competent. Recommendation: Pass."""
+
+def fake_llm(responses, delay=0.0):
+    """Async fake model that returns canned responses in order, optionally after a delay."""
+    remaining = list(responses)
+
+    async def respond(_prompt):
+        if delay:
+            await asyncio.sleep(delay)
+        return remaining.pop(0)
+
+    return RunnableLambda(lambda _prompt: remaining.pop(0), afunc=respond)
+
 class TestAPIEndpoints:
     """Test all API endpoints"""
     
@@ -23,7 +76,7 @@ class TestAPIEndpoints:
         assert response.status_code == 200
         assert response.json() == {"message": "Hello from AI Interviewer Backend!"}
     
-    @patch('main.llm')
+    @patch('llm_setup.llm')
     def test_create_session_success(self, mock_llm):
         """Test successful session creation"""
         # Mock the LLM response for question generation
@@ -69,7 +122,7 @@ class TestAPIEndpoints:
         response = client.post("/sessions", json=payload)
         assert response.status_code == 422  # Validation error
     
-    @patch('main.llm')
+    @patch('llm_setup.llm')
     def test_get_session(self, mock_llm):
         """Test getting session state"""
         # First create a session
@@ -101,7 +154,7 @@ class TestAPIEndpoints:
         # This might return 200 with empty state or 404, depending on implementation
         assert response.status_code in [200, 404]
     
-    @patch('main.llm')
+    @patch('llm_setup.llm')
     def test_submit_answer(self, mock_llm):
         """Test submitting an answer"""
         # Mock LLM responses
@@ -129,7 +182,7 @@ class TestAPIEndpoints:
         assert "feedback" in data
         assert data["question_idx"] == 0
     
-    @patch('main.llm')
+    @patch('llm_setup.llm')
     def test_get_report(self, mock_llm):
         """Test getting final report"""
         # Mock LLM responses
@@ -197,7 +250,7 @@ class TestLangGraphWorkflow:
         assert state["current_question_idx"] == 0
         assert not state["interview_complete"]
     
-    @patch('main.llm')
+    @patch('llm_setup.llm')
     def test_generate_questions_node(self, mock_llm):
         """Test question generation node"""
         from main import generate_questions
@@ -246,7 +299,7 @@ class TestLangGraphWorkflow:
         result = ask_question(state)
         assert result["last_question"] == "Explain OOP"
     
-    @patch('main.llm')
+    @patch('llm_setup.llm')
     def test_evaluate_answer_node(self, mock_llm):
         """Test answer evaluation node"""
         from main import evaluate_answer
@@ -292,7 +345,7 @@ class TestErrorHandling:
     
     def test_invalid_json_in_questions(self):
         """Test handling of invalid JSON from LLM"""
-        with patch('main.llm') as mock_llm:
+        with patch('llm_setup.llm') as mock_llm:
             mock_llm.return_value = MagicMock()
             mock_llm.return_value.invoke.return_value = "Invalid JSON response"
             
@@ -307,7 +360,7 @@ class TestErrorHandling:
     
     def test_empty_answer_submission(self):
         """Test submitting empty answer"""
-        with patch('main.llm') as mock_llm:
+        with patch('llm_setup.llm') as mock_llm:
             mock_llm.return_value = MagicMock()
             mock_llm.return_value.invoke.return_value = json.dumps([
                 "What is React?", "Explain hooks", "What is JSX?", "How to handle state?", "What are props?"
@@ -350,7 +403,7 @@ class TestErrorHandling:
 class TestIntegration:
     """Integration tests for complete workflow"""
     
-    @patch('main.llm')
+    @patch('llm_setup.llm')
     def test_complete_interview_flow(self, mock_llm):
         """Test complete interview flow from start to finish"""
         # Mock all LLM responses
@@ -408,6 +461,1937 @@ class TestIntegration:
         assert "final_report" in report_data
         assert len(report_data["final_report"]) > 0
 
+def fake_streaming_llm(text, chunk_size=4):
+    """Async fake model that streams ``text`` in small chunks."""
+    async def stream(inputs):
+        async for _ in inputs:
+            pass
+        for i in range(0, len(text), chunk_size):
+            yield text[i:i + chunk_size]
+
+    return RunnableGenerator(stream)
+
+def parse_sse(body):
+    """Split a text/event-stream body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def create_session_with_questions(questions=QUESTIONS):
+    with patch('llm_setup.llm', fake_llm([json.dumps(questions)])):
+        response = client.post("/sessions", json={"job_role": "React Developer", "experience": 2})
+    assert response.status_code == 200
+    return response.json()["session_id"]
+
+class TestQuestionCache:
+    """Test the question-set cache in front of question generation"""
+
+    def test_role_keys_are_canonical(self):
+        from question_cache import role_key
+        assert role_key("  React   Developer ", 2) == role_key("react developer", 2)
+        # 3 and 4 years both fall in the "3-5" bucket
+        assert role_key("React Developer", 3) == role_key("React Developer", 4)
+        assert role_key("React Developer", 2) != role_key("React Developer", 3)
+
+    def test_skill_keys_are_sorted_and_dealiased(self):
+        from question_cache import skills_key
+        assert skills_key(["ReactJS", "node.js", "JS"], 2) == skills_key(["javascript", "nodejs", "react"], 2)
+        assert skills_key(["react", "react"], 12) == skills_key(["React"], 10)
+
+    def test_pool_fills_then_serves_hits(self):
+        from question_cache import QuestionSetCache
+        cache = QuestionSetCache(pool_size=2)
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            return [f"Set {len(calls)} question {i}" for i in range(5)]
+
+        async def run():
+            return [await cache.get_or_generate("role:x|exp:2", generate) for _ in range(6)]
+
+        results = asyncio.run(run())
+        assert len(calls) == 2
+        assert all(r in results[:2] for r in results[2:])
+        assert cache.stats()["hits"] == 4
+        assert cache.stats()["misses"] == 2
+
+    def test_ttl_and_lru_eviction(self):
+        from question_cache import QuestionSetCache
+        cache = QuestionSetCache(pool_size=1, max_keys=2, ttl_seconds=60)
+        cache.add("a", ["q"])
+        cache.add("b", ["q"])
+        cache.get("a")
+        cache.add("c", ["q"])
+        assert cache.get("b") is None
+        assert cache.get("a") == ["q"]
+        assert cache.stats()["evictions"] == 1
+
+        cache.ttl_seconds = -1
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] >= 1
+
+    def test_session_creation_uses_cache(self):
+        """Once the pool for a key is full, new sessions skip the LLM"""
+        with patch('main.question_cache.pool_size', 1), \
+             patch('llm_setup.llm', fake_llm([json.dumps(QUESTIONS)])):
+            first = client.post("/sessions", json={"job_role": "React Developer", "experience": 2})
+            second = client.post("/sessions", json={"job_role": "react developer ", "experience": 2})
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json()["questions"] == QUESTIONS
+        assert client.get("/stats").json()["question_cache"]["hits"] >= 1
+
+    def test_short_question_set_is_rejected_and_not_pooled(self):
+        """A reply with fewer than 5 questions fails session creation instead of a later answer"""
+        with patch('main.question_cache.pool_size', 1), \
+             patch('llm_setup.llm', fake_llm([json.dumps(QUESTIONS[:3]), "1. Only one\n2. \n"])):
+            short = client.post("/sessions", json={"job_role": "React Developer", "experience": 2})
+            numbered = client.post("/skill-sessions", json={"skills": ["react"], "experience": 2})
+
+        assert short.status_code == 500
+        assert numbered.status_code == 500
+        assert question_cache.stats()["question_sets"] == 0
+
+class TestQuestionBank:
+    """Test the memory-mapped question bank and its builder"""
+
+    def test_write_and_lookup_round_trip(self, tmp_path):
+        from question_bank import QuestionBank, write_bank
+        from question_cache import role_key, skills_key
+        path = str(tmp_path / "bank.qbk")
+        records = {role_key("React Developer", 2): [QUESTIONS], skills_key(["python"], 5): [QUESTIONS[::-1]]}
+        write_bank(path, records)
+
+        bank = QuestionBank(path)
+        assert len(bank) == 2
+        assert bank.get(role_key("react developer", 2)) == [QUESTIONS]
+        assert bank.sample(skills_key(["Python"], 6)) == QUESTIONS[::-1]
+        assert bank.sample(role_key("Go Developer", 2)) is None
+        assert bank.stats()["hits"] == 1
+        bank.close()
+
+    def test_rejects_foreign_files(self, tmp_path):
+        from question_bank import QuestionBank
+        path = tmp_path / "bank.qbk"
+        path.write_bytes(b"not a bank" * 4)
+        with pytest.raises(ValueError):
+            QuestionBank(str(path))
+
+    def test_build_bank_with_bounded_concurrency(self, tmp_path):
+        from question_bank import QuestionBank, build_bank
+        from question_cache import EXPERIENCE_BUCKETS, skills_key
+        path = str(tmp_path / "bank.qbk")
+        jobs = 2 * len(EXPERIENCE_BUCKETS) * 2
+        with patch('llm_setup.llm', fake_llm([json.dumps(QUESTIONS)] * jobs)):
+            summary = asyncio.run(build_bank(path, sets_per_key=2, concurrency=3,
+                                             roles=["React Developer"], skills=["docker"]))
+
+        assert summary["keys"] == 2 * len(EXPERIENCE_BUCKETS)
+        assert summary["failures"] == 0
+        bank = QuestionBank(path)
+        assert len(bank.get(skills_key(["docker"], 7))) == 2
+        bank.close()
+
+    def test_build_bank_covers_skill_sets(self, tmp_path):
+        from question_bank import QuestionBank, build_bank
+        from question_cache import EXPERIENCE_BUCKETS, skills_key
+        path = str(tmp_path / "bank.qbk")
+        with patch('llm_setup.llm', fake_llm([json.dumps(QUESTIONS)] * len(EXPERIENCE_BUCKETS) * 2)):
+            summary = asyncio.run(build_bank(path, sets_per_key=1, concurrency=2, roles=[], skills=["docker"],
+                                             skill_sets=[["react", "nodejs"]]))
+
+        assert summary["keys"] == 2 * len(EXPERIENCE_BUCKETS)
+        bank = QuestionBank(path)
+        assert bank.get(skills_key(["nodejs", "react"], 2)) == [QUESTIONS]
+        bank.close()
+
+    def test_offline_tools_do_not_import_the_server(self):
+        import subprocess
+        import sys
+        code = "import sys, bulk_score, question_bank; assert 'main' not in sys.modules"
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                env={**os.environ, "OPENAI_API_KEY": "sk-test"}, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+    def test_session_creation_serves_from_bank(self, tmp_path):
+        from question_bank import QuestionBank, write_bank
+        from question_cache import role_key
+        path = str(tmp_path / "bank.qbk")
+        write_bank(path, {role_key("React Developer", 2): [QUESTIONS]})
+        bank = QuestionBank(path)
+
+        with patch('main.question_bank', bank), patch('llm_setup.llm', fake_llm([])):
+            response = client.post("/sessions", json={"job_role": "React Developer", "experience": 2})
+
+        assert response.status_code == 200
+        assert response.json()["questions"] == QUESTIONS
+        bank.close()
+
+class TestAnswerStreaming:
+    """Test Server-Sent Events streaming of answer evaluations"""
+
+    def test_stream_parser_emits_only_user_feedback(self):
+        from main import EvaluationStreamParser
+        stream_parser = EvaluationStreamParser()
+        deltas = [stream_parser.feed(ch) for ch in EVALUATION]
+        streamed = "".join(deltas)
+
+        assert streamed == "Good start, try to mention the virtual DOM."
+        # Feedback is released before the completion has finished
+        assert deltas.index("G") < len(EVALUATION) // 2
+        assert stream_parser.result()["admin_score"] == 7
+
+    def test_stream_parser_holds_back_possible_admin_prefix(self):
+        from main import EvaluationStreamParser
+        stream_parser = EvaluationStreamParser()
+        assert stream_parser.feed("USER_FEEDBACK: Nice.\nAD") == "Nice."
+        assert stream_parser.feed("VICE follows") == "\nADVICE follows"
+
+    def test_submit_answer_streams_feedback_then_result(self):
+        session_id = create_session_with_questions()
+        with patch('llm_setup.llm', fake_streaming_llm(EVALUATION)):
+            response = client.post(
+                f"/sessions/{session_id}/answers",
+                json={"answer": "React is a UI library"},
+                headers={"Accept": "text/event-stream"},
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        feedback = "".join(data["delta"] for event, data in events if event == "feedback")
+        kind, result = events[-1]
+
+        assert len([e for e in events if e[0] == "feedback"]) > 1
+        assert kind == "result"
+        assert feedback == result["user_feedback"]
+        assert result["admin_score"] == 7
+        assert result["next_question_idx"] == 1
+        assert result["next_question"] == QUESTIONS[1]
+
+        session = client.get(f"/sessions/{session_id}").json()
+        assert session["current_question_idx"] == 1
+        assert session["data"][0]["answer"] == "React is a UI library"
+
+    def test_streamed_multi_line_feedback_matches_result(self):
+        session_id = create_session_with_questions()
+        evaluation = EVALUATION.replace(
+            "virtual DOM.\n", "virtual DOM.\nThen cover reconciliation:\n  - keys\n  - batching\n")
+        with patch('llm_setup.llm', fake_streaming_llm(evaluation)):
+            response = client.post(
+                f"/sessions/{session_id}/answers",
+                json={"answer": "React is a UI library"},
+                headers={"Accept": "text/event-stream"},
+            )
+
+        events = parse_sse(response.text)
+        feedback = "".join(data["delta"] for event, data in events if event == "feedback")
+        kind, result = events[-1]
+        assert kind == "result"
+        assert feedback == result["user_feedback"]
+        assert result["user_feedback"].endswith("reconciliation:\n  - keys\n  - batching")
+
+    def test_stream_failure_leaves_session_unchanged(self):
+        session_id = create_session_with_questions()
+
+        async def broken(inputs):
+            async for _ in inputs:
+                pass
+            yield "USER_FEEDBACK: Partial"
+            raise RuntimeError("upstream dropped")
+
+        with patch('llm_setup.llm', RunnableGenerator(broken)):
+            response = client.post(
+                f"/sessions/{session_id}/answers",
+                json={"answer": "React is a UI library"},
+                headers={"Accept": "text/event-stream"},
+            )
+
+        events = parse_sse(response.text)
+        assert events[-1][0] == "error"
+        assert client.get(f"/sessions/{session_id}").json()["current_question_idx"] == 0
+
+def scripted_llm(report_delay=0.0, report_error=None, evaluation_delay=0.0):
+    """Fake model answering question, evaluation and report prompts by content."""
+    async def respond(prompt):
+        text = prompt.to_string()
+        if "Interview Results" in text:
+            await asyncio.sleep(report_delay)
+            if report_error:
+                raise report_error
+            return REPORT
+        if "evaluating a candidate's answer" in text:
+            await asyncio.sleep(evaluation_delay)
+            return EVALUATION
+        return json.dumps(QUESTIONS)
+
+    return RunnableLambda(lambda _prompt: None, afunc=respond)
+
+class TestBackgroundReport:
+    """Test that the final report is generated off the request path"""
+
+    def answer_all(self, c, session_id, prefix="/sessions"):
+        for i in range(5):
+            response = c.post(f"{prefix}/{session_id}/answers", json={"answer": f"Answer {i}"})
+            assert response.status_code == 200
+        return response.json()
+
+    def test_last_answer_returns_before_report(self):
+        with TestClient(app) as c, patch('llm_setup.llm', scripted_llm(report_delay=0.5)):
+            session_id = c.post("/sessions", json={"job_role": "React Developer", "experience": 2}).json()["session_id"]
+            start = time.perf_counter()
+            last = self.answer_all(c, session_id)
+            assert time.perf_counter() - start < 0.5
+            assert last["next_question_idx"] is None
+
+            report = c.get(f"/sessions/{session_id}/report").json()
+            assert report["status"] in ("pending", "running")
+            assert report["interview_complete"] is False
+
+            report = c.get(f"/sessions/{session_id}/report", params={"wait": 5}).json()
+            assert report["status"] == "ready"
+            assert report["interview_complete"] is True
+            assert report["user_report"] == "Well done, keep practicing state management."
+            assert report["average_score"] == 7
+
+    def test_skill_report_long_poll(self):
+        with TestClient(app) as c, patch('llm_setup.llm', scripted_llm(report_delay=0.2)):
+            session_id = c.post("/skill-sessions", json={"skills": ["react"], "experience": 2}).json()["session_id"]
+            self.answer_all(c, session_id, prefix="/skill-sessions")
+            report = c.get(f"/skill-sessions/{session_id}/report", params={"wait": 5}).json()
+            assert report["status"] == "ready"
+            assert report["admin_report"].startswith("Candidate is competent.")
+
+    def test_failed_report_reports_status(self):
+        with TestClient(app) as c, patch('llm_setup.llm', scripted_llm(report_error=RuntimeError("rate limited"))):
+            session_id = c.post("/sessions", json={"job_role": "React Developer", "experience": 2}).json()["session_id"]
+            self.answer_all(c, session_id)
+            report = c.get(f"/sessions/{session_id}/report", params={"wait": 5}).json()
+            assert report["status"] == "failed"
+            assert report["interview_complete"] is True
+
+    def test_failed_report_is_terminal_until_retried(self):
+        async def broken_report(_state):
+            raise RuntimeError("session store unavailable")
+
+        with TestClient(app) as c, patch('llm_setup.llm', scripted_llm()):
+            session_id = c.post("/sessions", json={"job_role": "React Developer", "experience": 2}).json()["session_id"]
+            with patch('main.generate_final_report', broken_report):
+                self.answer_all(c, session_id)
+                report = c.get(f"/sessions/{session_id}/report", params={"wait": 5}).json()
+            assert report["status"] == "failed"
+            assert report["interview_complete"] is True
+            assert c.get(f"/sessions/{session_id}/report", params={"wait": 0.2}).json()["status"] == "failed"
+
+            report = c.get(f"/sessions/{session_id}/report", params={"wait": 5, "retry": "true"}).json()
+            assert report["status"] == "ready"
+            assert report["user_report"] == "Well done, keep practicing state management."
+
+    def test_stale_running_report_is_restarted(self):
+        """A report left running by a worker that died is generated again; a live one is left alone"""
+        with TestClient(app) as c, patch('llm_setup.llm', scripted_llm()):
+            session_id = c.post("/sessions", json={"job_role": "React Developer", "experience": 2}).json()["session_id"]
+            self.answer_all(c, session_id)
+            assert c.get(f"/sessions/{session_id}/report", params={"wait": 5}).json()["status"] == "ready"
+            config = {"configurable": {"thread_id": session_id}}
+
+            def left_running(started_at):
+                c.portal.call(compiled_graph.aupdate_state, config, {
+                    "final_report": "", "report_status": "running",
+                    "report_started_at": started_at, "report_owner": "another-worker",
+                })
+
+            left_running(time.time())
+            assert c.get(f"/sessions/{session_id}/report", params={"wait": 0.2}).json()["status"] == "running"
+
+            left_running(time.time() - 3600)
+            report = c.get(f"/sessions/{session_id}/report", params={"wait": 5}).json()
+            assert report["status"] == "ready"
+            assert report["user_report"] == "Well done, keep practicing state management."
+
+    def test_wait_is_bounded(self):
+        response = client.get(f"/sessions/{uuid.uuid4()}/report", params={"wait": 10_000})
+        assert response.status_code == 422
+
+class TestInterviewSummary:
+    """Test the rolling summary that feeds the final report"""
+
+    def test_key_strength_and_gap_are_parsed(self):
+        from main import parse_evaluation, question_summary
+        feedback = parse_evaluation(EVALUATION.replace(
+            "ADMIN_FEEDBACK:",
+            "ADMIN_KEY_STRENGTH: Knows JSX\nADMIN_KEY_GAP: None\nADMIN_FEEDBACK:",
+        ))
+        assert feedback["admin_key_strength"] == "Knows JSX"
+        assert feedback["admin_feedback"] == "Solid basics for 2 years of experience."
+
+        item = question_summary("What is JSX?", feedback)
+        assert item["strength"] == "Knows JSX"
+        assert item["gap"] == ""
+        assert item["note"] == ""
+
+    def test_summary_grows_with_each_answer(self):
+        session_id = create_session_with_questions()
+        with patch('llm_setup.llm', scripted_llm()):
+            for i in range(2):
+                client.post(f"/sessions/{session_id}/answers", json={"answer": f"Answer {i}"})
+
+        values = asyncio.run(compiled_graph.aget_state({"configurable": {"thread_id": session_id}})).values
+        assert [item["question"] for item in values["summary"]] == QUESTIONS[:2]
+        assert values["summary"][0]["score"] == 7
+        assert values["summary"][0]["note"] == "Solid basics for 2 years of experience."
+
+    def test_report_prompt_uses_summary_not_answers(self):
+        from main import generate_final_report
+        prompts = []
+
+        async def respond(prompt):
+            prompts.append(prompt.to_string())
+            return REPORT
+
+        long_answer = "very long transcribed answer " * 200
+        state = {
+            "job_role": "React Developer",
+            "experience": 2,
+            "data": [{"question": q, "answer": long_answer, "feedback": {}} for q in QUESTIONS],
+            "summary": [{
+                "question": q, "score": 6, "technical_accuracy": 6, "completeness": 5, "clarity": 7,
+                "strength": "Clear examples", "gap": "Misses edge cases", "note": "",
+            } for q in QUESTIONS],
+        }
+        with patch('llm_setup.llm', RunnableLambda(lambda _p: REPORT, afunc=respond)):
+            result = asyncio.run(generate_final_report(state))
+
+        assert "very long transcribed answer" not in prompts[0]
+        assert "Key gap: Misses edge cases" in prompts[0]
+        assert result["final_report"]["average_score"] == 6
+        assert result["report_status"] == "ready"
+
+class TestSqliteSessionStore:
+    """Test the SQLite (WAL) session store"""
+
+    def sqlite_graph(self, path):
+        from main import workflow
+        from session_store import SqliteCheckpointSaver
+        saver = SqliteCheckpointSaver(path, pool_size=2)
+        return saver, workflow.compile(checkpointer=saver)
+
+    def test_session_flow_on_sqlite(self, tmp_path):
+        saver, graph = self.sqlite_graph(str(tmp_path / "sessions.db"))
+        with patch('main.compiled_graph', graph):
+            session_id = create_session_with_questions()
+            with patch('llm_setup.llm', scripted_llm()):
+                answer = client.post(f"/sessions/{session_id}/answers", json={"answer": "A UI library"})
+            session = client.get(f"/sessions/{session_id}").json()
+
+        assert answer.status_code == 200
+        assert session["current_question_idx"] == 1
+        assert session["data"][0]["answer"] == "A UI library"
+        assert saver.get_tuple({"configurable": {"thread_id": session_id}}) is not None
+        assert len(list(saver.list({"configurable": {"thread_id": session_id}}, limit=2))) == 2
+        saver.close()
+
+    def test_sessions_survive_restart_and_are_shared(self, tmp_path):
+        path = str(tmp_path / "sessions.db")
+        first_saver, first_graph = self.sqlite_graph(path)
+        second_saver, second_graph = self.sqlite_graph(path)
+
+        with patch('main.compiled_graph', first_graph):
+            session_id = create_session_with_questions()
+        # A second worker on the same host sees the session and can advance it
+        with patch('main.compiled_graph', second_graph), patch('llm_setup.llm', scripted_llm()):
+            assert client.post(f"/sessions/{session_id}/answers", json={"answer": "A UI library"}).status_code == 200
+        first_saver.close()
+        second_saver.close()
+
+        restarted_saver, restarted_graph = self.sqlite_graph(path)
+        with patch('main.compiled_graph', restarted_graph):
+            session = client.get(f"/sessions/{session_id}").json()
+        assert session["current_question_idx"] == 1
+        restarted_saver.delete_thread(session_id)
+        assert restarted_saver.get_tuple({"configurable": {"thread_id": session_id}}) is None
+        restarted_saver.close()
+
+    def test_concurrent_writes_are_batched(self, tmp_path):
+        from langgraph.checkpoint.base import empty_checkpoint
+        saver, _ = self.sqlite_graph(str(tmp_path / "sessions.db"))
+
+        async def write_many():
+            await asyncio.gather(*(
+                saver.aput(
+                    {"configurable": {"thread_id": f"t{i}", "checkpoint_ns": ""}},
+                    empty_checkpoint(), {"source": "input", "step": -1}, {},
+                )
+                for i in range(50)
+            ))
+
+        asyncio.run(write_many())
+        assert saver.batched_writes == 50
+        assert saver.batches < 50
+        assert saver.get_tuple({"configurable": {"thread_id": "t7"}}).metadata["step"] == -1
+        saver.close()
+
+    def test_session_count_is_not_queried_by_stats(self, tmp_path):
+        """stats() reports the count from the last sweep instead of scanning the table itself"""
+        saver, graph = self.sqlite_graph(str(tmp_path / "sessions.db"))
+        with patch('main.compiled_graph', graph):
+            create_session_with_questions()
+            create_session_with_questions()
+        assert saver.stats()["stored_sessions"] is None
+        assert saver.count_sessions() == 2
+        with patch.object(saver, '_connection', side_effect=AssertionError("stats() queried the database")):
+            assert saver.stats()["stored_sessions"] == 2
+        saver.close()
+
+    def test_unknown_store_is_rejected(self):
+        from session_store import create_checkpointer
+        with pytest.raises(ValueError):
+            create_checkpointer("redis")
+
+class TestBoundedSessionStore:
+    """Test session limits, idle expiry and archival in the in-memory store"""
+
+    def bounded_graph(self, **limits):
+        from main import workflow
+        from session_store import BoundedMemorySaver
+        saver = BoundedMemorySaver(**limits)
+        return saver, workflow.compile(checkpointer=saver)
+
+    def test_lru_session_is_archived_and_restored(self, tmp_path):
+        saver, graph = self.bounded_graph(max_sessions=1, archive_dir=str(tmp_path))
+        with patch('main.compiled_graph', graph):
+            first = create_session_with_questions()
+            second = create_session_with_questions()
+            assert saver.stats()["live_sessions"] == 1
+            assert saver.stats()["archived"] == 1
+            assert len(os.listdir(tmp_path)) == 1
+
+            # Reading the archived session loads it back (and evicts the other)
+            session = client.get(f"/sessions/{first}").json()
+            assert session["data"][0]["question"] == QUESTIONS[0]
+            assert saver.stats()["restored"] == 1
+            assert client.get(f"/sessions/{second}").status_code == 200
+
+    def test_idle_sessions_expire(self):
+        saver, graph = self.bounded_graph(idle_ttl_seconds=0.05)
+        with patch('main.compiled_graph', graph):
+            session_id = create_session_with_questions()
+            time.sleep(0.1)
+            saver.sweep()
+            assert saver.stats()["evicted_idle"] == 1
+            assert saver.stats()["live_sessions"] == 0
+            assert graph.get_state({"configurable": {"thread_id": session_id}}).values == {}
+
+    def test_completed_sessions_move_to_archive(self, tmp_path):
+        saver, graph = self.bounded_graph(completed_idle_seconds=0, archive_dir=str(tmp_path))
+        with patch('main.compiled_graph', graph):
+            session_id = create_session_with_questions()
+            graph.update_state({"configurable": {"thread_id": session_id}}, {"interview_complete": True})
+            saver.sweep()
+            assert saver.stats()["live_sessions"] == 0
+            assert saver.stats()["archived"] == 1
+
+            state = graph.get_state({"configurable": {"thread_id": session_id}})
+            assert state.values["interview_complete"] is True
+            assert saver.stats()["completed_sessions"] == 1
+            assert os.listdir(tmp_path) == []
+
+    def test_byte_budget_prefers_completed_sessions(self, tmp_path):
+        saver, graph = self.bounded_graph(archive_dir=str(tmp_path))
+        with patch('main.compiled_graph', graph):
+            done = create_session_with_questions()
+            graph.update_state({"configurable": {"thread_id": done}}, {"interview_complete": True})
+            active = create_session_with_questions()
+            saver.max_bytes = saver.stats()["live_bytes"] - 1
+            create_session_with_questions()
+
+        assert saver.stats()["evicted_budget"] >= 1
+        assert done not in saver.storage
+        assert active in saver.storage
+
+    def test_archived_sessions_expire(self, tmp_path):
+        """Unfinished sessions pushed to disk still expire on the idle TTL; finished ones on the archive TTL"""
+        saver, graph = self.bounded_graph(max_sessions=1, idle_ttl_seconds=0.2, archive_dir=str(tmp_path),
+                                          completed_idle_seconds=0, archive_ttl_seconds=3600)
+        with patch('main.compiled_graph', graph):
+            done = create_session_with_questions()
+            graph.update_state({"configurable": {"thread_id": done}}, {"interview_complete": True})
+            create_session_with_questions()
+            create_session_with_questions()
+            assert len(os.listdir(tmp_path)) == 2
+
+            time.sleep(0.25)
+            saver.sweep()
+            # Only the finished interview is kept, until the archive TTL
+            assert len(os.listdir(tmp_path)) == 1
+            assert saver.stats()["expired_archives"] == 1
+            assert graph.get_state({"configurable": {"thread_id": done}}).values["interview_complete"] is True
+
+            saver.sweep()
+            saver.archive_ttl_seconds = 0.01
+            time.sleep(0.05)
+            saver.sweep()
+            assert os.listdir(tmp_path) == []
+            assert saver.stats()["expired_archives"] == 2
+
+    def test_archive_files_are_read_and_written_off_the_event_loop(self, tmp_path):
+        import threading
+        saver, graph = self.bounded_graph(max_sessions=1, archive_dir=str(tmp_path))
+        on_loop = []
+
+        def recording(method):
+            def call(*args):
+                on_loop.append(threading.current_thread() is threading.main_thread())
+                return method(*args)
+            return call
+
+        saver._write_archive = recording(saver._write_archive)
+        saver._read_archive = recording(saver._read_archive)
+        first, second = ({"configurable": {"thread_id": name}} for name in ("first", "second"))
+
+        async def run():
+            await graph.aupdate_state(first, {"job_role": "React Developer", "experience": 2})
+            await graph.aupdate_state(second, {"job_role": "Go Developer", "experience": 3})
+            assert (await graph.aget_state(first)).values["job_role"] == "React Developer"
+            await saver.asweep()
+
+        asyncio.run(run())
+        assert on_loop and not any(on_loop)
+        assert saver.stats()["restored"] == 1
+
+    def test_evicted_session_is_found_before_its_file_is_written(self, tmp_path):
+        saver, graph = self.bounded_graph(archive_dir=str(tmp_path))
+        config = {"configurable": {"thread_id": "pending"}}
+        graph.update_state(config, {"job_role": "React Developer", "experience": 2})
+        saver._evict("pending", archive=True)
+        assert os.listdir(tmp_path) == []
+
+        assert graph.get_state(config).values["job_role"] == "React Developer"
+        saver.sweep()
+        assert os.listdir(tmp_path) == []
+
+    def test_archive_directory_is_created_with_the_first_archive(self, tmp_path):
+        archive_dir = tmp_path / "archive"
+        saver, graph = self.bounded_graph(max_sessions=1, archive_dir=str(archive_dir))
+        saver.sweep()
+        assert not archive_dir.exists()
+        with patch('main.compiled_graph', graph):
+            create_session_with_questions()
+            create_session_with_questions()
+        assert len(os.listdir(archive_dir)) == 1
+
+
+class TestCheckpointCompaction:
+    """Test pruning of old checkpoints in both session stores"""
+
+    def finished_session(self, saver):
+        from main import workflow
+        graph = workflow.compile(checkpointer=saver)
+        with TestClient(app) as c, patch('main.compiled_graph', graph), patch('llm_setup.llm', scripted_llm()):
+            session_id = c.post("/sessions", json={"job_role": "React Developer", "experience": 2}).json()["session_id"]
+            for i in range(5):
+                assert c.post(f"/sessions/{session_id}/answers", json={"answer": f"Answer {i}"}).status_code == 200
+            report = c.get(f"/sessions/{session_id}/report", params={"wait": 5}).json()
+        assert report["status"] == "ready"
+        return session_id, graph
+
+    def test_inline_compaction_keeps_latest_checkpoint(self):
+        from session_store import BoundedMemorySaver
+        full = BoundedMemorySaver()
+        compacted = BoundedMemorySaver(compaction="inline")
+        self.finished_session(full)
+        session_id, graph = self.finished_session(compacted)
+
+        config = {"configurable": {"thread_id": session_id}}
+        assert len(list(compacted.list(config))) == 1
+        assert graph.get_state(config).values["report_status"] == "ready"
+        assert len(graph.get_state(config).values["data"]) == 5
+        assert compacted.stats()["live_bytes"] * 5 < full.stats()["live_bytes"]
+
+    def test_history_window_and_periodic_compaction(self):
+        from session_store import BoundedMemorySaver
+        saver = BoundedMemorySaver(compaction="periodic", history=2)
+        session_id, _ = self.finished_session(saver)
+        config = {"configurable": {"thread_id": session_id}}
+        assert len(list(saver.list(config))) > 3
+
+        saver.compact()
+        assert len(list(saver.list(config))) == 3
+        assert saver.stats()["compacted_checkpoints"] > 0
+
+    def test_sqlite_compaction(self, tmp_path):
+        from session_store import SqliteCheckpointSaver
+        inline = SqliteCheckpointSaver(str(tmp_path / "inline.db"), compaction="inline")
+        session_id, graph = self.finished_session(inline)
+        config = {"configurable": {"thread_id": session_id}}
+        assert len(list(inline.list(config))) == 1
+        assert graph.get_state(config).values["report_status"] == "ready"
+        inline.close()
+
+        periodic = SqliteCheckpointSaver(str(tmp_path / "periodic.db"), compaction="periodic", history=1)
+        session_id, _ = self.finished_session(periodic)
+        config = {"configurable": {"thread_id": session_id}}
+        periodic.compact()
+        assert len(list(periodic.list(config))) == 2
+        periodic.close()
+
+    def test_unknown_compaction_mode(self):
+        from session_store import create_checkpointer
+        with pytest.raises(ValueError):
+            create_checkpointer("memory", compaction="sometimes")
+
+
+def fake_tts(audio=b"ID3" + bytes(range(256)) * 8, chunk_size=512, error=None, delay=0.0):
+    """Fake OpenAI client whose streaming speech endpoint yields ``audio`` in chunks."""
+    class SpeechStream:
+        async def iter_bytes(self, _chunk_size=None):
+            for i in range(0, len(audio), chunk_size):
+                if error and i:
+                    raise error
+                await asyncio.sleep(delay)
+                yield audio[i:i + chunk_size]
+
+    @asynccontextmanager
+    async def create(**kwargs):
+        yield SpeechStream()
+
+    openai_client = MagicMock()
+    openai_client.audio.speech.with_streaming_response.create = MagicMock(side_effect=create)
+    return openai_client
+
+class TestTTSCache:
+    """Test the disk-backed TTS audio cache"""
+
+    @pytest.fixture
+    def tts(self, tmp_path):
+        from audio_cache import AudioCache
+        openai_client = fake_tts()
+        with patch('main.tts_cache', AudioCache(str(tmp_path), max_bytes=1024 * 1024)), \
+                patch('main.openai_client', openai_client):
+            yield openai_client
+
+    def test_repeat_request_is_served_from_disk(self, tts):
+        first = client.post("/tts", json={"text": "What is React?"})
+        second = client.post("/tts", json={"text": "What is React?"})
+        assert first.status_code == second.status_code == 200
+        assert first.content == second.content
+        assert second.headers["content-type"] == "audio/mpeg"
+        assert "immutable" in second.headers["cache-control"]
+        assert second.headers["etag"] == f'"{first.headers["content-location"].rsplit("/", 1)[-1]}"'
+        # The streamed miss may still fail, so it carries no validators
+        assert first.headers["cache-control"] == "no-store"
+        assert "etag" not in first.headers
+        assert tts.audio.speech.with_streaming_response.create.call_count == 1
+
+        client.post("/tts", json={"text": "What is React?", "voice": "nova"})
+        assert tts.audio.speech.with_streaming_response.create.call_count == 2
+
+    def test_conditional_and_range_requests(self, tts):
+        first = client.post("/tts", json={"text": "Explain hooks"})
+        location = first.headers["content-location"]
+        etag = client.get(location).headers["etag"]
+
+        not_modified = client.get(location, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+        partial = client.get(location, headers={"Range": "bytes=0-99"})
+        assert partial.status_code == 206
+        assert partial.content == first.content[:100]
+        assert partial.headers["content-range"] == f"bytes 0-99/{len(first.content)}"
+
+        assert client.get("/tts/" + "0" * 64 + ".mp3").status_code == 404
+        assert client.get("/tts/..%2Fmain.py").status_code == 404
+
+    def test_audio_is_streamed_and_then_cached(self, tts):
+        with client.stream("POST", "/tts", json={"text": "What is JSX?"}) as response:
+            audio = response.read()
+        # Relayed chunk by chunk, so the length isn't known up front
+        assert "content-length" not in response.headers
+        assert tts.audio.speech.with_streaming_response.create.call_args.kwargs["response_format"] == "mp3"
+
+        replay = client.get(response.headers["content-location"])
+        assert replay.content == audio
+        assert replay.headers["content-length"] == str(len(audio))
+
+    def test_format_negotiation(self, tts):
+        opus = client.post("/tts", json={"text": "What are props?"}, headers={"Accept": "audio/ogg, audio/mpeg;q=0.5"})
+        assert opus.headers["content-type"] == "audio/ogg"
+        assert opus.headers["content-location"].endswith(".opus")
+        assert tts.audio.speech.with_streaming_response.create.call_args.kwargs["response_format"] == "opus"
+
+        aac = client.post("/tts", json={"text": "What are props?", "response_format": "aac"})
+        assert aac.headers["content-type"] == "audio/aac"
+
+        default = client.post("/tts", json={"text": "What are props?"}, headers={"Accept": "*/*"})
+        assert default.headers["content-type"] == "audio/mpeg"
+
+    def test_uncached_stream_names_no_location(self, tmp_path):
+        """Without a cache to land in, the streamed clip has no URL and must not be stored"""
+        from audio_cache import AudioCache
+        with patch('main.tts_cache', AudioCache(str(tmp_path), max_bytes=0)), patch('main.openai_client', fake_tts()):
+            response = client.post("/tts", json={"text": "Explain hooks"})
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "no-store"
+        assert "content-location" not in response.headers
+        assert "etag" not in response.headers
+
+    def test_interrupted_stream_is_not_cached(self, tmp_path):
+        from audio_cache import AudioCache
+        cache = AudioCache(str(tmp_path), max_bytes=1024 * 1024)
+        with patch('main.tts_cache', cache), patch('main.openai_client', fake_tts(error=RuntimeError("reset"))):
+            with pytest.raises(RuntimeError):
+                client.post("/tts", json={"text": "Explain hooks"})
+        assert cache.stats()["clips"] == 0
+        assert os.listdir(tmp_path) == []
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        from audio_cache import AudioCache
+        cache = AudioCache(str(tmp_path), max_bytes=250)
+        cache.put("a", b"x" * 100)
+        cache.put("b", b"x" * 100)
+        assert cache.get("a") is not None
+        cache.put("c", b"x" * 100)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+        # The index is rebuilt from disk on restart
+        assert AudioCache(str(tmp_path), max_bytes=250).stats()["clips"] == 2
+
+    def test_workers_share_the_directory(self, tmp_path):
+        from audio_cache import STALE_TMP_SECONDS, AudioCache
+        writing = AudioCache(str(tmp_path), max_bytes=250).writer("live.mp3")
+        writing.write(b"x" * 10)
+        crashed = tmp_path / "old.mp3.1.2.tmp"
+        crashed.write_bytes(b"x")
+        os.utime(crashed, (time.time() - STALE_TMP_SECONDS - 1,) * 2)
+
+        # A worker reading the directory for the first time removes only abandoned temp files
+        first, second = (AudioCache(str(tmp_path), max_bytes=250, rescan_seconds=0) for _ in range(2))
+        first.put("a", b"x" * 100)
+        assert not crashed.exists()
+        assert writing.commit() is not None
+
+        second.put("b", b"x" * 100)
+        time.sleep(0.01)
+        assert second.get("a") is not None
+        first.put("c", b"x" * 100)
+
+        # Eviction counts every worker's clips against the budget
+        assert sorted(os.listdir(tmp_path)) == ["a", "c"]
+        assert first.stats()["bytes"] == 200
+        assert second.get("b") is None
+
+    def test_directory_is_created_with_the_first_clip(self, tmp_path):
+        from audio_cache import AudioCache
+        cache = AudioCache(str(tmp_path / "tts"))
+        assert cache.get("a.mp3") is None
+        assert cache.stats()["clips"] == 0
+        assert not (tmp_path / "tts").exists()
+        cache.put("a.mp3", b"x")
+        assert cache.get("a.mp3") == str(tmp_path / "tts" / "a.mp3")
+
+
+class TestSpeechPrefetch:
+    """Test background synthesis of question and feedback audio"""
+
+    @pytest.fixture
+    def tts(self, tmp_path):
+        from audio_cache import AudioCache
+        openai_client = fake_tts()
+        with patch('main.TTS_PREFETCH', True), patch('main.openai_client', openai_client), \
+                patch('main.tts_cache', AudioCache(str(tmp_path), max_bytes=1024 * 1024)) as cache:
+            yield openai_client, cache
+
+    def wait_for_clips(self, cache, count):
+        deadline = time.monotonic() + 5
+        while cache.stats()["clips"] < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.stats()["clips"] == count
+
+    def test_questions_and_feedback_are_prefetched(self, tts):
+        openai_client, cache = tts
+        synthesize = openai_client.audio.speech.with_streaming_response.create
+        with TestClient(app) as c, patch('llm_setup.llm', scripted_llm()):
+            session_id = c.post("/sessions", json={"job_role": "React Developer", "experience": 2}).json()["session_id"]
+            self.wait_for_clips(cache, 5)
+            assert sorted(call.kwargs["input"] for call in synthesize.call_args_list) == sorted(QUESTIONS)
+
+            audio = c.get(f"/sessions/{session_id}/questions/1/audio")
+            assert audio.status_code == 200
+            assert audio.headers["content-type"] == "audio/mpeg"
+            assert "immutable" in audio.headers["cache-control"]
+
+            assert c.get(f"/sessions/{session_id}/feedback/0/audio").status_code == 404
+            c.post(f"/sessions/{session_id}/answers", json={"answer": "A UI library"})
+            self.wait_for_clips(cache, 6)
+            assert c.get(f"/sessions/{session_id}/feedback/0/audio").status_code == 200
+            assert synthesize.call_count == 6
+
+    def test_audio_requested_during_prefetch_waits_for_it(self, tts):
+        openai_client, cache = tts
+        synthesize = openai_client.audio.speech.with_streaming_response.create
+        with TestClient(app) as c, patch('llm_setup.llm', scripted_llm()):
+            session_id = c.post("/skill-sessions", json={"skills": ["react"], "experience": 2}).json()["session_id"]
+            responses = [c.get(f"/skill-sessions/{session_id}/questions/{i}/audio") for i in range(5)]
+            assert all(r.status_code == 200 for r in responses)
+            assert synthesize.call_count == 5
+
+    def test_missing_audio(self, tts):
+        with TestClient(app) as c, patch('llm_setup.llm', scripted_llm()):
+            session_id = c.post("/sessions", json={"job_role": "React Developer", "experience": 2}).json()["session_id"]
+            assert c.get(f"/sessions/{session_id}/questions/7/audio").status_code == 404
+            assert c.get(f"/sessions/{session_id}/feedback/2/audio").status_code == 404
+            assert c.get(f"/sessions/{uuid.uuid4()}/questions/0/audio").status_code == 404
+
+
+@pytest.fixture
+def whisper(tmp_path):
+    """Fake Whisper client and an isolated transcript cache"""
+    from transcript_cache import TranscriptCache
+    received = {}
+
+    async def transcribe(model, file, response_format, timeout=None):
+        filename, fileobj, content_type = file
+        received.update(filename=filename, content_type=content_type,
+                        audio=fileobj.read(), rolled=fileobj._rolled)
+        await asyncio.sleep(received.get("delay", 0))
+        return " I would use a context provider. \n"
+
+    openai_client = MagicMock()
+    openai_client.audio.transcriptions.create = AsyncMock(side_effect=transcribe)
+    cache = TranscriptCache(str(tmp_path / "transcripts.db"))
+    with patch('main.openai_client', openai_client), patch('main.transcript_cache', cache):
+        yield openai_client, received
+    cache.close()
+
+class TestWhisperUpload:
+    """Test streaming, size-limited /whisper uploads"""
+
+    def test_transcribes_spooled_upload(self, whisper):
+        openai_client, received = whisper
+        audio = os.urandom(300_000)
+        with patch('main.WHISPER_SPOOL_BYTES', 64 * 1024):
+            response = client.post("/whisper", files={"audio_file": ("answer.webm", audio, "audio/webm")})
+        assert response.status_code == 200
+        assert response.json() == {"text": "I would use a context provider."}
+        assert received == {"filename": "answer.webm", "content_type": "audio/webm", "audio": audio, "rolled": True}
+
+        small = client.post("/whisper", files={"audio_file": ("short.webm", b"tiny", "audio/webm")})
+        assert small.status_code == 200
+        assert received["rolled"] is False
+
+    def test_rejects_oversized_upload(self, whisper):
+        openai_client, _ = whisper
+        with patch('main.WHISPER_MAX_UPLOAD_BYTES', 100_000):
+            response = client.post("/whisper", files={"audio_file": ("long.webm", os.urandom(200_000), "audio/webm")})
+            # Within the Content-Length slack, so caught while streaming the part
+            streamed = client.post("/whisper", files={"audio_file": ("long.webm", os.urandom(120_000), "audio/webm")})
+        assert response.status_code == 413
+        assert streamed.status_code == 413
+        openai_client.audio.transcriptions.create.assert_not_called()
+
+    def test_rejects_long_recordings(self, whisper):
+        openai_client, _ = whisper
+        files = {"audio_file": ("answer.webm", b"audio", "audio/webm")}
+        with patch('main.WHISPER_MAX_DURATION_SECONDS', 60):
+            by_header = client.post("/whisper", files=files, headers={"X-Audio-Duration": "75.5"})
+            by_field = client.post("/whisper", data={"duration": "90"}, files=files)
+            allowed = client.post("/whisper", data={"duration": "42"}, files=files)
+        assert by_header.status_code == 413
+        assert by_field.status_code == 413
+        assert allowed.status_code == 200
+        assert openai_client.audio.transcriptions.create.await_count == 1
+
+    def test_requires_audio_file(self, whisper):
+        assert client.post("/whisper", data={"duration": "3"}).status_code == 422
+        assert client.post("/whisper", json={"audio_file": "x"}).status_code == 422
+
+
+class TestTranscriptCache:
+    """Test that repeated recordings are transcribed once"""
+
+    def test_retry_is_served_from_cache(self, whisper):
+        openai_client, _ = whisper
+        files = {"audio_file": ("answer.webm", b"same recording", "audio/webm")}
+        first = client.post("/whisper", files=files)
+        retry = client.post("/whisper", files=files)
+        other = client.post("/whisper", files={"audio_file": ("answer.webm", b"new recording", "audio/webm")})
+        assert first.json() == retry.json() == other.json()
+        assert openai_client.audio.transcriptions.create.await_count == 2
+
+        from main import transcript_cache
+        assert transcript_cache.stats()["hits"] == 1
+        assert transcript_cache.stats()["entries"] == 2
+
+    def test_concurrent_retry_joins_pending_transcription(self, whisper):
+        from concurrent.futures import ThreadPoolExecutor
+        openai_client, received = whisper
+        received["delay"] = 0.3
+        files = {"audio_file": ("answer.webm", b"slow recording", "audio/webm")}
+        with TestClient(app) as c, ThreadPoolExecutor(3) as pool:
+            responses = list(pool.map(lambda _: c.post("/whisper", files=files), range(3)))
+        assert all(r.status_code == 200 for r in responses)
+        assert openai_client.audio.transcriptions.create.await_count == 1
+
+    def test_store_is_persistent_and_bounded(self, tmp_path):
+        from transcript_cache import TranscriptCache
+        path = str(tmp_path / "bounded.db")
+        cache = TranscriptCache(path, max_entries=2)
+        cache.put("a", "first")
+        cache.put("b", "second")
+        assert cache.get("a") == "first"
+        time.sleep(0.01)
+        cache.put("c", "third")
+        assert cache.get("b") is None
+        assert cache.stats()["evictions"] == 1
+        cache.close()
+
+        reopened = TranscriptCache(path, max_entries=2)
+        assert reopened.get("a") == "first"
+        assert reopened.get("c") == "third"
+        assert reopened.stats()["entries"] == 2
+        reopened.close()
+
+    def test_database_is_created_on_first_use(self, tmp_path):
+        from transcript_cache import TranscriptCache
+        path = tmp_path / "lazy.db"
+        cache = TranscriptCache(str(path))
+        assert cache.stats()["entries"] == 0
+        assert not path.exists()
+        cache.put("a", "first")
+        assert path.exists()
+        cache.close()
+
+
+class TestAudioAnswers:
+    """Test transcribing and evaluating a recorded answer in one request"""
+
+    RECORDING = {"audio_file": ("answer.webm", b"recorded answer", "audio/webm")}
+
+    def test_transcript_and_feedback_in_one_response(self, whisper):
+        session_id = create_session_with_questions()
+        with patch('llm_setup.llm', scripted_llm()):
+            response = client.post(f"/sessions/{session_id}/audio-answers", files=self.RECORDING)
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result["transcript"] == "I would use a context provider."
+        assert result["user_feedback"] == "Good start, try to mention the virtual DOM."
+        assert result["next_question"] == QUESTIONS[1]
+
+        session = client.get(f"/sessions/{session_id}").json()
+        assert session["current_question_idx"] == 1
+        assert session["data"][0]["answer"] == "I would use a context provider."
+
+    def test_streamed_audio_answer(self, whisper):
+        with patch('llm_setup.llm', fake_llm([json.dumps(QUESTIONS)])):
+            session_id = client.post("/skill-sessions", json={"skills": ["react"], "experience": 2}).json()["session_id"]
+        with patch('llm_setup.llm', fake_streaming_llm(EVALUATION)):
+            response = client.post(
+                f"/skill-sessions/{session_id}/audio-answers",
+                files=self.RECORDING,
+                headers={"Accept": "text/event-stream"},
+            )
+
+        events = parse_sse(response.text)
+        assert events[0] == ("transcript", {"text": "I would use a context provider."})
+        assert any(event == "feedback" for event, _ in events)
+        kind, result = events[-1]
+        assert kind == "result"
+        assert result["admin_score"] == 7
+
+    def test_rejections(self, whisper):
+        openai_client, _ = whisper
+        missing = client.post(f"/sessions/{uuid.uuid4()}/audio-answers", files=self.RECORDING)
+        assert missing.status_code == 404
+        openai_client.audio.transcriptions.create.assert_not_called()
+
+        session_id = create_session_with_questions()
+        openai_client.audio.transcriptions.create.side_effect = None
+        openai_client.audio.transcriptions.create.return_value = "  \n"
+        silent = client.post(f"/sessions/{session_id}/audio-answers", files=self.RECORDING)
+        assert silent.status_code == 400
+
+
+class TestBatchAnswers:
+    """Test concurrent evaluation of a batch of answers"""
+
+    def test_batch_is_evaluated_concurrently(self):
+        answers = [f"Answer {i}" for i in range(5)]
+        with TestClient(app) as c, patch('llm_setup.llm', scripted_llm(evaluation_delay=0.3, report_delay=0.1)):
+            session_id = c.post("/sessions", json={"job_role": "React Developer", "experience": 2}).json()["session_id"]
+            start = time.perf_counter()
+            response = c.post(f"/sessions/{session_id}/answers:batch", params={"wait": 5}, json={"answers": answers})
+            elapsed = time.perf_counter() - start
+
+            assert response.status_code == 200
+            # One evaluation plus the report, not five evaluations in a row
+            assert elapsed < 1.0
+            body = response.json()
+            assert [r["question_idx"] for r in body["results"]] == [0, 1, 2, 3, 4]
+            assert body["results"][0]["next_question"] == QUESTIONS[1]
+            assert body["results"][4]["next_question_idx"] is None
+            assert body["status"] == "ready"
+            assert body["final_report"]["average_score"] == 7
+
+        values = compiled_graph.get_state({"configurable": {"thread_id": session_id}}).values
+        assert [row["answer"] for row in values["data"]] == answers
+        assert len(values["summary"]) == 5
+
+    def test_partial_skill_batch(self):
+        with TestClient(app) as c, patch('llm_setup.llm', scripted_llm()):
+            session_id = c.post("/skill-sessions", json={"skills": ["react"], "experience": 2}).json()["session_id"]
+            c.post(f"/skill-sessions/{session_id}/answers", json={"answer": "First"})
+            response = c.post(f"/skill-sessions/{session_id}/answers:batch", json={"answers": ["Second", "Third"]})
+
+            body = response.json()
+            assert [r["question_idx"] for r in body["results"]] == [1, 2]
+            assert body["results"][1]["next_question_idx"] == 3
+            assert body["status"] == "pending"
+            assert body["final_report"] is None
+
+            too_many = c.post(f"/skill-sessions/{session_id}/answers:batch", json={"answers": ["a", "b", "c"]})
+            assert too_many.status_code == 400
+            blank = c.post(f"/skill-sessions/{session_id}/answers:batch", json={"answers": ["a", " "]})
+            assert blank.status_code == 400
+
+    def test_failed_evaluation_leaves_session_unchanged(self):
+        session_id = create_session_with_questions()
+        with patch('llm_setup.llm', scripted_llm(report_error=None)), \
+                patch('main.parse_evaluation', side_effect=RuntimeError("bad completion")):
+            response = client.post(f"/sessions/{session_id}/answers:batch", json={"answers": ["a", "b"]})
+        assert response.status_code == 500
+        assert client.get(f"/sessions/{session_id}").json()["current_question_idx"] == 0
+
+    def test_failed_save_is_reported_like_other_errors(self):
+        session_id = create_session_with_questions()
+        with patch('llm_setup.llm', scripted_llm()), \
+                patch.object(compiled_graph, 'aupdate_state', AsyncMock(side_effect=RuntimeError("disk I/O error"))):
+            response = client.post(f"/sessions/{session_id}/answers:batch", json={"answers": ["a", "b"]})
+        assert response.status_code == 500
+        assert response.json()["detail"] == "Failed to submit answers: disk I/O error"
+
+    def test_feedback_audio_is_prefetched_for_every_answer(self):
+        session_id = create_session_with_questions()
+        with patch('llm_setup.llm', scripted_llm()), patch('main.prefetch_speech') as prefetch:
+            response = client.post(f"/sessions/{session_id}/answers:batch", json={"answers": ["a", "b", "c"]})
+        assert response.status_code == 200
+        prefetched = [text for call in prefetch.call_args_list for text in call.args[0]]
+        assert prefetched == [result["user_feedback"] for result in response.json()["results"]]
+
+
+class TestBulkScoring:
+    """Test the resumable offline bulk-scoring CLI"""
+
+    def write_input(self, path, count):
+        with open(path, "w") as f:
+            for i in range(count):
+                if i % 2:
+                    record = {"id": i, "skills": "react, nodejs", "experience": 3}
+                else:
+                    record = {"id": i, "job_role": "React Developer", "experience": 2}
+                f.write(json.dumps({**record, "question": QUESTIONS[i % 5], "answer": f"Answer {i}"}) + "\n")
+            f.write("\n")
+            f.write(json.dumps({"id": "blank", "job_role": "QA", "experience": 1, "question": "Q", "answer": " "}) + "\n")
+
+    def test_scores_every_record(self, tmp_path):
+        from bulk_score import score_file
+        self.write_input(tmp_path / "answers.jsonl", 6)
+        with patch('llm_setup.llm', scripted_llm()):
+            summary = asyncio.run(score_file(str(tmp_path / "answers.jsonl"), str(tmp_path / "scores.jsonl"), concurrency=3))
+
+        rows = [json.loads(line) for line in open(tmp_path / "scores.jsonl")]
+        assert summary["scored"] == 6
+        assert summary["failed"] == 1
+        assert summary["latency_ms"]["p50"] <= summary["latency_ms"]["max"]
+        assert sorted(row["line"] for row in rows) == [0, 1, 2, 3, 4, 5, 7]
+        assert all(row["admin_score"] == 7 for row in rows if row["id"] != "blank")
+        assert [row["error"] for row in rows if row["id"] == "blank"] == ["No answer provided."]
+
+    def test_resumes_after_interruption(self, tmp_path):
+        from bulk_score import score_file
+        self.write_input(tmp_path / "answers.jsonl", 20)
+        calls = []
+
+        async def stalls_after_eight(prompt):
+            calls.append(prompt)
+            if len(calls) > 8:
+                await asyncio.sleep(3600)
+            return EVALUATION
+
+        async def interrupted_run():
+            with patch('llm_setup.llm', RunnableLambda(lambda _prompt: None, afunc=stalls_after_eight)):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        score_file(str(tmp_path / "answers.jsonl"), str(tmp_path / "scores.jsonl"), concurrency=4),
+                        timeout=0.5,
+                    )
+
+        asyncio.run(interrupted_run())
+        assert len(open(tmp_path / "scores.jsonl").readlines()) == 8
+
+        calls.clear()
+        with patch('llm_setup.llm', scripted_llm()):
+            summary = asyncio.run(score_file(str(tmp_path / "answers.jsonl"), str(tmp_path / "scores.jsonl"), concurrency=4))
+        rows = [json.loads(line) for line in open(tmp_path / "scores.jsonl")]
+        assert sorted(row["line"] for row in rows) == list(range(20)) + [21]
+        assert summary["skipped"] == 8
+
+    def test_transient_failures_are_retried_by_the_next_run(self, tmp_path):
+        """Throttled lines get no error row and are scored again on resume"""
+        from bulk_score import score_file
+        from rate_limit import RateLimitExceeded
+        self.write_input(tmp_path / "answers.jsonl", 6)
+
+        async def throttled(prompt):
+            if "Answer 1" in prompt.to_string() or "Answer 4" in prompt.to_string():
+                raise RateLimitExceeded("gpt-4", 30)
+            return EVALUATION
+
+        with patch('llm_setup.llm', RunnableLambda(lambda _prompt: None, afunc=throttled)):
+            first = asyncio.run(score_file(str(tmp_path / "answers.jsonl"), str(tmp_path / "scores.jsonl"), concurrency=2))
+        assert first["retryable"] == 2
+        assert first["failed"] == 1
+        assert sorted(json.loads(line)["line"] for line in open(tmp_path / "scores.jsonl")) == [0, 2, 3, 5, 7]
+
+        with patch('llm_setup.llm', scripted_llm()):
+            second = asyncio.run(score_file(str(tmp_path / "answers.jsonl"), str(tmp_path / "scores.jsonl"), concurrency=2))
+        assert second["scored"] == 2
+        assert second["retryable"] == 0
+        assert second["skipped"] == 6
+        rows = [json.loads(line) for line in open(tmp_path / "scores.jsonl")]
+        assert sorted(row["line"] for row in rows) == [0, 1, 2, 3, 4, 5, 7]
+
+    def test_refuses_to_overwrite_unknown_output(self, tmp_path):
+        from bulk_score import score_file
+        self.write_input(tmp_path / "answers.jsonl", 1)
+        (tmp_path / "scores.jsonl").write_text("precious\n")
+        with pytest.raises(FileExistsError):
+            asyncio.run(score_file(str(tmp_path / "answers.jsonl"), str(tmp_path / "scores.jsonl")))
+
+    def test_latency_histogram(self):
+        from bulk_score import LatencyHistogram
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.add(ms)
+        assert 450 <= histogram.percentile(50) <= 600
+        assert 900 <= histogram.percentile(99) <= 1000
+        assert histogram.summary()["max"] == 1000
+
+
+class TestHTTPPool:
+    """Test the shared OpenAI connection pool and startup warmup"""
+
+    def test_clients_share_one_pool(self):
+        import llm_setup
+        import main
+        assert llm_setup.llm.root_async_client._client is main.http_client
+        assert main.openai_client._client is main.http_client
+
+    def test_pool_settings(self):
+        from http_pool import HTTP2_AVAILABLE, create_http_client
+        client = create_http_client(max_connections=7, max_keepalive=3, keepalive_seconds=5, connect_seconds=2)
+        pool = client._transport._pool
+        assert pool._max_connections == 7
+        assert pool._max_keepalive_connections == 3
+        assert pool._keepalive_expiry == 5
+        assert pool._http2 == HTTP2_AVAILABLE
+        assert client.timeout.connect == 2
+        assert create_http_client(http2=False)._transport._pool._http2 is False
+
+    def test_operations_pass_their_own_timeouts(self, tmp_path):
+        import main
+        from audio_cache import AudioCache
+        openai_client = fake_tts()
+        with patch('main.openai_client', openai_client), patch('main.tts_cache', AudioCache(str(tmp_path / "tts"))):
+            response = client.post("/tts", json={"text": "Hello"})
+        assert response.status_code == 200
+        kwargs = openai_client.audio.speech.with_streaming_response.create.call_args.kwargs
+        assert kwargs["timeout"] is main.TTS_TIMEOUT
+
+    def test_warm_up_counts_successes(self):
+        from http_pool import warm_up
+        outcomes = iter([None, RuntimeError("dns"), None])
+
+        async def request():
+            outcome = next(outcomes)
+            if outcome:
+                raise outcome
+
+        assert asyncio.run(warm_up(request, 3)) == 2
+        assert asyncio.run(warm_up(request, 0)) == 0
+
+    def test_startup_warms_connections(self):
+        openai_client = MagicMock()
+        openai_client.models.list = AsyncMock(side_effect=[None, RuntimeError("timeout")])
+        with patch('main.OPENAI_WARMUP_CONNECTIONS', 2), patch('main.openai_client', openai_client):
+            with TestClient(app) as c:
+                # A failed warmup slows the first request down but doesn't stop the server
+                assert c.get("/").status_code == 200
+        assert openai_client.models.list.await_count == 2
+
+    def test_warmup_off_by_default(self):
+        openai_client = MagicMock()
+        with patch('main.openai_client', openai_client):
+            with TestClient(app):
+                pass
+        openai_client.models.list.assert_not_called()
+
+
+def openai_rate_limit_error(headers=None):
+    import openai
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.RateLimitError("Rate limit reached", body=None,
+                                 response=httpx.Response(429, headers=headers or {}, request=request))
+
+class TestRateLimiting:
+    """Test the per-model token buckets, 429 retries and their HTTP mapping"""
+
+    def test_bursts_queue_within_the_budget(self):
+        from rate_limit import ModelLimiter
+
+        async def burst():
+            limiter = ModelLimiter("gpt-4", tokens_per_minute=600)  # 10 tokens a second
+            start = time.perf_counter()
+            await limiter.acquire(600)
+            await asyncio.gather(*(limiter.acquire(2) for _ in range(3)))
+            return time.perf_counter() - start, limiter.stats()
+
+        elapsed, stats = asyncio.run(burst())
+        assert 0.5 <= elapsed < 1.5
+        assert stats["admitted"] == 4
+        assert stats["throttled"] == 3
+        assert stats["max_queue_depth"] == 3
+        assert stats["queue_depth"] == 0
+
+    def test_refuses_waits_beyond_the_limit(self):
+        from rate_limit import ModelLimiter, RateLimitExceeded
+
+        async def overload():
+            limiter = ModelLimiter("gpt-4", requests_per_minute=60, tokens_per_minute=600, max_wait_seconds=1)
+            await limiter.acquire(600)
+            with pytest.raises(RateLimitExceeded) as exc:
+                await limiter.acquire(600)
+            # The refused call gave its reservation back
+            await asyncio.wait_for(limiter.acquire(5), timeout=1)
+            return exc.value, limiter.stats()
+
+        error, stats = asyncio.run(overload())
+        assert error.retry_after > 1
+        assert stats["rejected"] == 1
+        assert stats["admitted"] == 2
+
+    def test_retries_honor_retry_after(self):
+        from rate_limit import ModelLimiter
+        limiter = ModelLimiter("gpt-4", backoff_seconds=0.01)
+        calls = []
+
+        async def request():
+            calls.append(time.perf_counter())
+            if len(calls) == 1:
+                raise openai_rate_limit_error({"retry-after-ms": "200"})
+            return "ok"
+
+        assert asyncio.run(limiter.call(request)) == "ok"
+        assert calls[1] - calls[0] >= 0.2
+        assert limiter.stats()["retries"] == 1
+        assert limiter.stats()["upstream_429s"] == 1
+
+    def test_does_not_retry_other_errors(self):
+        from rate_limit import ModelLimiter
+        limiter = ModelLimiter("gpt-4")
+        request = AsyncMock(side_effect=ValueError("bad prompt"))
+        with pytest.raises(ValueError):
+            asyncio.run(limiter.call(request))
+        assert request.await_count == 1
+
+    def test_stream_retries_only_before_first_chunk(self):
+        from rate_limit import ModelLimiter
+        limiter = ModelLimiter("gpt-4", backoff_seconds=0.01)
+        attempts = []
+
+        async def request():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise openai_rate_limit_error()
+            yield "first"
+            raise openai_rate_limit_error()
+
+        async def consume():
+            chunks = []
+            async for chunk in limiter.stream(request):
+                chunks.append(chunk)
+            return chunks
+
+        with pytest.raises(Exception) as exc:
+            asyncio.run(consume())
+        assert exc.value.status_code == 429
+        assert len(attempts) == 2
+
+    def test_retry_after_header_forms(self):
+        from email.utils import formatdate
+        from rate_limit import retry_after_seconds
+        assert retry_after_seconds(openai_rate_limit_error({"retry-after": "7"})) == 7
+        assert retry_after_seconds(openai_rate_limit_error({"retry-after-ms": "1500", "retry-after": "2"})) == 1.5
+        assert 25 <= retry_after_seconds(openai_rate_limit_error({"retry-after": formatdate(time.time() + 30, usegmt=True)})) <= 30
+        assert retry_after_seconds(openai_rate_limit_error()) is None
+
+    def test_exhausted_retries_return_429(self):
+        from rate_limit import RateLimiter
+
+        async def throttled(_prompt):
+            raise openai_rate_limit_error({"retry-after": "20"})
+
+        limiter = RateLimiter(max_retries=0)
+        with patch('llm_setup.rate_limits', limiter), \
+                patch('llm_setup.llm', RunnableLambda(lambda _p: None, afunc=throttled)):
+            response = client.post("/sessions", json={"job_role": f"Role {uuid.uuid4()}", "experience": 2})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "20"
+        assert limiter.stats()["gpt-4"]["upstream_429s"] == 1
+
+    def test_llm_calls_share_the_model_limiter(self):
+        from rate_limit import RateLimiter
+        limiter = RateLimiter({"gpt-4": {"tokens_per_minute": 100000}})
+        with patch('llm_setup.rate_limits', limiter), patch('llm_setup.llm', scripted_llm()):
+            session_id = client.post("/sessions", json={"job_role": f"Role {uuid.uuid4()}", "experience": 2}).json()["session_id"]
+            assert client.post(f"/sessions/{session_id}/answers", json={"answer": "Props"}).status_code == 200
+        assert limiter.stats()["gpt-4"]["admitted"] == 2
+        assert client.get("/stats").json()["rate_limits"] is not None
+
+
+class TestSingleFlight:
+    """Test coalescing of identical concurrent LLM and TTS calls"""
+
+    def test_concurrent_callers_share_one_call(self):
+        from single_flight import SingleFlight
+        flights = SingleFlight()
+        calls = []
+
+        async def slow(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return value
+
+        async def burst():
+            results = await asyncio.gather(*(flights.do("key", lambda: slow(["q1", "q2"])) for _ in range(10)),
+                                           flights.do("other", lambda: slow(["q3"])))
+            # Finished calls are not cached
+            again = await flights.do("key", lambda: slow(["fresh"]))
+            return results, again
+
+        results, again = asyncio.run(burst())
+        assert results[:10] == [["q1", "q2"]] * 10
+        assert again == ["fresh"]
+        assert len(calls) == 3
+        assert flights.stats() == {"in_flight": 0, "calls": 3, "coalesced": 9}
+
+    def test_errors_are_shared_and_cancellation_is_not(self):
+        from single_flight import SingleFlight
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("upstream down")
+
+        async def scenario():
+            first = asyncio.ensure_future(flights.do("key", fail))
+            second = asyncio.ensure_future(flights.do("key", fail))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(RuntimeError):
+                await second
+            return first.cancelled()
+
+        assert asyncio.run(scenario())
+
+    def test_cohort_start_generates_questions_once(self):
+        calls = []
+
+        async def respond(prompt):
+            calls.append(prompt.to_string())
+            await asyncio.sleep(0.1)
+            return json.dumps(QUESTIONS)
+
+        async def cohort(skills):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+                return await asyncio.gather(*(
+                    c.post("/skill-sessions", json={"skills": skills, "experience": 3}) for _ in range(8)
+                ))
+
+        skills = [f"skill-{uuid.uuid4().hex[:8]}"]
+        with patch('llm_setup.llm', RunnableLambda(lambda _p: None, afunc=respond)):
+            responses = asyncio.run(cohort(skills))
+        assert all(r.status_code == 200 for r in responses)
+        assert len(calls) == 1
+        assert all(r.json()["questions"] == QUESTIONS for r in responses)
+        from question_cache import skills_key
+        # Every session got the same set, which is pooled once
+        assert len(question_cache._pools[skills_key(skills, 3)]) == 1
+
+    def test_identical_evaluations_coalesce_only_when_enabled(self):
+        import main
+        calls = []
+
+        async def respond(prompt):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return EVALUATION
+
+        async def evaluate_twice():
+            inputs = {"job_role": "QA", "experience": 1, "question": "What is a test?", "answer": "A check"}
+            return await asyncio.gather(*(
+                main.invoke_llm(main.EVALUATE_ANSWER_PROMPT, inputs, coalesce=main.COALESCE_EVALUATIONS)
+                for _ in range(2)
+            ))
+
+        with patch('llm_setup.llm', RunnableLambda(lambda _p: None, afunc=respond)):
+            asyncio.run(evaluate_twice())
+            assert len(calls) == 2
+            with patch('main.COALESCE_EVALUATIONS', True):
+                assert asyncio.run(evaluate_twice()) == [EVALUATION, EVALUATION]
+            assert len(calls) == 3
+
+    def test_concurrent_tts_requests_share_one_synthesis(self, tmp_path):
+        from audio_cache import AudioCache
+        openai_client = fake_tts(delay=0.02)
+
+        async def burst():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+                return await asyncio.gather(*(c.post("/tts", json={"text": "What is a closure?"}) for _ in range(6)))
+
+        with patch('main.openai_client', openai_client), patch('main.tts_cache', AudioCache(str(tmp_path))):
+            responses = asyncio.run(burst())
+        assert all(r.status_code == 200 for r in responses)
+        assert len({r.content for r in responses}) == 1
+        assert openai_client.audio.speech.with_streaming_response.create.call_count == 1
+
+    def test_shared_stream_keeps_only_unread_chunks(self, tmp_path):
+        """Memory holds what readers haven't consumed; a late reader replays the rest from the file"""
+        from single_flight import SharedStream
+        replay_path = tmp_path / "clip.tmp"
+
+        async def scenario():
+            stream = SharedStream()
+            early = stream.reader()
+            peak = 0
+            with open(replay_path, "wb") as f:
+                for i in range(100):
+                    chunk = bytes([i]) * 1024
+                    f.write(chunk)
+                    f.flush()
+                    await stream.add(chunk)
+                    peak = max(peak, stream.buffered_bytes)
+                    if i % 2:
+                        await early.__anext__(), await early.__anext__()
+            assert stream.reader() is None  # nothing to replay the dropped chunks from
+            stream.replay = lambda: open(replay_path, "rb")
+            late = stream.reader()
+            await stream.finish()
+            return peak, stream.buffered_bytes, b"".join([chunk async for chunk in late])
+
+        peak, left, replayed = asyncio.run(scenario())
+        assert peak <= 2 * 1024
+        assert left == 0
+        assert replayed == replay_path.read_bytes()
+
+    def test_late_tts_request_replays_the_clip_start_from_disk(self, tmp_path):
+        from audio_cache import AudioCache
+        audio = b"ID3" + bytes(range(256)) * 64
+        openai_client = fake_tts(audio=audio, chunk_size=1024, delay=0.005)
+
+        async def staggered():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+                first = asyncio.ensure_future(c.post("/tts", json={"text": "What is a closure?"}))
+                await asyncio.sleep(0.03)
+                second = await c.post("/tts", json={"text": "What is a closure?"})
+                return await first, second
+
+        with patch('main.openai_client', openai_client), patch('main.tts_cache', AudioCache(str(tmp_path))):
+            first, second = asyncio.run(staggered())
+        assert first.content == second.content == audio
+        assert openai_client.audio.speech.with_streaming_response.create.call_count == 1
+
+
+class TestOutputParsing:
+    """Test the shared, tolerant parsing of LLM completions"""
+
+    def test_scores_in_other_formats(self):
+        from llm_output import parse_evaluation
+        result = parse_evaluation(
+            "**USER_FEEDBACK:** Good start.\nMention the virtual DOM.\n\n"
+            "**ADMIN_SCORE:** 7/10\nAdmin technical accuracy: 8 out of 10\n"
+            "ADMIN_COMPLETENESS: 3.5/5\nADMIN_CLARITY: **6**\nADMIN_FEEDBACK: Solid basics."
+        )
+        assert result["user_feedback"] == "Good start.\nMention the virtual DOM."
+        assert (result["admin_score"], result["admin_technical_accuracy"]) == (7, 8)
+        assert (result["admin_completeness"], result["admin_clarity"]) == (7, 6)
+        assert result["admin_feedback"] == "Solid basics."
+        assert result["admin_key_gap"] == ""
+
+    def test_fenced_and_truncated_json(self):
+        from llm_output import parse_evaluation, parse_report
+        fenced = "```json\n" + json.dumps({"user_feedback": "Nice", "admin_score": "9/10"}) + "\n```"
+        assert parse_evaluation(fenced)["admin_score"] == 9
+        truncated = parse_evaluation('{"user_feedback": "Say \\"props\\"", "admin_score": 6, "admin_feedback": "Knows the ba')
+        assert truncated["user_feedback"] == 'Say "props"'
+        assert truncated["admin_score"] == 6
+        assert truncated["admin_feedback"] == "Knows the ba"
+        assert parse_report("```\nUSER_REPORT: Well done.\nADMIN_REPORT: Hire.\n```") == {
+            "user_report": "Well done.", "admin_report": "Hire."
+        }
+
+    def test_question_reply_forms(self):
+        from llm_output import parse_questions
+        assert parse_questions("```json\n" + json.dumps(QUESTIONS) + "\n```") == QUESTIONS
+        assert parse_questions("Here you go:\n" + json.dumps({"questions": QUESTIONS})) == QUESTIONS
+        assert parse_questions("1. What is React?\n2) What is JSX?") == ["What is React?", "What is JSX?"]
+        assert parse_questions('[\n  "What is React?",\n  "What is JSX?",\n  "What a') == ["What is React?", "What is JSX?"]
+        with pytest.raises(ValueError):
+            parse_questions("I cannot help with that.")
+
+    def test_fenced_questions_create_a_session(self):
+        reply = "```json\n" + json.dumps(QUESTIONS, indent=2) + "\n```"
+        with patch('llm_setup.llm', fake_llm([reply])):
+            response = client.post("/sessions", json={"job_role": f"Role {uuid.uuid4()}", "experience": 4})
+        assert response.status_code == 200
+        assert response.json()["questions"] == QUESTIONS
+
+    def test_stream_parser_decodes_json_incrementally(self):
+        from llm_output import EvaluationStreamParser
+        completion = json.dumps({"user_feedback": "Use \"keys\" in lists \u2013 always.", "admin_score": 8},
+                                ensure_ascii=True)
+        stream_parser = EvaluationStreamParser()
+        deltas = [stream_parser.feed(ch) for ch in completion]
+        assert "".join(deltas) == 'Use "keys" in lists \u2013 always.'
+        assert deltas.index("U") < len(completion) // 2
+        assert stream_parser.result()["admin_score"] == 8
+
+    def test_structured_output_when_supported(self):
+        from llm_output import supports_structured_output
+        assert not supports_structured_output("gpt-4")
+        assert supports_structured_output("gpt-4o-mini")
+
+        formats = []
+
+        async def respond(prompt, response_format=None):
+            formats.append(response_format["json_schema"]["name"])
+            if response_format["json_schema"]["name"] == "questions":
+                return json.dumps({"questions": QUESTIONS})
+            return json.dumps({"user_feedback": "Good", "admin_score": 8, "admin_technical_accuracy": 7,
+                               "admin_completeness": 6, "admin_clarity": 9, "admin_key_strength": "Clear",
+                               "admin_key_gap": "None", "admin_feedback": "Fine"})
+
+        with patch('llm_setup.STRUCTURED_OUTPUT', True), patch('llm_setup.llm', RunnableLambda(respond)):
+            session_id = client.post("/sessions", json={"job_role": f"Role {uuid.uuid4()}", "experience": 1}).json()["session_id"]
+            result = client.post(f"/sessions/{session_id}/answers", json={"answer": "Props"}).json()
+        assert formats == ["questions", "evaluation"]
+        assert result["admin_score"] == 8
+        assert result["user_feedback"] == "Good"
+
+
+class TestPromptCaching:
+    """Test the cache-friendly prompt layout and per-prompt token usage"""
+
+    PROMPTS = ["GENERATE_QUESTIONS_PROMPT", "EVALUATE_ANSWER_PROMPT", "FINAL_REPORT_PROMPT",
+               "GENERATE_SKILL_QUESTIONS_PROMPT", "EVALUATE_SKILL_ANSWER_PROMPT", "FINAL_SKILL_REPORT_PROMPT"]
+
+    @pytest.mark.parametrize("name", PROMPTS)
+    def test_static_prefix_then_payload(self, name):
+        import main
+        prompt = getattr(main, name)
+        system, human = prompt.messages
+        assert system.prompt.input_variables == []
+        assert set(human.prompt.input_variables) == set(prompt.input_variables)
+        assert prompt.name
+
+    def test_calls_share_the_system_prefix(self):
+        from main import EVALUATE_ANSWER_PROMPT, role_evaluation_inputs
+        values = {"job_role": "React Developer", "experience": 2}
+        first = EVALUATE_ANSWER_PROMPT.format_messages(**role_evaluation_inputs(values, QUESTIONS[0], "A library"))
+        second = EVALUATE_ANSWER_PROMPT.format_messages(**role_evaluation_inputs(values, QUESTIONS[1], "Syntax"))
+        assert first[0] == second[0]
+        assert first[1] != second[1]
+
+    def test_usage_is_reported_per_prompt(self):
+        from langchain_core.messages import AIMessage
+        from llm_usage import PromptUsage
+        session_id = create_session_with_questions()
+        usage = {"input_tokens": 1200, "output_tokens": 150, "total_tokens": 1350,
+                 "input_token_details": {"cache_read": 1024}}
+
+        usage_counts = PromptUsage()
+        with patch('main.prompt_usage', usage_counts), patch('llm_setup.prompt_usage', usage_counts), \
+             patch('llm_setup.llm', RunnableLambda(lambda _p: AIMessage(content=EVALUATION, usage_metadata=usage))):
+            response = client.post(f"/sessions/{session_id}/answers", json={"answer": "React is a UI library"})
+            stats = client.get("/stats").json()["prompt_usage"]
+
+        assert response.status_code == 200
+        assert response.json()["admin_score"] == 7
+        assert stats == {"evaluate_answer": {
+            "calls": 1, "input_tokens": 1200, "cached_input_tokens": 1024, "output_tokens": 150,
+            "uncached_input_tokens": 176, "cached_ratio": 0.853,
+        }}
+
+    def test_streamed_usage_is_recorded_once(self):
+        from langchain_core.messages import AIMessageChunk
+        from llm_usage import PromptUsage
+        session_id = create_session_with_questions()
+
+        async def stream(inputs):
+            async for _ in inputs:
+                pass
+            for i in range(0, len(EVALUATION), 16):
+                yield AIMessageChunk(content=EVALUATION[i:i + 16])
+            yield AIMessageChunk(content="", usage_metadata={
+                "input_tokens": 900, "output_tokens": 120, "total_tokens": 1020})
+
+        usage = PromptUsage()
+        with patch('llm_setup.prompt_usage', usage), patch('llm_setup.llm', RunnableGenerator(stream)):
+            response = client.post(
+                f"/sessions/{session_id}/answers",
+                json={"answer": "React is a UI library"},
+                headers={"Accept": "text/event-stream"},
+            )
+
+        assert parse_sse(response.text)[-1][0] == "result"
+        assert usage.stats()["evaluate_answer"]["calls"] == 1
+        assert usage.stats()["evaluate_answer"]["uncached_input_tokens"] == 900
+
+
+def metric_value(text, sample):
+    """Value of one sample line in a /metrics body, 0 if it isn't there yet."""
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+class TestMetrics:
+    """Test the Prometheus endpoint and structured logging"""
+
+    def test_exposition_format(self):
+        from metrics import MetricsRegistry
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests.", ("path",))
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        registry.callback("sessions", "Sessions.", lambda: {(): 3})
+        requests.inc(path='/a"b')
+        requests.inc(2, path='/a"b')
+        for value in (0.05, 0.5, 5.0):
+            latency.observe(value)
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{path="/a\\"b"} 3' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_count 3" in text
+        assert "latency_seconds_sum 5.55" in text
+        assert "sessions 3" in text
+        with pytest.raises(ValueError):
+            requests.inc(route="/a")
+
+    def test_requests_are_timed_by_route(self):
+        session_id = create_session_with_questions()
+        sample = 'http_request_duration_seconds_count{method="GET",route="/sessions/{session_id}",status="200"}'
+        before = metric_value(client.get("/metrics").text, sample)
+        assert client.get(f"/sessions/{session_id}").status_code == 200
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert metric_value(response.text, sample) == before + 1
+        assert "live_sessions " in response.text
+
+    def test_llm_calls_are_timed_and_counted_per_site(self):
+        from langchain_core.messages import AIMessage
+        session_id = create_session_with_questions()
+        usage = {"input_tokens": 800, "output_tokens": 100, "total_tokens": 900}
+        calls = 'upstream_call_duration_seconds_count{site="evaluate_answer",outcome="ok"}'
+        tokens = 'llm_input_tokens_total{site="evaluate_answer"}'
+        before = client.get("/metrics").text
+
+        with patch('llm_setup.llm', RunnableLambda(lambda _p: AIMessage(content=EVALUATION, usage_metadata=usage))):
+            client.post(f"/sessions/{session_id}/answers", json={"answer": "React is a UI library"})
+        after = client.get("/metrics").text
+
+        assert metric_value(after, calls) == metric_value(before, calls) + 1
+        assert metric_value(after, tokens) == metric_value(before, tokens) + 800
+        assert 'upstream_calls_in_flight{site="evaluate_answer"} 0' in after
+
+    def test_event_loop_lag_is_measured(self):
+        from metrics import LOOP_LAG_BUCKETS, Histogram, monitor_event_loop
+        lag = Histogram("lag_seconds", "Lag.", buckets=LOOP_LAG_BUCKETS)
+
+        async def scenario():
+            monitor = asyncio.create_task(monitor_event_loop(lag, interval=0.01))
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)  # block the loop
+            await asyncio.sleep(0.03)
+            monitor.cancel()
+
+        asyncio.run(scenario())
+        assert lag.count() >= 2
+        assert lag._series[()][-1] >= 0.08
+
+    def test_logs_are_json_without_candidate_answers(self):
+        import logging
+        from logging_config import JsonFormatter
+        from main import generate_final_report
+
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger("intervue")
+        logger.addHandler(handler)
+        previous_level = logger.level
+        logger.setLevel(logging.DEBUG)
+        state = {
+            "job_role": "React Developer",
+            "experience": 2,
+            "data": [{"question": q, "answer": "my secret answer", "feedback": {}} for q in QUESTIONS],
+            "summary": [],
+        }
+        try:
+            with patch('llm_setup.llm', fake_llm([REPORT])):
+                asyncio.run(generate_final_report(state))
+        finally:
+            logger.removeHandler(handler)
+            logger.setLevel(previous_level)
+
+        lines = [json.loads(JsonFormatter().format(record)) for record in records]
+        assert lines
+        assert all("my secret answer" not in json.dumps(line) and REPORT not in json.dumps(line) for line in lines)
+        started = next(line for line in lines if line["message"] == "Generating final report")
+        assert started["level"] == "DEBUG"
+        assert started["answers"] == 5
+
+
+def recording_tracer():
+    """A tracer exporting to memory, and its exporter (skips without opentelemetry-sdk)."""
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return provider.get_tracer("test"), exporter
+
+class TestTracing:
+    """Test the spans opened per request, graph node, OpenAI call and checkpoint"""
+
+    def test_answer_request_is_traced_end_to_end(self):
+        from langchain_core.messages import AIMessage
+        session_id = create_session_with_questions()
+        tracer, exporter = recording_tracer()
+        usage = {"input_tokens": 700, "output_tokens": 90, "total_tokens": 790}
+
+        with patch('tracing.tracer', tracer), \
+             patch('llm_setup.llm', RunnableLambda(lambda _p: AIMessage(content=EVALUATION, usage_metadata=usage))):
+            response = client.post(f"/sessions/{session_id}/answers", json={"answer": "React is a UI library"})
+        assert response.status_code == 200
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        request = spans["POST /sessions/{session_id}/answers"]
+        node = spans["graph.evaluate_answer"]
+        llm_call = spans["openai.evaluate_answer"]
+        assert node.parent.span_id == request.context.span_id
+        assert llm_call.parent.span_id == node.context.span_id
+        assert llm_call.attributes["gen_ai.request.model"] == "gpt-4"
+        assert llm_call.attributes["gen_ai.usage.input_tokens"] == 700
+        assert request.attributes["http.response.status_code"] == 200
+        assert {"checkpoint.get", "checkpoint.put"} <= set(spans)
+        assert all(span.attributes["session.id"] == session_id for span in exporter.get_finished_spans())
+
+    def test_new_sessions_are_tagged(self):
+        tracer, exporter = recording_tracer()
+        with patch('tracing.tracer', tracer), patch('llm_setup.llm', fake_llm([json.dumps(QUESTIONS)])):
+            session_id = client.post("/sessions", json={"job_role": f"Role {uuid.uuid4()}", "experience": 2}).json()["session_id"]
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        assert spans["POST /sessions"].attributes["session.id"] == session_id
+        assert spans["graph.generate_questions"].attributes["session.id"] == session_id
+
+    def test_file_exporter_writes_json_lines(self, tmp_path):
+        pytest.importorskip("opentelemetry.sdk")
+        from tracing import configure_tracing, traced
+        path = tmp_path / "traces.jsonl"
+        # configure_tracing replaces the module's tracer; restore it afterwards
+        with patch('tracing.tracer'):
+            provider = configure_tracing("file", str(path))
+            assert traced("graph.ask")(lambda state: {**state, "asked": True})({}) == {"asked": True}
+        provider.shutdown()
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["graph.ask"]
+        assert configure_tracing("none") is None
+
+
+class TestBenchmarks:
+    """Smoke-test the microbenchmark CLI and its regression check"""
+
+    def test_results_are_written_as_json(self, tmp_path):
+        import benchmarks
+        import llm_setup
+        llm = llm_setup.llm
+        output = tmp_path / "bench.json"
+        code = benchmarks.main(["--filter", "e", "--sessions", "10", "--rounds", "2",
+                                "--min-round-seconds", "0.001", "--output", str(output)])
+
+        report = json.loads(output.read_text())
+        names = [result["name"] for result in report["benchmarks"]]
+        assert code == 0
+        assert {"parse_evaluation[labelled]", "create_session_graph", "session_round_trip[sessions=10]",
+                "serialize_answer_response"} <= set(names)
+        assert all(result["median"] > 0 and result["unit"] == "us" for result in report["benchmarks"])
+        assert llm_setup.llm is llm
+
+    def test_regressions_are_flagged(self):
+        from benchmarks import compare
+        baseline = {"benchmarks": [{"name": "parse_report", "median": 10.0}, {"name": "report_prompt", "median": 40.0}]}
+        results = [{"name": "parse_report", "median": 13.0}, {"name": "report_prompt", "median": 44.0},
+                   {"name": "new_benchmark", "median": 5.0}]
+        assert compare(results, baseline, threshold=0.2) == [
+            {"name": "parse_report", "baseline_median": 10.0, "median": 13.0, "change": 0.3}
+        ]
+
+
+class TestAsyncExecution:
+    """Test that slow upstream calls don't serialize concurrent requests"""
+
+    def test_concurrent_session_creation_overlaps(self):
+        """Two sessions created at once should take about one LLM latency, not two"""
+        delay = 0.5
+        slow_llm = fake_llm([json.dumps(QUESTIONS), json.dumps(QUESTIONS)], delay=delay)
+
+        async def create_two():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                payload = {"job_role": "React Developer", "experience": 2}
+                return await asyncio.gather(
+                    ac.post("/sessions", json=payload),
+                    ac.post("/sessions", json=payload),
+                )
+
+        with patch('llm_setup.llm', slow_llm):
+            start = time.perf_counter()
+            responses = asyncio.run(create_two())
+            elapsed = time.perf_counter() - start
+
+        assert all(r.status_code == 200 for r in responses)
+        assert elapsed < 2 * delay
+
 if __name__ == "__main__":
     # Run tests
     pytest.main([__file__, "-v"])
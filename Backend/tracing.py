@@ -0,0 +1,211 @@
+"""
+OpenTelemetry tracing of requests, graph nodes, OpenAI calls and the session store.
+
+Each HTTP request gets a span, and everything it awaits nests under it: a
+span per graph node, per OpenAI call (model and token counts as attributes)
+and per checkpointer read or write. Every span carries the session id of the
+request, so one slow answer can be followed from the route down to the call
+that was slow.
+
+Spans are only recorded when ``opentelemetry-sdk`` is installed and an
+exporter is configured (``TRACING_EXPORTER``):
+
+- ``console``: one JSON span per line on stdout
+- ``file``: the same, appended to ``TRACING_FILE``, for offline analysis
+- ``otlp``: to an OTLP/HTTP collector (needs ``opentelemetry-exporter-otlp``)
+- ``package.module:factory``: any SpanExporter the factory returns
+
+Otherwise the API's no-op tracer is used and tracing costs next to nothing.
+"""
+
+import functools
+import importlib
+import importlib.util
+import inspect
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from opentelemetry import trace
+
+SDK_AVAILABLE = importlib.util.find_spec("opentelemetry.sdk") is not None
+TRACER_NAME = "intervue"
+
+# Replaced by configure_tracing(); the default follows whatever provider is set globally
+tracer: trace.Tracer = trace.get_tracer(TRACER_NAME)
+
+# The request being served: its ASGI scope and, once known, its session id
+current_request: ContextVar[Optional[dict]] = ContextVar("current_request", default=None)
+
+logger = logging.getLogger("intervue")
+
+
+def create_exporter(name: str, path: str = "traces.jsonl"):
+    """SpanExporter for a ``TRACING_EXPORTER`` value."""
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    def one_line(span) -> str:
+        return json.dumps(json.loads(span.to_json())) + "\n"
+
+    if name == "console":
+        return ConsoleSpanExporter(formatter=one_line)
+    if name == "file":
+        return ConsoleSpanExporter(out=open(path, "a", buffering=1), formatter=one_line)
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if ":" in name:
+        module, factory = name.split(":", 1)
+        return getattr(importlib.import_module(module), factory)()
+    raise ValueError(f"Unknown TRACING_EXPORTER '{name}'. Expected console, file, otlp or module:factory.")
+
+
+def configure_tracing(exporter, path: str = "traces.jsonl", service_name: str = "intervue-backend"):
+    """Record spans to ``exporter`` (a name as above, or a SpanExporter).
+
+    Returns the TracerProvider, or None when tracing stays off.
+    """
+    global tracer
+    if not exporter or exporter == "none":
+        return None
+    if not SDK_AVAILABLE:
+        logger.warning("Tracing needs opentelemetry-sdk; spans will not be recorded", extra={"exporter": exporter})
+        return None
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    if isinstance(exporter, str):
+        exporter = create_exporter(exporter, path)
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    # Exported off the event loop, in batches
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    tracer = provider.get_tracer(TRACER_NAME)
+    return provider
+
+
+def set_session(session_id: str) -> None:
+    """Tag the current request's spans with a session created while serving it."""
+    request = current_request.get()
+    if request is not None:
+        request["session_id"] = session_id
+
+
+def current_session() -> Optional[str]:
+    request = current_request.get()
+    if request is None:
+        return None
+    # Routing fills in path_params on the scope after the request span opened
+    return request["session_id"] or (request["scope"].get("path_params") or {}).get("session_id")
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[trace.Span]:
+    """A child span of the current one, tagged with the request's session."""
+    attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+    session_id = current_session()
+    if session_id is not None:
+        attributes.setdefault("session.id", session_id)
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def traced(name: str):
+    """Decorate a function (a graph node) to run in its own span."""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with span(name):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def set_usage(current: trace.Span, usage: Optional[dict]) -> None:
+    """Token counts of an LLM response (langchain usage_metadata) as span attributes."""
+    if not usage:
+        return
+    current.set_attribute("gen_ai.usage.input_tokens", usage.get("input_tokens", 0))
+    current.set_attribute("gen_ai.usage.output_tokens", usage.get("output_tokens", 0))
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached is not None:
+        current.set_attribute("gen_ai.usage.cached_input_tokens", cached)
+
+
+def thread_id(config) -> Optional[str]:
+    return ((config or {}).get("configurable") or {}).get("thread_id")
+
+
+def instrument_checkpointer(saver):
+    """Give the async reads and writes of a LangGraph checkpointer their own spans.
+
+    Wraps the methods on this instance, so any saver works unchanged.
+    """
+    def wrap(method, name):
+        @functools.wraps(method)
+        async def wrapper(config, *args, **kwargs):
+            with span(name, {"db.system": type(saver).__name__, "session.id": thread_id(config)}):
+                return await method(config, *args, **kwargs)
+        return wrapper
+
+    def wrap_list(method):
+        @functools.wraps(method)
+        async def wrapper(config, *args, **kwargs) -> AsyncIterator:
+            with span("checkpoint.list", {"db.system": type(saver).__name__, "session.id": thread_id(config)}):
+                async for item in method(config, *args, **kwargs):
+                    yield item
+        return wrapper
+
+    saver.aget_tuple = wrap(saver.aget_tuple, "checkpoint.get")
+    saver.aput = wrap(saver.aput, "checkpoint.put")
+    saver.aput_writes = wrap(saver.aput_writes, "checkpoint.put_writes")
+    saver.alist = wrap_list(saver.alist)
+    return saver
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per HTTP request.
+
+    The span is named after the route template once routing has matched it,
+    and the request's session id is set on it and every span below it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                current.set_attribute("http.response.status_code", message["status"])
+                if message["status"] >= 500:
+                    current.set_status(trace.StatusCode.ERROR)
+            await send(message)
+
+        with tracer.start_as_current_span(method, kind=trace.SpanKind.SERVER, attributes={
+            "http.request.method": method, "url.path": scope["path"],
+        }) as current:
+            token = current_request.set({"scope": scope, "session_id": None})
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                session_id = current_session()
+                current_request.reset(token)
+                route = scope.get("route")
+                if route is not None:
+                    current.update_name(f"{method} {route.path}")
+                    current.set_attribute("http.route", route.path)
+                if session_id:
+                    current.set_attribute("session.id", session_id)
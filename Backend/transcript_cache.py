@@ -0,0 +1,107 @@
+"""
+Persistent cache of Whisper transcripts keyed by a hash of the audio.
+
+When the network is flaky the interview page re-submits the same recording
+to ``/whisper``; with this cache a retry returns the stored transcript
+instead of paying for another transcription. Entries live in a small SQLite
+table (WAL mode, like the session store) bounded by entry count, dropping the
+least recently used first.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS transcripts_used ON transcripts (used);
+"""
+
+
+class TranscriptCache:
+    """LRU store of transcripts in the SQLite file at ``path``.
+
+    The database is opened (and created) on first use. A ``max_entries`` of
+    0 disables caching.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._entries = 0
+        self._closed = max_entries <= 0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """The open database, opening it on first use; called with the lock held."""
+        if self._conn is None and not self._closed:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._entries = self._conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        if self._closed:
+            return None
+        with self._lock:
+            if self._connect() is None:
+                return None
+            row = self._conn.execute("SELECT text FROM transcripts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE transcripts SET used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, text: str) -> None:
+        if self._closed:
+            return
+        with self._lock:
+            if self._connect() is None:
+                return
+            exists = self._conn.execute("SELECT 1 FROM transcripts WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?)", (key, text, time.time()))
+            if exists is None:
+                self._entries += 1
+            excess = self._entries - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM transcripts WHERE key IN (SELECT key FROM transcripts ORDER BY used LIMIT ?)",
+                    (excess,),
+                )
+                self._entries -= excess
+                self.evictions += excess
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            if os.path.exists(self.path):
+                self._connect()
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
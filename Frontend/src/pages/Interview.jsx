@@ -20,6 +20,10 @@ import {
   Square,
 } from "lucide-react";
 
+// Seconds each report request waits for the report (the backend's REPORT_MAX_WAIT_SECONDS)
+const REPORT_WAIT_SECONDS = 30;
+const REPORT_MAX_POLLS = 10;
+
 const Interview = () => {
   const location = useLocation();
   const navigate = useNavigate();
@@ -73,7 +77,7 @@ const Interview = () => {
   const analyserRef = useRef(null);
   const microphoneRef = useRef(null);
 
-  const fetchFinalReport = React.useCallback(async () => {
+  const fetchFinalReport = React.useCallback(async (retry = false) => {
     if (!sessionData?.session_id) return;
 
     setIsLoadingReport(true);
@@ -82,13 +86,24 @@ const Interview = () => {
         ? `http://localhost:3000/skill-sessions/${sessionData.session_id}/report`
         : `http://localhost:3000/sessions/${sessionData.session_id}/report`;
 
-      const response = await fetch(endpoint);
+      // The report is generated in the background: long-poll until it is ready.
+      // A retry asks the backend to generate a failed report again.
+      let reportData;
+      for (let attempt = 0; attempt < REPORT_MAX_POLLS; attempt++) {
+        const retryParam = retry && attempt === 0 ? "&retry=true" : "";
+        const response = await fetch(
+          `${endpoint}?wait=${REPORT_WAIT_SECONDS}${retryParam}`
+        );
+
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
 
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
+        reportData = await response.json();
+        if (reportData.status !== "pending" && reportData.status !== "running") {
+          break;
+        }
       }
-
-      const reportData = await response.json();
       setFinalReport(reportData);
     } catch (error) {
       console.error("Error fetching final report:", error);
@@ -1192,6 +1207,19 @@ const Interview = () => {
                       {finalReport.user_report}
                     </p>
                   </div>
+                  {finalReport.status === "failed" && (
+                    <div className="mt-4 flex items-center justify-between bg-yellow-50 rounded-lg p-4 border border-yellow-100">
+                      <p className="text-gray-700">
+                        We couldn't generate your full report this time.
+                      </p>
+                      <button
+                        onClick={() => fetchFinalReport(true)}
+                        className="bg-blue-600 text-white px-6 py-2 rounded-lg hover:bg-blue-700 transition-colors"
+                      >
+                        Try again
+                      </button>
+                    </div>
+                  )}
                 </div>
 
                 {/* Previous Q&A Summary */}
@@ -1239,7 +1267,7 @@ const Interview = () => {
                 </p>
                 <div className="mt-4 space-x-4">
                   <button
-                    onClick={fetchFinalReport}
+                    onClick={() => fetchFinalReport()}
                     className="bg-blue-600 text-white px-6 py-2 rounded-lg hover:bg-blue-700 transition-colors"
                   >
                     Retry